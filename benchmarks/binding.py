@@ -0,0 +1,177 @@
+"""
+Microbenchmark of the per-trigger parameter binding overhead.
+
+Compares the previous binding (every upstream output checked against every downstream input
+on each trigger, by-index accessors scanning a copy of the variables dictionary) with the
+bindings compiled at set_active_program. HALCON procedure calls are replaced by no-op calls,
+so only the Python overhead of the binding is measured. The procedures are built from the
+programs of the repository and never run, so the camera is not opened and the shape model
+cache is neither read nor written.
+
+Usage:
+    python -m benchmarks.binding [--iterations N]
+"""
+
+###########EXTERNAL IMPORTS############
+
+import argparse
+import timeit
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+import vision.procedure
+import vision.tiling
+from vision.procedure import VisionProcedure, ProcedureBinding
+import vision.construct
+
+#######################################
+
+# Construct function and program path of each camera
+CAMERAS = {
+    "PulleyCamera": (vision.construct.create_pulley_camera, "hdevelop/PulleyCamera/inspect_pulleys.hdev"),
+    "FinalInspCamera": (vision.construct.create_final_inspection_camera, "hdevelop/FinalInspCamera/fic_hdev.hdev"),
+}
+
+
+class NullProcedureCall:
+    """HDevProcedureCall replacement with no-op parameter accessors."""
+
+    def set_input_iconic_param_by_name(self, name, value):
+        pass
+
+    def set_input_control_param_by_name(self, name, value):
+        pass
+
+
+def create_procedures(create_camera, program_path: str) -> tuple:
+    """Creates the procedures of a camera with no-op HALCON procedure calls."""
+
+    initialize_procedure = vision.procedure.initialize_procedure
+    vision.procedure.initialize_procedure = lambda program_directory, procedure_name: NullProcedureCall()
+    vision.tiling.initialize_procedure = vision.procedure.initialize_procedure
+    try:
+        open, trigger, programs, displays = create_camera(program_path)
+    finally:
+        vision.procedure.initialize_procedure = initialize_procedure
+        vision.tiling.initialize_procedure = initialize_procedure
+
+    workflow = [trigger, programs[0]]
+    for procedure in workflow:
+        procedure.output_iconic = {name: object() for name in procedure.output_iconic_variables}
+        procedure.output_control = {name: [0.0] for name in procedure.output_control_variables}
+
+    return workflow, displays[0]
+
+
+def legacy_set_procedure_inputs(procedure: VisionProcedure, iconic: dict, control: dict) -> None:
+    """Binding used before the compiled bindings, kept for comparison."""
+
+    if iconic:
+        for var_name, value in iconic.items():
+            if var_name in procedure.input_iconic_variables:
+                procedure.set_input_iconic_by_name(var_name, value)
+    if control:
+        for var_name, value in control.items():
+            if var_name in procedure.input_control_variables:
+                procedure.set_input_control_by_name(var_name, value)
+
+
+def legacy_get_output_control(procedure: VisionProcedure) -> list:
+    """Output accessor used before the compiled bindings, kept for comparison."""
+
+    output = []
+    for variable_name in procedure.output_control.copy():
+        output.append(procedure.output_control[variable_name])
+    return output
+
+
+def legacy_set_input_control_by_index(procedure: VisionProcedure, index: int, value) -> None:
+    """Input accessor used before the compiled bindings, kept for comparison."""
+
+    for variable_index, variable_name in enumerate(procedure.input_control.copy()):
+        if index == variable_index:
+            procedure.input_control[variable_name] = value
+            procedure.procedure.set_input_control_param_by_name(variable_name, value)
+
+
+def legacy_trigger(workflow: list[VisionProcedure], display: VisionProcedure) -> None:
+    """Binds one trigger with the previous implementation."""
+
+    input_iconic = None
+    input_control = None
+    display_iconic = {}
+    display_control = {}
+
+    for procedure in workflow:
+        if input_iconic or input_control:
+            legacy_set_procedure_inputs(procedure, input_iconic, input_control)
+        input_iconic = procedure.output_iconic
+        input_control = procedure.output_control
+        display_iconic |= input_iconic
+        display_control |= input_control
+
+    for index in range(len(workflow[1].input_control_variables)):
+        legacy_set_input_control_by_index(workflow[1], index, [0.0])
+    legacy_set_procedure_inputs(display, display_iconic, display_control)
+    legacy_get_output_control(workflow[1])
+
+
+def compiled_trigger(
+    workflow: list[VisionProcedure],
+    display: VisionProcedure,
+    workflow_bindings: list[ProcedureBinding],
+    display_binding: ProcedureBinding,
+) -> None:
+    """Binds one trigger with the compiled bindings."""
+
+    iconic_outputs = []
+    control_outputs = []
+
+    for position, procedure in enumerate(workflow):
+        if position > 0:
+            workflow_bindings[position - 1].apply(iconic_outputs[-1:], control_outputs[-1:])
+        iconic_outputs.append(dict(procedure.output_iconic))
+        control_outputs.append(dict(procedure.output_control))
+
+    for index in range(len(workflow[1].input_control_variables)):
+        workflow[1].set_input_control_by_index(index, [0.0])
+    display_binding.apply(iconic_outputs, control_outputs)
+    workflow[1].get_output_control()
+
+
+def run_benchmark(name: str, iterations: int) -> None:
+    """Times the legacy and compiled bindings of a camera and prints the per-trigger overhead."""
+
+    workflow, display = create_procedures(*CAMERAS[name])
+    workflow_bindings = [ProcedureBinding(consumer, [producer]) for producer, consumer in zip(workflow, workflow[1:])]
+    display_binding = ProcedureBinding(display, workflow)
+
+    legacy_time = min(timeit.repeat(lambda: legacy_trigger(workflow, display), number=iterations, repeat=5))
+    compiled_time = min(
+        timeit.repeat(
+            lambda: compiled_trigger(workflow, display, workflow_bindings, display_binding),
+            number=iterations,
+            repeat=5,
+        )
+    )
+
+    legacy_us = legacy_time / iterations * 1e6
+    compiled_us = compiled_time / iterations * 1e6
+    print(f"{name}: legacy {legacy_us:.2f} us/trigger, compiled {compiled_us:.2f} us/trigger, "
+          f"speed-up {legacy_us / compiled_us:.2f}x")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Per-trigger parameter binding microbenchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name in CAMERAS:
+        run_benchmark(name, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Offline replay and throughput benchmark over stored images.
+
+Drives a VisionCamera directly, without the Modbus and WebSocket stack: the trigger procedure is
+replaced by a replay of the images of a directory, read once before the run, and the active program
+and its display run on every frame with the same backpressure as the continuous mode (the display
+of a frame overlaps the processing of the next one, and must finish before the next acquisition).
+
+Reports the frame rate and the latency percentiles of every stage and procedure, and compares the
+program outputs of every image and the performance with a golden JSON file, so that correctness and
+performance regressions are caught in one run. The exit code is 1 when a regression is found.
+
+Usage:
+    python -m benchmarks.replay FinalInspCamera --program 1 --inputs "[0, 0.0, 6.28, 0.5]" --update-golden
+    python -m benchmarks.replay FinalInspCamera --program 1 [--frames N] [--golden PATH]
+    python -m benchmarks.replay PulleyCamera --options '{"tiled": true}' [--golden PATH]
+"""
+
+###########EXTERNAL IMPORTS############
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.camera import VisionCamera
+from vision.procedure import VisionProcedure
+from vision.data.variables import *
+from util.debug import LoggerManager
+from util.histogram import LatencyHistogram
+import vision.construct
+
+#######################################
+
+# Construct function, program path and image pattern of each camera
+CAMERAS = {
+    "PulleyCamera": (
+        vision.construct.create_pulley_camera,
+        "hdevelop/PulleyCamera/inspect_pulleys.hdev",
+        "img*.jpg",
+    ),
+    "FinalInspCamera": (
+        vision.construct.create_final_inspection_camera,
+        "hdevelop/FinalInspCamera/fic_hdev.hdev",
+        "FIC*.jpg",
+    ),
+}
+
+# Stage of the whole cycle, from the acquisition to the end of the display of the previous frame
+CYCLE_STAGE = "cycle"
+
+# Relative frame rate drop, or latency increase, reported as a performance regression
+DEFAULT_MAX_REGRESSION = 0.2
+
+# Absolute difference between float outputs reported as a correctness regression
+DEFAULT_TOLERANCE = 1e-4
+
+# Latency percentile compared with the golden file
+REGRESSION_PERCENTILE = "p95"
+
+# Stages reported but not compared, the queue wait of a single camera is scheduling noise
+UNCOMPARED_STAGES = (QUEUE_STAGE,)
+
+
+class ReplayProcedure(VisionProcedure):
+    """
+    Trigger procedure replaying a list of images instead of grabbing them from the camera.
+
+    The images are returned in order and the replay wraps around after the last one, so the
+    acquisition stage only measures the hand-off of an image already in memory.
+
+    Attributes:
+        images (list[ha.HObject]): Images to replay.
+        names (list[str]): File name of each image.
+        position (int): Index of the next image to replay.
+    """
+
+    def __init__(self, trigger: VisionProcedure, images: list[ha.HObject], names: list[str]):
+
+        super().__init__(
+            program_directory=trigger.program_directory,
+            name=trigger.name,
+            input_iconic_variables=trigger.input_iconic_variables,
+            output_iconic_variables=trigger.output_iconic_variables,
+            input_control_variables=trigger.input_control_variables,
+            input_control_types=trigger.input_control_types,
+            output_control_variables=trigger.output_control_variables,
+            output_control_types=trigger.output_control_types,
+            procedure_name=trigger.procedure_name,
+        )
+
+        self.images = images
+        self.names = names
+        self.position = 0
+
+    def execute(self):
+        """Sets the next image as the output of the trigger."""
+
+        self.output_iconic["Image"] = self.images[self.position % len(self.images)]
+        self.position += 1
+
+    def get_last_name(self) -> str:
+        """Returns the file name of the last image replayed."""
+
+        return self.names[(self.position - 1) % len(self.names)]
+
+
+def read_images(directory: str, pattern: str) -> tuple[list[ha.HObject], list[str]]:
+    """Reads the images of a directory matching a pattern, sorted by file name."""
+
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No image matching {pattern} in {directory}")
+    return [ha.read_image(path) for path in paths], [os.path.basename(path) for path in paths]
+
+
+def create_replay_camera(
+    name: str,
+    program_path: str,
+    create_camera,
+    images: list[ha.HObject],
+    names: list[str],
+    pipelined: bool,
+    options: dict = None,
+) -> VisionCamera:
+    """
+    Creates a camera whose trigger replays the images, and prepares its programs.
+
+    The open procedure is still run, since it loads the shape models, but the acquisition device
+    it opens is not used, so a missing device is only logged.
+    """
+
+    logger = LoggerManager.get_logger(__name__)
+
+    open, trigger, programs, displays = create_camera(program_path, **(options or {}))
+    camera = VisionCamera(
+        name,
+        "Replay",
+        "",
+        open,
+        ReplayProcedure(trigger, images, names),
+        programs,
+        displays,
+        pipelined,
+        warmup_image_path=None,
+    )
+
+    try:
+        camera.open_procedure.run()
+    except Exception as e:
+        logger.warning(f"Acquisition device of camera {name} not opened, not used by the replay: {e}")
+
+    camera.prepare_programs()
+    return camera
+
+
+def to_json_value(value) -> list:
+    """Converts a program output to a list of JSON values."""
+
+    if value is None:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [item if isinstance(item, (int, float, str)) else str(item) for item in value]
+
+
+def replay(camera: VisionCamera, program: int, inputs: list, frames: int) -> dict:
+    """
+    Replays the images through a program and measures the pipeline.
+
+    Args:
+        camera (VisionCamera): Camera created by create_replay_camera.
+        program (int): Number of the program to run.
+        inputs (list): Value of each program input, in order.
+        frames (int): Number of frames to run, the images are replayed in a loop.
+
+    Returns:
+        dict: The outputs of the first run of every image, the frame rate and the latency summaries.
+    """
+
+    if not camera.set_active_program(program):
+        raise ValueError(f"Invalid program number: {program}")
+    for index, value in enumerate(inputs):
+        camera.set_program_input(index, value)
+
+    output_names = [variable[0] for variable in camera.get_program_output_variables().values()]
+    replay_procedure: ReplayProcedure = camera.trigger_procedure
+    camera.reset_latency_statistics()
+    cycle_latency = LatencyHistogram()
+
+    results = {}
+    previous_display = None
+    start_time = time.perf_counter()
+
+    for _ in range(frames):
+        cycle_start_ns = time.perf_counter_ns()
+
+        if not camera.execute_program():
+            raise RuntimeError(f"Program {program} failed on image {replay_procedure.get_last_name()}")
+        display_future = camera.get_display_future()
+
+        name = replay_procedure.get_last_name()
+        if name not in results:
+            outputs = camera.get_program_output()
+            results[name] = {
+                variable_name: to_json_value(value) for variable_name, value in zip(output_names, outputs)
+            }
+
+        if previous_display is not None:
+            previous_display.result()
+        previous_display = display_future
+        cycle_latency.record(time.perf_counter_ns() - cycle_start_ns)
+
+    if previous_display is not None:
+        previous_display.result()
+    elapsed_time = time.perf_counter() - start_time
+
+    latency = camera.get_latency_statistics()
+    latency["stages"][CYCLE_STAGE] = cycle_latency.get_summary()
+
+    return {
+        "camera": camera.name,
+        "program": program,
+        "inputs": inputs,
+        "frames": frames,
+        "fps": frames / elapsed_time if elapsed_time > 0 else 0.0,
+        "dropped_frames": camera.get_dropped_frames(),
+        "results": results,
+        "latency": latency,
+    }
+
+
+def values_match(expected: list, actual: list, tolerance: float) -> bool:
+    """Returns True if two output values are equal, floats within the tolerance."""
+
+    if len(expected) != len(actual):
+        return False
+    for expected_item, actual_item in zip(expected, actual):
+        if isinstance(expected_item, float) or isinstance(actual_item, float):
+            if not isinstance(actual_item, (int, float)) or not isinstance(expected_item, (int, float)):
+                return False
+            if not math.isclose(expected_item, actual_item, abs_tol=tolerance):
+                return False
+        elif expected_item != actual_item:
+            return False
+    return True
+
+
+def compare(report: dict, golden: dict, tolerance: float, max_regression: float) -> list[str]:
+    """
+    Compares a replay report with a golden report.
+
+    Args:
+        report (dict): Report of the replay.
+        golden (dict): Golden report.
+        tolerance (float): Absolute difference allowed between float outputs.
+        max_regression (float): Relative frame rate drop or latency increase allowed.
+
+    Returns:
+        list[str]: Description of every regression, empty if none.
+    """
+
+    regressions = []
+
+    for name, expected_outputs in golden["results"].items():
+        actual_outputs = report["results"].get(name)
+        if actual_outputs is None:
+            regressions.append(f"{name}: not replayed")
+            continue
+        for variable_name, expected in expected_outputs.items():
+            actual = actual_outputs.get(variable_name)
+            if actual is None or not values_match(expected, actual, tolerance):
+                regressions.append(f"{name}: {variable_name} is {actual}, expected {expected}")
+
+    if report["fps"] < golden["fps"] * (1 - max_regression):
+        regressions.append(f"Frame rate is {report['fps']:.2f} fps, golden {golden['fps']:.2f} fps")
+
+    for stage, expected in golden["latency"]["stages"].items():
+        if stage in UNCOMPARED_STAGES:
+            continue
+        actual = report["latency"]["stages"].get(stage)
+        if actual and expected["count"] and actual[REGRESSION_PERCENTILE] > expected[REGRESSION_PERCENTILE] * (
+            1 + max_regression
+        ):
+            regressions.append(
+                f"Stage {stage} {REGRESSION_PERCENTILE} is {actual[REGRESSION_PERCENTILE] * 1e3:.2f} ms, "
+                f"golden {expected[REGRESSION_PERCENTILE] * 1e3:.2f} ms"
+            )
+
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    """Prints the frame rate and the latency percentiles of a report."""
+
+    print(f"{report['camera']} program {report['program']}: {report['frames']} frames, "
+          f"{report['fps']:.2f} fps, {report['dropped_frames']} dropped")
+
+    for group in ("stages", "procedures"):
+        for name, summary in report["latency"][group].items():
+            if not summary["count"]:
+                continue
+            percentiles = ", ".join(
+                f"{key} {value * 1e3:.2f} ms" for key, value in summary.items() if key.startswith("p")
+            )
+            print(f"  {name}: {percentiles}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Offline replay and throughput benchmark over stored images")
+    parser.add_argument("camera", choices=list(CAMERAS))
+    parser.add_argument("--program", type=int, default=1)
+    parser.add_argument("--inputs", type=json.loads, default=None, help="JSON list of the program inputs")
+    parser.add_argument("--options", type=json.loads, default=None, help="JSON object of the camera options")
+    parser.add_argument("--images", default=None, help="Image directory, the program directory by default")
+    parser.add_argument("--pattern", default=None, help="Image file pattern")
+    parser.add_argument("--frames", type=int, default=None, help="Frames to run, 20 per image by default")
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--golden", default=None, help="Golden JSON file, next to the program by default")
+    parser.add_argument("--update-golden", action="store_true", help="Write the report as the golden file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    args = parser.parse_args()
+
+    create_camera, program_path, pattern = CAMERAS[args.camera]
+    program_directory = os.path.dirname(program_path)
+    mode = "".join(f"_{key}-{value}" for key, value in sorted((args.options or {}).items()))
+    golden_path = args.golden or os.path.join(program_directory, f"replay_golden_{args.program}{mode}.json")
+
+    golden = None
+    if os.path.exists(golden_path) and not args.update_golden:
+        with open(golden_path) as file:
+            golden = json.load(file)
+
+    inputs = args.inputs if args.inputs is not None else (golden["inputs"] if golden else [])
+    images, names = read_images(args.images or program_directory, args.pattern or pattern)
+    frames = args.frames or 20 * len(images)
+
+    camera = create_replay_camera(
+        args.camera, program_path, create_camera, images, names, args.pipelined, args.options
+    )
+    report = replay(camera, args.program, inputs, frames)
+    print_report(report)
+
+    if args.update_golden:
+        with open(golden_path, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Golden file written to {golden_path}")
+        return
+
+    if golden is None:
+        print(f"No golden file at {golden_path}, run with --update-golden to create it")
+        return
+
+    regressions = compare(report, golden, args.tolerance, args.max_regression)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regression against the golden file")
+
+
+if __name__ == "__main__":
+    main()
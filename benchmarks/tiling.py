@@ -0,0 +1,159 @@
+"""
+Scaling benchmark of the tiled pulley extraction over the stored pulley images.
+
+Runs the single pass ExtractPulleys and the tiled extraction on every image, the tiles running on
+a camera lane of 1, 2, 4... workers up to the CPU count, and reports the time per image and the
+speed-up of each worker count. The outputs of the tiled extraction are compared with those of the
+single pass on every image, the exit code is 1 when they differ.
+
+The tiles run with one HALCON thread each by default, so the scaling comes from the tiles and not
+from the operator parallelism of HALCON; the single pass keeps the HALCON default. With the simulated
+backend the outputs are synthetic and are not compared, and the tile times do not depend on their size.
+
+Usage:
+    python -m benchmarks.tiling [--tiles 2 2] [--workers 1 2 4] [--repeat N] [--halcon-threads N]
+"""
+
+###########EXTERNAL IMPORTS############
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha, BACKEND, SIMULATED_BACKEND
+from vision.procedure import VisionProcedure
+from vision.tiling import TiledPulleyProcedure
+from vision.executors import executor_manager, ResourceBudget
+from benchmarks.replay import read_images, to_json_value, values_match, DEFAULT_TOLERANCE
+import vision.construct
+
+#######################################
+
+PROGRAM_PATH = "hdevelop/PulleyCamera/inspect_pulleys.hdev"
+
+# Inputs of the pulley programs, as in the main procedure of the program
+DEFAULT_INPUTS = {"MinIntRadius": 47.5, "MaxIntRadius": 52.5, "MinExtRadius": 94.5, "MaxExtRadius": 104.5}
+
+
+def get_worker_counts() -> list[int]:
+    """Returns 1, 2, 4... up to the CPU count, and the CPU count itself."""
+
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def run(procedure: VisionProcedure, image: ha.HObject) -> dict:
+    """Runs a pulley procedure on an image and returns its outputs, by name."""
+
+    procedure.set_input_iconic_by_name("Image", image)
+    for variable_name, value in DEFAULT_INPUTS.items():
+        procedure.set_input_control_by_name(variable_name, value)
+    procedure.run()
+    return {
+        variable_name: to_json_value(value) for variable_name, value in procedure.get_output_control_dict().items()
+    }
+
+
+def measure(procedure: VisionProcedure, images: list[ha.HObject], repeat: int) -> tuple[float, list[dict]]:
+    """
+    Runs a procedure on every image, once to warm up and `repeat` times to time it.
+
+    Returns:
+        tuple: The median time per image in seconds, and the outputs of each image.
+    """
+
+    outputs = [run(procedure, image) for image in images]
+
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for image in images:
+            run(procedure, image)
+        times.append((time.perf_counter() - start_time) / len(images))
+
+    return statistics.median(times), outputs
+
+
+def compare(expected: list[dict], actual: list[dict], names: list[str]) -> list[str]:
+    """Returns a description of every output of the tiled extraction that differs from the single pass."""
+
+    differences = []
+    for name, expected_outputs, actual_outputs in zip(names, expected, actual):
+        for variable_name, value in expected_outputs.items():
+            if not values_match(value, actual_outputs.get(variable_name, []), DEFAULT_TOLERANCE):
+                differences.append(f"{name}: {variable_name} is {actual_outputs.get(variable_name)}, expected {value}")
+    return differences
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the tiled pulley extraction")
+    parser.add_argument("--tiles", type=int, nargs=2, default=[2, 2], metavar=("ROWS", "COLUMNS"))
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Worker counts, up to the CPUs by default")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--halcon-threads", type=int, default=1, help="HALCON threads of each tile, 0 for the default")
+    parser.add_argument("--images", default=os.path.dirname(PROGRAM_PATH))
+    parser.add_argument("--pattern", default="img*.jpg")
+    args = parser.parse_args()
+
+    worker_counts = args.workers or get_worker_counts()
+    executor_manager.configure(max(worker_counts))
+
+    images, names = read_images(args.images, args.pattern)
+    _, _, programs, _ = vision.construct.create_pulley_camera(PROGRAM_PATH)
+    single_pass = programs[0]
+    single_pass.compile()
+
+    single_time, expected = measure(single_pass, images, args.repeat)
+    print(f"{len(images)} images, {args.tiles[0]}x{args.tiles[1]} tiles, {os.cpu_count()} CPUs")
+    print(f"  single pass: {single_time * 1e3:.2f} ms/image")
+
+    differences = []
+    base_time = None
+    for workers in worker_counts:
+        tiled = TiledPulleyProcedure(
+            program_directory=PROGRAM_PATH,
+            name=f"TiledExtractPulleys{workers}",
+            output_control=dict(zip(single_pass.output_control_variables, single_pass.output_control_types)),
+            tile_rows=args.tiles[0],
+            tile_columns=args.tiles[1],
+        )
+        budget = ResourceBudget(workers=workers, halcon_threads=args.halcon_threads or None)
+        tiled.set_executor(executor_manager.register(tiled.name, budget))
+        tiled.compile()
+
+        tiled_time, actual = measure(tiled, images, args.repeat)
+        base_time = base_time or tiled_time
+        print(
+            f"  {workers} workers: {tiled_time * 1e3:.2f} ms/image, "
+            f"{single_time / tiled_time:.2f}x single pass, {base_time / tiled_time:.2f}x {worker_counts[0]} workers, "
+            f"tile speed-up {tiled.get_speed_up():.2f}"
+        )
+
+        if BACKEND != SIMULATED_BACKEND:
+            differences += [f"{workers} workers, {difference}" for difference in compare(expected, actual, names)]
+
+    if BACKEND == SIMULATED_BACKEND:
+        print("Outputs not compared, the simulated backend generates them")
+        return
+
+    for difference in differences:
+        print(f"DIFFERENCE {difference}")
+    if differences:
+        sys.exit(1)
+    print("Tiled outputs identical to the single pass")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,12 @@ import logging
 from util.debug import LoggerManager
 import util.functions as functions
 from vision.manager import VisionManager, VisionSystem
+from vision.production import (
+    PRODUCTION_WINDOWS,
+    PRODUCTION_REGISTERS,
+    PRODUCTION_REGISTER_VALUES,
+    PRODUCTION_REGISTER_SCALES,
+)
 from vision.data.variables import *
 
 #######################################
@@ -395,6 +401,41 @@ class ModbusTCPServer:
 
         return (current_coil, current_register)
 
+    def init_production(self, vision_system: VisionSystem, initial_register_addr: int) -> int:
+        """
+        Initialize the Modbus production registers of a vision system.
+
+        The production registers hold the parts per minute, the yield and the utilization of the
+        camera over each production window: parts per minute in whole parts, yield and utilization
+        in hundredths of a percent (see PRODUCTION_REGISTER_SCALES).
+
+        Args:
+            vision_system (VisionSystem): The vision system to initialize production registers for.
+            initial_register_addr (int): The starting Modbus address for the production registers.
+
+        Returns:
+            int: The next available register address after initialization.
+        """
+
+        current_register = initial_register_addr
+
+        for name in PRODUCTION_REGISTERS:
+
+            self.registers.append(
+                ModbusRegister(
+                    device_name=vision_system.name,
+                    register_section=PRODUCTION_SECTION,
+                    register_adress=current_register,
+                    register_direction=VariableDirection.OUTPUT,
+                    register_name=name,
+                )
+            )
+
+            # Increment current register
+            current_register += 1
+
+        return current_register
+
     def init_context(self) -> ObservableModbusSlaveContext:
         """
         Initialize the Modbus slave context with coils and registers for all vision systems.
@@ -403,7 +444,9 @@ class ModbusTCPServer:
         1. Iterating through all vision systems registered with the vision manager
         2. Initializing input and output coils and registers for each system
         3. Padding addresses to nice boundaries (multiples of 100) for readability
-        4. Creating a ModbusSlaveContext with appropriate data blocks
+        4. Initializing the production registers of each system, after those of every system so
+           that adding them did not move the existing addresses
+        5. Creating a ModbusSlaveContext with appropriate data blocks
 
         The initialized context includes all control coils, status coils, program numbers,
         input registers, and output registers for all vision systems, with sufficient
@@ -432,6 +475,11 @@ class ModbusTCPServer:
             current_coil = functions.round_to_nearest_10(current_coil)
             current_reg = functions.round_to_nearest_10(current_reg)
 
+        for name, vision_system in self.vision_manager.vision_systems.items():
+
+            current_reg = self.init_production(vision_system, current_reg)
+            current_reg = functions.round_to_nearest_10(current_reg)
+
         store = ObservableModbusSlaveContext(
             co=ModbusSequentialDataBlock(1, [0] * current_coil),
             hr=ModbusSequentialDataBlock(1, [0] * current_reg),
@@ -558,6 +606,7 @@ class ModbusTCPServer:
                     self.update_coils(peripheral, section, value),
                     self.update_program_number_ack(peripheral, section, value),
                     self.update_outputs_registers(peripheral, section, value),
+                    self.update_production_registers(peripheral, section, value),
                 )
             except Exception as e:
                 logger.error(f"WebSocket Server - Error processing update request", e)
@@ -692,6 +741,52 @@ class ModbusTCPServer:
         except Exception as e:
             logger.error(f"Failed to update outputs registers on the modbus server: {e}")
 
+    async def update_production_registers(self, peripheral: str, section: str, input_value: Any) -> None:
+        """
+        Update the production registers in the Modbus server from the production statistics.
+
+        This method processes PRODUCTION_SECTION messages and writes the register values of the
+        statistics scaled by PRODUCTION_REGISTER_SCALES, parts per minute in whole parts, yield and
+        utilization in hundredths of a percent, rounded and clamped to the range of a holding register.
+
+        Args:
+            peripheral (str): The name of the peripheral/vision system
+            section (str): The section of the message (e.g., "production")
+            input_value (Any): The production statistics, with the value of each production
+                            register under 'registers'
+
+        Returns:
+            None
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            if section in [PRODUCTION_SECTION]:
+                matching_registers = [
+                    reg
+                    for reg in self.registers
+                    if reg.device_name == peripheral and reg.register_section == PRODUCTION_SECTION
+                ]
+                matching_registers.sort(key=lambda r: r.register_adress)
+
+                values = input_value.get("registers", [])
+                if len(matching_registers) != len(values):
+                    raise ValueError(
+                        f"The length of the production registers {len(matching_registers)} is not equal to the length of the values {len(values)}"
+                    )
+
+                scales = [
+                    PRODUCTION_REGISTER_SCALES[value] for _ in PRODUCTION_WINDOWS for value in PRODUCTION_REGISTER_VALUES
+                ]
+                converted_values = [
+                    min(max(round(float(value) * scale), 0), 0xFFFF) for value, scale in zip(values, scales)
+                ]
+                await self.write_batch_hreg(32, matching_registers, converted_values)
+
+        except Exception as e:
+            logger.error(f"Failed to update production registers on the modbus server: {e}")
+
     async def write_batch_coils(self, batch_size: int, list: List[ModbusCoil], values: List[bool]) -> None:
         """
         Write boolean values to Modbus coils in batches.
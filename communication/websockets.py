@@ -88,6 +88,7 @@ class WebSocketServer:
             logger.info(f"WebSocket Server - Closing connection from {client_address}")
             async with self.lock:
                 self.client = None
+            await self.receive_queue.put({"peripheral": "frontend", "type": "status", "data": "disconnected"})
 
     async def process_send_messages(self) -> None:
         """
@@ -106,12 +107,15 @@ class WebSocketServer:
             else:
                 await asyncio.sleep(0.5)
 
-    async def send_message(self, message: dict) -> None:
+    async def send_message(self, message: dict | bytes) -> None:
         """
         Send a message to the connected WebSocket client.
 
+        Dictionaries are sent as JSON text messages and bytes, such as encoded frames, as binary
+        messages.
+
         Args:
-            message (dict): The message to send.
+            message (dict | bytes): The message to send.
         """
 
         logger = LoggerManager.get_logger(__name__)
@@ -119,8 +123,11 @@ class WebSocketServer:
         async with self.lock:
             if self.client:
                 try:
-                    message = json.dumps(message)
-                    logger.debug(f"Message sent: {message}")
+                    if isinstance(message, bytes):
+                        logger.debug(f"Binary message sent: {len(message)} bytes")
+                    else:
+                        message = json.dumps(message)
+                        logger.debug(f"Message sent: {message}")
                     await self.client.send(message)
                 except Exception as e:
                     logger.error(f"WebSocket Server - Failed to send message", e)
@@ -45,4 +45,23 @@ function continuous_trigger_button(){
     continuous_trigger_state = !continuous_trigger_state;
     document.getElementById("continuous_trigger_button").style.backgroundColor = continuous_trigger_state ? "rgb(0, 255, 0)" : "rgb(127, 127, 127)";
     vision_manager.active_device.set_continuous_trigger(continuous_trigger_state);
-}
\ No newline at end of file
+}
+
+document.getElementById("camera_image").addEventListener('dblclick', function() {
+    if(vision_manager.active_device != null){
+        vision_manager.active_device.request_full_frame();
+    }
+});
+
+document.getElementById("historic_button").addEventListener('click', function() {
+    if(vision_manager.active_device != null){
+        vision_manager.active_device.show_previous_frame();
+    }
+});
+
+// Escape leaves the history and goes back to the live frames
+document.addEventListener('keydown', function(event) {
+    if(event.key == "Escape" && vision_manager.active_device != null){
+        vision_manager.active_device.exit_history();
+    }
+});
\ No newline at end of file
@@ -35,6 +35,7 @@ class VisionOutputs {
         };
 
         this.statistics = { min_run_time: 0.0, run_time: 0.0, max_run_time: 0.0 };
+        this.production = {};
         this.program_number_acknowledge = null;
         this.outputs_register = new Array();
         this.outputs_variables = new Array();
@@ -58,6 +59,12 @@ class VisionDevice {
         this.startOutputsChangeDetection();
 
         this.camera_image_element = document.getElementById("camera_image");
+        this.frame_url = null;
+        this.frame_id = null;
+        this.frame_rendition = null;
+        this.history = new Array();
+        this.history_entry = null;
+        this.history_mode = false;
 
         this.status_elements = {
             ready: document.getElementById("io_ready"),
@@ -189,13 +196,67 @@ class VisionDevice {
             : "rgb(255, 255, 255)";
     }
 
+    set_frame(frame_id, rendition, blob) {
+        if (this.frame_url != null) {
+            URL.revokeObjectURL(this.frame_url);
+        }
+        this.frame_url = URL.createObjectURL(blob);
+        this.frame_id = frame_id;
+        this.frame_rendition = rendition;
+
+        // Live frames are not shown while browsing the history, until it is left with exit_history
+        if (rendition == "history" || rendition == "raw") {
+            this.history_mode = true;
+        } else if (this.history_mode) {
+            return;
+        }
+
+        if (this.active) {
+            this.update_image();
+        }
+    }
+
+    request_history() {
+        if (this.active) {
+            let message = {
+                peripheral: this.name,
+                type: "request",
+                section: "history",
+                data: "list",
+            };
+            socket.send(JSON.stringify(message));
+        }
+    }
+
+    request_history_frame(frame_id, raw = false) {
+        if (this.active && frame_id > 0) {
+            let message = {
+                peripheral: this.name,
+                type: "request",
+                section: "history",
+                data: raw ? "raw" : "frame",
+                value: String(frame_id),
+            };
+            socket.send(JSON.stringify(message));
+        }
+    }
+
+    show_previous_frame() {
+        let frame_id = this.history_entry != null && this.history_mode ? this.history_entry["frame_id"] : this.frame_id;
+        if (frame_id != null) {
+            this.request_history_frame(frame_id - 1);
+        }
+    }
+
+    exit_history() {
+        this.history_mode = false;
+        this.history_entry = null;
+    }
+
     update_image() {
-        const newImage = new Image();
-        newImage.src =
-            "../../hdevelop/" + this.name + "/output/output_image.jpg?t=" + new Date().getTime();
-        newImage.onload = () => {
-            this.camera_image_element.style.backgroundImage = "url('" + newImage.src + "')";
-        };
+        if (this.frame_url != null) {
+            this.camera_image_element.style.backgroundImage = "url('" + this.frame_url + "')";
+        }
     }
 
     update_min_run_time() {
@@ -250,6 +311,9 @@ class VisionDevice {
     }
 
     set_active(state) {
+        if (state != this.active) {
+            this.set_viewer(state);
+        }
         if (state) {
             this.active = true;
             this.update_image();
@@ -267,8 +331,37 @@ class VisionDevice {
         }
     }
 
+    set_viewer(state) {
+        // The camera renders its frames only while it is watched
+        if (ws_connected) {
+            let message = {
+                peripheral: this.name,
+                type: "request",
+                section: "viewer",
+                data: state ? "subscribe" : "unsubscribe",
+            };
+            socket.send(JSON.stringify(message));
+        }
+    }
+
+    request_full_frame(region = null) {
+        if (this.active) {
+            let message = {
+                peripheral: this.name,
+                type: "request",
+                section: "frame",
+                data: "full",
+                value: region,
+            };
+            socket.send(JSON.stringify(message));
+        }
+    }
+
     set_trigger(state) {
         if (this.active) {
+            if (state) {
+                this.exit_history();
+            }
             if (
                 this.inputs.trigger == false &&
                 this.outputs.status["trigger_acknowledge"] == false &&
@@ -297,11 +390,19 @@ class VisionDevice {
         }
     }
 
-    set_continuous_trigger(state) {
+    set_continuous_trigger(state, rate = 0) {
         if (this.active) {
             if (state) {
-                this.set_trigger(true);
+                this.exit_history();
             }
+            let message = {
+                peripheral: this.name,
+                type: "request",
+                section: "continuous",
+                data: state ? "start" : "stop",
+                value: String(rate),
+            };
+            socket.send(JSON.stringify(message));
             this.inputs.continuous_trigger = state;
         }
     }
@@ -391,20 +492,6 @@ class VisionDevice {
                 this.update_status();
             }
 
-            if (this.outputs.status["new_image"] != this.outputs.old_status["new_image"]) {
-                if (this.active) {
-                    this.update_image();
-                    if (this.inputs.continuous_trigger) {
-                        let new_trigger_handler = setInterval(() => {
-                            if (this.outputs.status["ready"]) {
-                                this.set_trigger(true);
-                                clearInterval(new_trigger_handler);
-                            }
-                        }, 10);
-                    }
-                }
-            }
-
             if (
                 (this.outputs.status["trigger_acknowledge"] == true &&
                     this.outputs.old_status["trigger_acknowledge"] == false) ||
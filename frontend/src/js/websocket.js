@@ -49,13 +49,34 @@ function process_message(message){
             else if(section == "outputs_variables"){
                 vision_manager.vision_devices[peripheral].outputs.outputs_variables = JSON.parse(JSON.stringify(value));
             }
+            else if(section == "history"){
+                vision_manager.vision_devices[peripheral].history = JSON.parse(JSON.stringify(value));
+            }
+            else if(section == "history_frame"){
+                vision_manager.vision_devices[peripheral].history_entry = JSON.parse(JSON.stringify(value));
+            }
+            else if(section == "production"){
+                vision_manager.vision_devices[peripheral].outputs.production = JSON.parse(JSON.stringify(value));
+            }
         }
     }
 }
 
+function process_frame(buffer){
+    // Binary frames: header length (uint32, big endian), JSON header, JPEG image
+    let header_length = new DataView(buffer).getUint32(0);
+    let header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, header_length)));
+    let peripheral = header['peripheral'];
+    if(peripheral in vision_manager.vision_devices){
+        let blob = new Blob([buffer.slice(4 + header_length)], {type: 'image/' + header['format']});
+        vision_manager.vision_devices[peripheral].set_frame(header['frame_id'], header['rendition'], blob);
+    }
+}
+
 function connectWebSocket() {
 
     socket = new WebSocket('ws://localhost:8080');
+    socket.binaryType = 'arraybuffer';
 
     socket.onopen = function(event) {
         ws_connected = true;
@@ -66,9 +87,17 @@ function connectWebSocket() {
             'data': 'connected'
         };
         socket.send(JSON.stringify(message));
+        // Watch the active camera again after a reconnection
+        if(vision_manager.active_device != null){
+            vision_manager.active_device.set_viewer(true);
+        }
     };
 
     socket.onmessage = function(event) {
+        if(event.data instanceof ArrayBuffer){
+            process_frame(event.data);
+            return;
+        }
         const data = JSON.parse(event.data);
         process_message(data)
     };
@@ -19,8 +19,10 @@ from util.debug import LoggerManager
 
 PULLEY_CAMERA_PROGRAM_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/PulleyCamera/inspect_pulleys.hdev"
 PULLEY_CAMERA_OUTPUT_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/PulleyCamera/output/output_image"
+PULLEY_CAMERA_WARMUP_IMAGE_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/PulleyCamera/img0.jpg"
 FINAL_INSPECTION_CAMERA_PROGRAM_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/FinalInspCamera/fic_hdev.hdev"
 FINAL_INSPECTION_CAMERA_OUTPUT_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/FinalInspCamera/output/output_image"
+FINAL_INSPECTION_CAMERA_WARMUP_IMAGE_PATH = "/home/joao/Desktop/halcon-vision/halcon_vision/hdevelop/FinalInspCamera/FIC01.jpg"
 
 
 async def async_main():
@@ -71,6 +73,7 @@ async def async_main():
             camera_construct_function=vision.construct.create_pulley_camera,
             register_size=32,
             init_program=0,
+            warmup_image_path=PULLEY_CAMERA_WARMUP_IMAGE_PATH,
         )
     )
 
@@ -84,6 +87,7 @@ async def async_main():
             vision.construct.create_final_inspection_camera,
             register_size=32,
             init_program=1,
+            warmup_image_path=FINAL_INSPECTION_CAMERA_WARMUP_IMAGE_PATH,
         )
     )
 
@@ -97,9 +101,13 @@ async def async_main():
     )
 
     # Start the WebSocket server and keep the application running
-    await asyncio.gather(
-        websockets_server.start_server(), modbus_tcp_server.start_server()
-    )
+    try:
+        await asyncio.gather(
+            websockets_server.start_server(), modbus_tcp_server.start_server()
+        )
+    finally:
+        # Stop the cameras, their worker processes and shared memory included
+        await vision_manager.close()
 
 
 if __name__ == "__main__":
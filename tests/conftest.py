@@ -0,0 +1,10 @@
+"""Runs the tests on the simulated HALCON backend, so they need neither a camera nor a license."""
+
+###########EXTERNAL IMPORTS############
+
+import os
+
+#######################################
+
+# Selected before any vision module is imported, the backend is chosen once at import time
+os.environ.setdefault("VISION_BACKEND", "simulated")
@@ -0,0 +1,50 @@
+###########EXTERNAL IMPORTS############
+
+import numpy as np
+import pytest
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.bridge import runs_statistics
+
+#######################################
+
+
+def mask_statistics(runs: np.ndarray, image: np.ndarray) -> tuple[int, float]:
+    """Area and mean gray value of a region computed from its mask, as a reference."""
+
+    mask = np.zeros(image.shape, dtype=bool)
+    for row, begin, end in runs:
+        if 0 <= row < image.shape[0]:
+            mask[row, max(begin, 0) : max(end + 1, 0)] = True
+    area = int(mask.sum())
+    return area, float(image[mask].mean()) if area else 0.0
+
+
+def test_matches_the_mask_statistics():
+    generator = np.random.default_rng(0)
+    image = generator.integers(0, 256, size=(40, 60)).astype(np.uint8)
+    runs = np.array([[2, 5, 20], [2, 30, 31], [3, 0, 59], [10, 7, 7], [39, 50, 59]], dtype=np.int32)
+
+    area, mean = runs_statistics(runs, image)
+    expected_area, expected_mean = mask_statistics(runs, image)
+
+    assert area == expected_area
+    assert mean == pytest.approx(expected_mean)
+
+
+def test_runs_outside_the_image_are_clipped():
+    image = np.arange(20, dtype=np.uint8).reshape(4, 5)
+    runs = np.array([[-1, 0, 4], [1, -3, 1], [2, 3, 9], [4, 0, 4]], dtype=np.int32)
+
+    # Row 1 columns 0 and 1, row 2 columns 3 and 4
+    assert runs_statistics(runs, image) == (4, pytest.approx((5 + 6 + 13 + 14) / 4))
+
+
+def test_empty_region():
+    image = np.ones((4, 5), dtype=np.uint8)
+
+    assert runs_statistics(np.zeros((0, 3), dtype=np.int32), image) == (0, 0.0)
+    assert runs_statistics(np.array([[9, 0, 4]], dtype=np.int32), image) == (0, 0.0)
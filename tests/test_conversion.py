@@ -0,0 +1,36 @@
+#############LOCAL IMPORTS#############
+
+from vision.conversion import OutputLayout
+
+#######################################
+
+
+def test_scalars_and_arrays_take_contiguous_registers():
+    layout = OutputLayout([["Count", "int"], ["X", "float[3]"], ["Ref", "string"]], 8)
+
+    assert layout.blocks == [(0, 1, "int", False), (1, 3, "float", True), (4, 1, "string", False)]
+    assert layout.register_variables[:6] == [
+        ["Count", "int"],
+        ["X[0]", "float"],
+        ["X[1]", "float"],
+        ["X[2]", "float"],
+        ["Ref", "string"],
+        None,
+    ]
+    assert layout.used_registers == 5
+    assert layout.get_dropped_outputs() == 0
+
+
+def test_arrays_are_truncated_and_padded_scalars_take_the_first_element():
+    layout = OutputLayout([["Count", "int"], ["X", "float[3]"], ["Ref", "string"]], 8)
+
+    assert layout.convert([[2, 5], [1.5, 2.5, 3.5, 4.5], ["Ref1"]]) == [2, 1.5, 2.5, 3.5, "Ref1"]
+    assert layout.convert([[], [1.5], None]) == [0, 1.5, 0.0, 0.0, ""]
+
+
+def test_outputs_that_do_not_fit_are_left_out():
+    layout = OutputLayout([["Count", "int"], ["X", "float[4]"], ["OK", "int"]], 4)
+
+    assert layout.blocks == [(0, 1, "int", False)]
+    assert layout.get_dropped_outputs() == 2
+    assert layout.convert([[1], [1.0] * 4, [1]]) == [1]
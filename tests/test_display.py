@@ -0,0 +1,72 @@
+###########EXTERNAL IMPORTS############
+
+import concurrent.futures
+import threading
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.display import DisplayScheduler
+
+#######################################
+
+
+def create_blocked_scheduler() -> tuple[DisplayScheduler, threading.Event, list]:
+    """Returns a scheduler whose renders wait for an event, the event and the rendered frames."""
+
+    release = threading.Event()
+    rendered = []
+
+    def render(frame):
+        release.wait(5)
+        rendered.append(frame)
+
+    return DisplayScheduler(render), release, rendered
+
+
+def test_latest_frame_wins_and_superseded_frames_are_dropped():
+    scheduler, release, rendered = create_blocked_scheduler()
+
+    futures = [scheduler.submit(frame) for frame in range(4)]
+    release.set()
+    concurrent.futures.wait(futures, timeout=5)
+
+    # Frame 0 is in flight, 1 and 2 are superseded while pending, 3 is rendered last
+    assert [future.result() for future in futures] == [True, False, False, True]
+    assert rendered == [0, 3]
+    assert scheduler.get_dropped_frames() == 2
+
+
+def test_no_frame_is_dropped_when_the_display_keeps_up():
+    scheduler, release, rendered = create_blocked_scheduler()
+    release.set()
+
+    for frame in range(3):
+        assert scheduler.submit(frame).result(timeout=5)
+
+    assert rendered == [0, 1, 2]
+    assert scheduler.get_dropped_frames() == 0
+
+
+def test_unwatched_frames_are_skipped_not_dropped():
+    scheduler, release, rendered = create_blocked_scheduler()
+    release.set()
+    scheduler.set_demand(False, 0)
+
+    assert not scheduler.submit(0).result(timeout=5)
+    scheduler.set_demand(True, 0)
+    assert scheduler.submit(1).result(timeout=5)
+
+    assert rendered == [1]
+    assert scheduler.get_skipped_renders() == 1
+    assert scheduler.get_dropped_frames() == 0
+
+
+def test_render_errors_complete_the_future():
+    def render(frame):
+        raise ValueError(frame)
+
+    future = DisplayScheduler(render).submit(7)
+
+    assert isinstance(future.exception(timeout=5), ValueError)
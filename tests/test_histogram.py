@@ -0,0 +1,61 @@
+###########EXTERNAL IMPORTS############
+
+import pytest
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from util.histogram import LatencyHistogram, LatencyStatistics
+
+#######################################
+
+MILLISECOND_NS = 1_000_000
+
+
+def test_summary_percentiles_of_a_uniform_distribution():
+    statistics = LatencyStatistics(["processing"])
+    for value in range(1, 1001):
+        statistics.record("processing", value * MILLISECOND_NS)
+
+    summary = statistics.get_summary()["processing"]
+
+    assert summary["count"] == 1000
+    assert summary["min"] == pytest.approx(0.001)
+    assert summary["max"] == pytest.approx(1.0)
+    # The buckets keep a relative precision of 1 / 2 ** sub_bucket_bits
+    assert summary["p50"] == pytest.approx(0.5, rel=1 / 128)
+    assert summary["p95"] == pytest.approx(0.95, rel=1 / 128)
+    assert summary["p99"] == pytest.approx(0.99, rel=1 / 128)
+    assert summary["p99.9"] == pytest.approx(0.999, rel=1 / 128)
+
+
+def test_percentiles_are_limited_to_the_largest_value():
+    histogram = LatencyHistogram()
+    histogram.record(3 * MILLISECOND_NS + 1)
+
+    assert histogram.get_percentiles((50.0, 99.9)) == [3 * MILLISECOND_NS + 1] * 2
+
+
+def test_empty_and_new_stages():
+    statistics = LatencyStatistics(["acquisition"])
+    statistics.record("display", 2 * MILLISECOND_NS)
+
+    summary = statistics.get_summary()
+
+    assert summary["acquisition"]["count"] == 0
+    assert summary["acquisition"]["p99"] == 0
+    assert summary["display"]["count"] == 1
+
+
+def test_window_summary_and_reset():
+    statistics = LatencyStatistics(["processing"])
+    for value in (1, 2, 3):
+        statistics.record("processing", value * MILLISECOND_NS)
+
+    assert statistics.get_window_summary(60)["processing"]["count"] == 3
+
+    statistics.reset()
+
+    assert statistics.get_summary()["processing"]["count"] == 0
+    assert statistics.get_window_summary(60)["processing"]["count"] == 0
@@ -0,0 +1,113 @@
+###########EXTERNAL IMPORTS############
+
+import numpy as np
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.history import FrameHistory
+
+#######################################
+
+
+def record_frames(history: FrameHistory, frame_ids, size: int = 100) -> None:
+    """Records frames whose image is filled with their frame id, recorded at time frame_id."""
+
+    for frame_id in frame_ids:
+        image = np.full((1, size), frame_id % 256, dtype=np.uint8)
+        history.record(frame_id, float(frame_id), image, {"OK": [frame_id]}, {"run_time": 0.01})
+
+
+def get_frame_ids(history: FrameHistory) -> list[int]:
+    return [entry["frame_id"] for entry in history.get_summary()]
+
+
+def test_capacity_evicts_the_oldest_frames():
+    history = FrameHistory(capacity=3)
+    record_frames(history, range(1, 6))
+
+    assert get_frame_ids(history) == [3, 4, 5]
+    assert history.find(2) is None
+    assert history.find(4).results == {"OK": [4]}
+
+
+def test_memory_budget_evicts_the_oldest_frames():
+    history = FrameHistory(max_bytes=250, raw_images=True)
+    record_frames(history, range(1, 5))
+
+    assert get_frame_ids(history) == [3, 4]
+    assert history.size == 200
+
+
+def test_overlays_count_in_the_memory_budget():
+    history = FrameHistory(max_bytes=250, raw_images=True)
+    record_frames(history, (1, 2))
+
+    assert history.attach_overlay(2, b"x" * 100, {"display_time": 0.002})
+
+    assert get_frame_ids(history) == [2]
+    assert history.read_overlay(history.find(2)) == b"x" * 100
+    assert history.find(2).timings == {"run_time": 0.01, "display_time": 0.002}
+
+
+def test_raw_images_are_only_kept_on_request():
+    history = FrameHistory()
+    record_frames(history, (1,))
+
+    entry = history.find(1)
+    assert entry.image is None
+    assert history.read_image(entry) is None
+    assert history.size == 0
+
+
+def test_find_by_frame_id_with_missing_frames():
+    history = FrameHistory(capacity=5)
+    record_frames(history, (1, 2, 4, 5, 6, 7))
+
+    found = [history.find(frame_id) for frame_id in range(9)]
+
+    assert [entry.frame_id if entry else None for entry in found] == [None, None, 2, None, 4, 5, 6, 7, None]
+
+
+def test_find_by_time_returns_the_last_frame_recorded_before():
+    history = FrameHistory()
+    record_frames(history, (1, 2, 3))
+
+    assert history.find(timestamp=2.5).frame_id == 2
+    assert history.find(timestamp=0.5) is None
+    assert history.find().frame_id == 3
+
+
+def test_spill_file_wraps_around_and_evicts_the_overwritten_frames(tmp_path):
+    history = FrameHistory(max_bytes=350, spill_path=str(tmp_path / "history.bin"), raw_images=True)
+    record_frames(history, (1, 2, 3))
+
+    assert history.spill.position == 300
+
+    # Does not fit at the end of the file: written at its start, over frame 1
+    record_frames(history, (4,))
+
+    assert history.spill.position == 100
+    assert get_frame_ids(history) == [2, 3, 4]
+    assert history.find(4).image == (0, 100)
+    assert np.all(history.read_image(history.find(4)) == 4)
+    assert np.all(history.read_image(history.find(2)) == 2)
+
+    # The next block is written after it, over frame 2 only
+    record_frames(history, (5,))
+
+    assert get_frame_ids(history) == [3, 4, 5]
+    assert np.all(history.read_image(history.find(5)) == 5)
+    history.close()
+
+
+def test_evicted_entries_are_not_read_from_the_spill_file(tmp_path):
+    history = FrameHistory(max_bytes=200, spill_path=str(tmp_path / "history.bin"), raw_images=True)
+    record_frames(history, (1,))
+    entry = history.find(1)
+    record_frames(history, (2, 3))
+
+    assert history.find(1) is None
+    assert history.read_image(entry) is None
+    history.close()
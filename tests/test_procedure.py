@@ -0,0 +1,70 @@
+###########EXTERNAL IMPORTS############
+
+import os
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.procedure import ProcedureBinding, create_vision_procedure
+
+#######################################
+
+PROGRAM_PATH = os.path.join(os.path.dirname(__file__), "..", "hdevelop", "FinalInspCamera", "fic_hdev.hdev")
+
+# Outputs of Inspection, used as inputs by Display
+INSPECTION_OUTPUTS = {"X": "float", "Y": "float", "OK": "int", "NOK": "int", "Ref": "string", "Score": "float"}
+
+
+def create_procedures() -> tuple:
+    """Returns the trigger, the inspection and the display procedures of the final inspection camera."""
+
+    trigger = create_vision_procedure(PROGRAM_PATH, "TriggerCamera", output_iconic=["Image"])
+    inspection = create_vision_procedure(
+        PROGRAM_PATH,
+        "Inspection",
+        input_iconic=["Image"],
+        input_control={"MinScore": "float"},
+        output_control={**INSPECTION_OUTPUTS, "Angle": "float"},
+    )
+    display = create_vision_procedure(
+        PROGRAM_PATH,
+        "Display",
+        input_iconic=["Image"],
+        input_control={**INSPECTION_OUTPUTS, "Width": "float", "Height": "float"},
+        output_iconic=["OutputImage"],
+    )
+    return trigger, inspection, display
+
+
+def test_only_the_consumer_inputs_are_bound():
+    trigger, inspection, display = create_procedures()
+
+    binding = ProcedureBinding(display, [trigger, inspection])
+
+    assert binding.iconic_assignments == [(0, "Image")]
+    assert sorted(binding.control_assignments) == sorted((1, name) for name in INSPECTION_OUTPUTS)
+
+
+def test_apply_sets_the_consumer_inputs_from_the_producer_outputs():
+    trigger, inspection, display = create_procedures()
+    image = object()
+    outputs = {name: [index] for index, name in enumerate(inspection.output_control_variables)}
+
+    ProcedureBinding(display, [trigger, inspection]).apply([{"Image": image}, {}], [{}, outputs])
+
+    assert display.input_iconic["Image"] is image
+    assert {name: display.input_control[name] for name in INSPECTION_OUTPUTS} == {
+        name: outputs[name] for name in INSPECTION_OUTPUTS
+    }
+    assert display.input_control["Width"] is None
+
+
+def test_the_last_producer_of_a_variable_wins():
+    trigger, inspection, display = create_procedures()
+    second = create_vision_procedure(PROGRAM_PATH, "TriggerCamera", output_iconic=["Image"])
+    first_image, second_image = object(), object()
+
+    ProcedureBinding(inspection, [trigger, second]).apply([{"Image": first_image}, {"Image": second_image}], [{}, {}])
+
+    assert inspection.input_iconic["Image"] is second_image
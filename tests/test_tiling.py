@@ -0,0 +1,98 @@
+###########EXTERNAL IMPORTS############
+
+import os
+
+import pytest
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import get_first
+from vision.tiling import TiledPulleyProcedure, split_tiles
+
+#######################################
+
+PROGRAM_PATH = os.path.join(os.path.dirname(__file__), "..", "hdevelop", "PulleyCamera", "inspect_pulleys.hdev")
+
+EXTENT = 20
+BORDER = 5
+
+
+@pytest.fixture(scope="module")
+def procedure() -> TiledPulleyProcedure:
+    return TiledPulleyProcedure(
+        program_directory=PROGRAM_PATH,
+        name="TiledExtractPulleys",
+        output_control={"CorrectRefCount": "int"},
+        extent=EXTENT,
+        border=BORDER,
+    )
+
+
+def test_tile_cores_partition_the_image():
+    width, height = 103, 61
+    tiles = split_tiles(width, height, 2, 3, EXTENT, BORDER)
+
+    covered = [[0] * width for _ in range(height)]
+    for tile in tiles:
+        row1, column1, row2, column2 = tile.core
+        for row in range(row1, row2 + 1):
+            for column in range(column1, column2 + 1):
+                covered[row][column] += 1
+
+    assert len(tiles) == 6
+    assert all(count == 1 for row in covered for count in row)
+
+
+def test_tiles_extend_their_core_within_the_image():
+    tiles = split_tiles(100, 60, 2, 2, EXTENT, BORDER)
+
+    # Core (0, 0, 29, 49): extended by the extent and the border towards the bottom and right cuts
+    assert tiles[0].bounds == (0, 0, 29 + EXTENT + BORDER, 49 + EXTENT + BORDER)
+    assert tiles[0].cuts == (False, False, True, True)
+    # Core (30, 50, 59, 99): extended by the border towards the top and left cuts only
+    assert tiles[3].bounds == (30 - BORDER, 50 - BORDER, 59, 99)
+    assert tiles[3].cuts == (True, True, False, False)
+
+
+def test_grids_finer_than_the_image_skip_empty_tiles():
+    tiles = split_tiles(2, 3, 4, 4, EXTENT, BORDER)
+
+    expected = [(row, column, row, column) for row in range(3) for column in range(2)]
+    assert sorted(tile.core for tile in tiles) == expected
+
+
+def get_rectangles(regions) -> list[tuple]:
+    return list(zip(*ha.smallest_rectangle1(regions)))
+
+
+def test_select_owned_keeps_the_regions_the_tile_owns(procedure):
+    # Bounds (0, 0, 54, 74), core (0, 0, 29, 49), cut at the bottom and on the right
+    tile = split_tiles(100, 60, 2, 2, EXTENT, BORDER)[0]
+
+    # An owned region, one starting in the core of another tile, and two starting in the core but
+    # reaching the border of the bottom and of the right cut
+    regions = ha.gen_empty_obj()
+    for rectangle in ((10, 10, 20, 20), (35, 10, 40, 20), (25, 10, 52, 20), (10, 40, 20, 72)):
+        regions = ha.concat_obj(regions, ha.gen_rectangle1(*rectangle))
+
+    assert get_rectangles(procedure.select_owned(regions, tile)) == [(10, 10, 20, 20)]
+
+
+def test_select_owned_moves_the_regions_to_image_coordinates(procedure):
+    # Bounds (25, 45, 59, 99), core (30, 50, 59, 99)
+    tile = split_tiles(100, 60, 2, 2, EXTENT, BORDER)[3]
+
+    owned = procedure.select_owned(ha.gen_rectangle1(10, 10, 20, 20), tile)
+
+    assert get_rectangles(owned) == [(35, 55, 45, 65)]
+
+
+def test_select_owned_without_owned_regions(procedure):
+    tile = split_tiles(100, 60, 2, 2, EXTENT, BORDER)[0]
+
+    owned = procedure.select_owned(ha.gen_rectangle1(40, 60, 45, 65), tile)
+
+    assert get_first(ha.count_obj(owned)) == 0
@@ -0,0 +1,134 @@
+###########EXTERNAL IMPORTS############
+
+from array import array
+import math
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+#######################################
+
+
+class RollingCounters:
+    """
+    Fixed memory counters over rolling time windows, updated in constant time per event.
+
+    Events are added to the slot of the current time, in a ring of slots covering the longest
+    window. Each window also keeps the running sum of its slots: an event is added to the sum of
+    every window, and a slot leaving a window as time moves on is subtracted from it, so reading
+    a window never scans the slots. Moving on costs one subtraction per window and elapsed slot,
+    whatever the event rate.
+
+    Attributes:
+        fields (tuple[str, ...]): Name of each counter.
+        slot_ns (int): Duration covered by each slot in nanoseconds.
+        window_seconds (tuple[float, ...]): Length of each window in seconds.
+        window_slots (tuple[int, ...]): Number of slots of each window, the current one included.
+        slots (array): Value of each counter in each slot of the ring, slot by slot.
+        slot_epochs (list[int]): Epoch (monotonic time // slot_ns) of the values held by each slot.
+        sums (list[array]): Value of each counter over each window.
+        epoch (int): Epoch of the current slot.
+        start_ns (int): Monotonic time the counters were created or reset.
+    """
+
+    def __init__(self, fields: tuple[str, ...], window_seconds: tuple[float, ...], slot_seconds: float = 10.0):
+
+        if slot_seconds <= 0 or not window_seconds or min(window_seconds) < slot_seconds:
+            raise ValueError("Rolling windows are invalid")
+
+        self.fields = tuple(fields)
+        self.index = {field: position for position, field in enumerate(self.fields)}
+        self.slot_ns = int(slot_seconds * 1e9)
+        self.window_seconds = tuple(window_seconds)
+        self.window_slots = tuple(math.ceil(seconds * 1e9 / self.slot_ns) for seconds in window_seconds)
+        self.slot_count = max(self.window_slots)
+        self.reset()
+
+    def reset(self, now_ns: int = None) -> None:
+        """Clears all the counters."""
+
+        self.start_ns = now_ns if now_ns is not None else time.monotonic_ns()
+        self.epoch = self.start_ns // self.slot_ns
+        self.slots = array("q", [0]) * (self.slot_count * len(self.fields))
+        self.slot_epochs = [-1 for _ in range(self.slot_count)]
+        self.sums = [array("q", [0]) * len(self.fields) for _ in self.window_slots]
+
+    def advance(self, now_ns: int) -> None:
+        """Moves the current slot to the time given, subtracting the slots that left each window."""
+
+        epoch = now_ns // self.slot_ns
+        if epoch <= self.epoch:
+            return
+
+        if epoch - self.epoch >= self.slot_count:
+            # Every slot is older than the longest window
+            start_ns = self.start_ns
+            self.reset(now_ns)
+            self.start_ns = start_ns
+            return
+
+        field_count = len(self.fields)
+        while self.epoch < epoch:
+            self.epoch += 1
+            for sums, slot_number in zip(self.sums, self.window_slots):
+                leaving = self.epoch - slot_number
+                position = leaving % self.slot_count
+                if self.slot_epochs[position] == leaving:
+                    offset = position * field_count
+                    for field in range(field_count):
+                        sums[field] -= self.slots[offset + field]
+
+            position = self.epoch % self.slot_count
+            if self.slot_epochs[position] != self.epoch:
+                offset = position * field_count
+                for field in range(field_count):
+                    self.slots[offset + field] = 0
+                self.slot_epochs[position] = self.epoch
+
+    def add(self, values: dict[str, int], now_ns: int = None) -> None:
+        """
+        Adds values to the counters at a time.
+
+        Args:
+            values (dict[str, int]): Value to add to each counter, by name.
+            now_ns (int): Monotonic time of the event, now by default.
+        """
+
+        self.advance(now_ns if now_ns is not None else time.monotonic_ns())
+
+        position = self.epoch % self.slot_count
+        if self.slot_epochs[position] != self.epoch:
+            offset = position * len(self.fields)
+            for field in range(len(self.fields)):
+                self.slots[offset + field] = 0
+            self.slot_epochs[position] = self.epoch
+
+        offset = position * len(self.fields)
+        for name, value in values.items():
+            field = self.index[name]
+            self.slots[offset + field] += int(value)
+            for sums in self.sums:
+                sums[field] += int(value)
+
+    def get_windows(self, now_ns: int = None) -> list[dict]:
+        """
+        Returns the counters of every window.
+
+        Returns:
+            list[dict]: Value of each counter over each window, by name, and 'seconds' the time the
+                window covers, shorter than the window while the counters are younger than it.
+        """
+
+        now_ns = now_ns if now_ns is not None else time.monotonic_ns()
+        self.advance(now_ns)
+
+        current_ns = now_ns - self.epoch * self.slot_ns
+        windows = []
+        for sums, slot_number in zip(self.sums, self.window_slots):
+            covered_ns = min((slot_number - 1) * self.slot_ns + current_ns, now_ns - self.start_ns)
+            window = dict(zip(self.fields, sums))
+            window["seconds"] = max(covered_ns, 0) / 1e9
+            windows.append(window)
+        return windows
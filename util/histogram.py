@@ -0,0 +1,277 @@
+###########EXTERNAL IMPORTS############
+
+from array import array
+import math
+import threading
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+#######################################
+
+# Percentiles reported in the latency summaries
+SUMMARY_PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """
+    Fixed memory latency histogram with HDR-style log-linear buckets.
+
+    Values are recorded in nanoseconds. Values below 2^sub_bucket_bits units are counted
+    with unit resolution, larger values are counted in buckets whose width doubles every
+    power of two, so the relative error of any reported value stays below 2^-(sub_bucket_bits-1)
+    (about 1.6 % with the default 7 bits) over the whole range.
+
+    Attributes:
+        unit_ns (int): Resolution of the histogram in nanoseconds.
+        highest_ns (int): Largest trackable value, larger values are clamped.
+        sub_bucket_bits (int): Number of bits of precision of each bucket.
+        counts (array): Number of values recorded in each bucket.
+        count (int): Total number of values recorded.
+        min_ns (int): Smallest value recorded.
+        max_ns (int): Largest value recorded.
+    """
+
+    def __init__(self, unit_ns: int = 1_000, highest_ns: int = 60_000_000_000, sub_bucket_bits: int = 7):
+
+        if unit_ns <= 0 or highest_ns <= unit_ns:
+            raise ValueError("Histogram range is invalid")
+        if sub_bucket_bits < 2:
+            raise ValueError("Histogram must have at least 2 sub bucket bits")
+
+        self.unit_ns = unit_ns
+        self.highest_ns = highest_ns
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half_count = self.sub_bucket_count >> 1
+        self.counts = array("Q", [0]) * (self.get_index(highest_ns) + 1)
+        self.count = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def get_index(self, value_ns: int) -> int:
+        """Returns the bucket index for a value."""
+
+        units = value_ns // self.unit_ns
+        if units < self.sub_bucket_count:
+            return units
+
+        shift = units.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half_count + (units >> shift) - self.sub_bucket_half_count
+
+    def get_highest_value(self, index: int) -> int:
+        """Returns the largest value, in nanoseconds, counted in a bucket."""
+
+        if index < self.sub_bucket_count:
+            return (index + 1) * self.unit_ns - 1
+
+        shift = (index - self.sub_bucket_count) // self.sub_bucket_half_count + 1
+        mantissa = (index - self.sub_bucket_count) % self.sub_bucket_half_count + self.sub_bucket_half_count
+        return ((mantissa + 1) << shift) * self.unit_ns - 1
+
+    def record(self, value_ns: int) -> None:
+        """Records a value in nanoseconds."""
+
+        value_ns = min(max(int(value_ns), 0), self.highest_ns)
+        self.counts[self.get_index(value_ns)] += 1
+
+        if self.count == 0 or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.count += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the values recorded in another histogram with the same layout."""
+
+        if len(other.counts) != len(self.counts) or other.unit_ns != self.unit_ns:
+            raise ValueError("Histograms have different layouts")
+        if other.count == 0:
+            return
+
+        for index, value in enumerate(other.counts):
+            if value:
+                self.counts[index] += value
+
+        if self.count == 0 or other.min_ns < self.min_ns:
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.count += other.count
+
+    def reset(self) -> None:
+        """Clears all the recorded values."""
+
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def get_percentiles(self, percentiles: tuple[float, ...]) -> list[int]:
+        """
+        Returns the values at the requested percentiles in a single pass.
+
+        Args:
+            percentiles (tuple[float, ...]): Percentiles in ascending order (e.g. 50, 99.9).
+
+        Returns:
+            list[int]: The highest value, in nanoseconds, of the bucket holding each percentile,
+                limited to the largest value recorded.
+        """
+
+        if self.count == 0:
+            return [0 for _ in percentiles]
+
+        ranks = [max(math.ceil(percentile / 100.0 * self.count), 1) for percentile in percentiles]
+        values = []
+        cumulative = 0
+
+        for index, value in enumerate(self.counts):
+            if not value:
+                continue
+            cumulative += value
+            while len(values) < len(ranks) and cumulative >= ranks[len(values)]:
+                values.append(min(self.get_highest_value(index), self.max_ns))
+            if len(values) == len(ranks):
+                break
+
+        return values
+
+    def get_summary(self, percentiles: tuple[float, ...] = SUMMARY_PERCENTILES) -> dict:
+        """
+        Returns the count, minimum, maximum and percentiles of the histogram in seconds.
+
+        Percentile keys are formatted as 'p50', 'p95', 'p99' and 'p99.9'.
+        """
+
+        summary = {
+            "count": self.count,
+            "min": self.min_ns / 1e9,
+            "max": self.max_ns / 1e9,
+        }
+        for percentile, value in zip(percentiles, self.get_percentiles(percentiles)):
+            summary[f"p{percentile:g}"] = value / 1e9
+        return summary
+
+    def copy_layout(self) -> "LatencyHistogram":
+        """Returns an empty histogram with the same layout."""
+
+        return LatencyHistogram(self.unit_ns, self.highest_ns, self.sub_bucket_bits)
+
+
+class RollingLatencyHistogram:
+    """
+    Latency histogram keeping both the all-time distribution and a rolling time window.
+
+    The window is made of a fixed number of slot histograms, each covering `slot_seconds` of
+    the monotonic clock. Slots are recycled as time moves on, so memory stays constant.
+
+    Attributes:
+        total (LatencyHistogram): All the values recorded since the last reset.
+        slot_ns (int): Duration covered by each slot in nanoseconds.
+        slots (list[LatencyHistogram]): Ring of slot histograms.
+        slot_epochs (list[int]): Epoch (monotonic time // slot_ns) of the values held by each slot.
+    """
+
+    def __init__(self, slot_seconds: float = 5.0, slot_count: int = 12, **histogram_kwargs):
+
+        if slot_seconds <= 0 or slot_count <= 0:
+            raise ValueError("Rolling window is invalid")
+
+        self.total = LatencyHistogram(**histogram_kwargs)
+        self.slot_ns = int(slot_seconds * 1e9)
+        self.slots = [self.total.copy_layout() for _ in range(slot_count)]
+        self.slot_epochs = [-1 for _ in range(slot_count)]
+
+    @property
+    def window_seconds(self) -> float:
+        """Returns the longest window that can be queried in seconds."""
+
+        return self.slot_ns * len(self.slots) / 1e9
+
+    def record(self, value_ns: int, now_ns: int = None) -> None:
+        """Records a value in nanoseconds in the total and the current slot."""
+
+        epoch = (now_ns if now_ns is not None else time.monotonic_ns()) // self.slot_ns
+        position = epoch % len(self.slots)
+
+        if self.slot_epochs[position] != epoch:
+            self.slots[position].reset()
+            self.slot_epochs[position] = epoch
+
+        self.slots[position].record(value_ns)
+        self.total.record(value_ns)
+
+    def get_window(self, seconds: float, now_ns: int = None) -> LatencyHistogram:
+        """
+        Returns the values recorded in the last `seconds`, rounded up to whole slots.
+
+        Windows longer than the slots ring are limited to it.
+        """
+
+        epoch = (now_ns if now_ns is not None else time.monotonic_ns()) // self.slot_ns
+        slot_number = min(max(math.ceil(seconds * 1e9 / self.slot_ns), 1), len(self.slots))
+
+        window = self.total.copy_layout()
+        for position, slot_epoch in enumerate(self.slot_epochs):
+            if epoch - slot_number < slot_epoch <= epoch:
+                window.merge(self.slots[position])
+        return window
+
+    def reset(self) -> None:
+        """Clears all the recorded values."""
+
+        self.total.reset()
+        for slot in self.slots:
+            slot.reset()
+        self.slot_epochs = [-1 for _ in self.slots]
+
+
+class LatencyStatistics:
+    """
+    Named set of rolling latency histograms, one for each stage being timed.
+
+    Stages are recorded from several threads, the camera thread and the workers of the shared pool,
+    so the histograms are only read and written with the lock held.
+
+    Attributes:
+        histograms (dict[str, RollingLatencyHistogram]): Histogram of each stage by name.
+    """
+
+    def __init__(self, stages: list[str] = None):
+
+        self.lock = threading.Lock()
+        self.histograms: dict[str, RollingLatencyHistogram] = {}
+        for stage in stages if stages else []:
+            self.histograms[stage] = RollingLatencyHistogram()
+
+    def record(self, stage: str, value_ns: int) -> None:
+        """Records a value in nanoseconds for a stage, creating its histogram if needed."""
+
+        with self.lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = RollingLatencyHistogram()
+            self.histograms[stage].record(value_ns)
+
+    def get_summary(self) -> dict[str, dict]:
+        """Returns the all-time summary of every stage."""
+
+        with self.lock:
+            return {stage: histogram.total.get_summary() for stage, histogram in self.histograms.items()}
+
+    def get_window_summary(self, seconds: float) -> dict[str, dict]:
+        """Returns the summary of every stage over the last `seconds`."""
+
+        with self.lock:
+            return {
+                stage: histogram.get_window(seconds).get_summary() for stage, histogram in self.histograms.items()
+            }
+
+    def reset(self) -> None:
+        """Clears the recorded values of every stage."""
+
+        with self.lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
@@ -0,0 +1,76 @@
+###########EXTERNAL IMPORTS############
+
+import importlib
+import os
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+#######################################
+
+# Environment variable selecting the procedure backend, read once when the vision package is imported
+BACKEND_ENVIRONMENT_VARIABLE = "VISION_BACKEND"
+
+# HALCON runtime, the default
+HALCON_BACKEND = "halcon"
+
+# Simulated HALCON, for hardware and license free benchmarks of the orchestration layers
+SIMULATED_BACKEND = "simulated"
+
+# Module implementing each backend, imported only when selected
+BACKEND_MODULES = {
+    HALCON_BACKEND: "halcon",
+    SIMULATED_BACKEND: "vision.simulated",
+}
+
+
+def load_backend(name: str = None):
+    """
+    Imports the module of a procedure backend.
+
+    The backend is selected by name, or by the VISION_BACKEND environment variable, so worker
+    processes spawned by a camera use the same backend as the main process. The HALCON runtime is
+    only imported when it is selected.
+
+    Args:
+        name (str): Name of the backend, halcon or simulated, or None to read the environment.
+
+    Returns:
+        module: The backend module, used in place of the halcon module.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+
+    name = name or os.environ.get(BACKEND_ENVIRONMENT_VARIABLE, HALCON_BACKEND)
+    if name not in BACKEND_MODULES:
+        raise ValueError(f"Unknown vision backend {name}, expected one of {', '.join(BACKEND_MODULES)}")
+    return importlib.import_module(BACKEND_MODULES[name])
+
+
+# Name of the backend of the process
+BACKEND = os.environ.get(BACKEND_ENVIRONMENT_VARIABLE, HALCON_BACKEND)
+
+# Backend shared by the whole process, imported as ha in place of the halcon module
+ha = load_backend(BACKEND)
+
+
+def declare_signature(
+    program_path: str, procedure_name: str, output_iconic: list[str], output_control: dict[str, str]
+) -> None:
+    """
+    Declares the outputs of a procedure, as declared in vision/construct.py, to the backend.
+
+    The simulated backend generates outputs of the declared types; HALCON reads the signatures
+    from the program, so this does nothing with the HALCON backend.
+
+    Args:
+        program_path (str): Path to the .hdev program.
+        procedure_name (str): Name of the local procedure.
+        output_iconic (list[str]): Names of the iconic outputs.
+        output_control (dict[str, str]): Type of each control output, by name.
+    """
+
+    if BACKEND == SIMULATED_BACKEND:
+        ha.declare_signature(program_path, procedure_name, output_iconic, output_control)
@@ -0,0 +1,134 @@
+###########EXTERNAL IMPORTS############
+
+import ctypes
+import numpy as np
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import get_first
+
+#######################################
+
+# NumPy type of the pixels of each HALCON image type that can be viewed
+PIXEL_DTYPES = {
+    "byte": np.uint8,
+    "direction": np.uint8,
+    "cyclic": np.uint8,
+    "int1": np.int8,
+    "uint2": np.uint16,
+    "int2": np.int16,
+    "int4": np.int32,
+    "int8": np.int64,
+    "real": np.float32,
+}
+
+
+def channel_view(image: ha.HObject, channel: int = 1) -> np.ndarray:
+    """
+    Returns a read-only NumPy view of a channel of a HALCON image, without copying its pixels.
+
+    The view reads the image memory through its pixel pointer. The channel object is kept alive by
+    the view, so the memory stays valid as long as the view is referenced, even after the procedure
+    that produced the image runs again.
+
+    Args:
+        image (ha.HObject): The image.
+        channel (int): Index of the channel, starting at 1.
+
+    Returns:
+        np.ndarray: Array of shape (height, width) sharing the memory of the channel.
+
+    Raises:
+        ValueError: If the pixel type can't be viewed, such as complex images.
+    """
+
+    channel_image = ha.access_channel(image, channel)
+    pointer, pixel_type, width, height = map(get_first, ha.get_image_pointer1(channel_image))
+
+    dtype = PIXEL_DTYPES.get(pixel_type)
+    if dtype is None:
+        raise ValueError(f"Images of type {pixel_type} can't be viewed")
+
+    buffer = (ctypes.c_ubyte * (width * height * np.dtype(dtype).itemsize)).from_address(pointer)
+    buffer.owner = channel_image
+
+    view = np.frombuffer(buffer, dtype=dtype).reshape(height, width)
+    view.flags.writeable = False
+    return view
+
+
+def image_array(image: ha.HObject) -> np.ndarray:
+    """
+    Returns the pixels of a HALCON image as a NumPy array.
+
+    Single channel images are returned as a zero-copy view, see channel_view. The channels of a
+    multi-channel image are separate blocks of memory, so they are interleaved into a new array.
+
+    Args:
+        image (ha.HObject): The image.
+
+    Returns:
+        np.ndarray: Array of shape (height, width), or (height, width, channels) for multi-channel images.
+    """
+
+    channels = get_first(ha.count_channels(image))
+    if channels == 1:
+        return channel_view(image)
+    return np.stack([channel_view(image, channel) for channel in range(1, channels + 1)], axis=2)
+
+
+def region_runs(regions: ha.HObject) -> list[np.ndarray]:
+    """
+    Returns the runs of each region of a region tuple, such as the Pulleys output.
+
+    Regions have no pixel data, HALCON stores them as runs: the row and the first and last column
+    of each horizontal segment. The runs are read once per region, which is far smaller than a mask.
+
+    Args:
+        regions (ha.HObject): One or more regions.
+
+    Returns:
+        list[np.ndarray]: Array of shape (runs, 3) with the row, first column and last column of
+            each run, for each region.
+    """
+
+    runs = []
+    for index in range(1, get_first(ha.count_obj(regions)) + 1):
+        rows, column_begins, column_ends = ha.get_region_runs(ha.select_obj(regions, index))
+        runs.append(np.column_stack((rows, column_begins, column_ends)).astype(np.int32).reshape(-1, 3))
+    return runs
+
+
+def runs_statistics(runs: np.ndarray, image: np.ndarray) -> tuple[int, float]:
+    """
+    Returns the area of a region and the mean of the image inside it, without building a mask.
+
+    Each run is summed from the cumulative sum of its row, so the cost depends on the number of
+    runs and rows, not on the area.
+
+    Args:
+        runs (np.ndarray): Runs of the region, as returned by region_runs.
+        image (np.ndarray): Single channel image of shape (height, width).
+
+    Returns:
+        tuple: The area in pixels of the region inside the image, and its mean gray value, 0 if empty.
+    """
+
+    height, width = image.shape
+    runs = runs[(runs[:, 0] >= 0) & (runs[:, 0] < height)]
+    begins = np.clip(runs[:, 1], 0, width)
+    ends = np.clip(runs[:, 2] + 1, 0, width)
+    runs, begins, ends = runs[ends > begins], begins[ends > begins], ends[ends > begins]
+
+    area = int(np.sum(ends - begins))
+    if area == 0:
+        return 0, 0.0
+
+    rows, row_index = np.unique(runs[:, 0], return_inverse=True)
+    sums = np.zeros((len(rows), width + 1), dtype=np.float64)
+    np.cumsum(image[rows], axis=1, out=sums[:, 1:])
+    total = np.sum(sums[row_index, ends] - sums[row_index, begins])
+    return area, float(total / area)
@@ -0,0 +1,116 @@
+###########EXTERNAL IMPORTS############
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.procedure import get_first
+
+#######################################
+
+# Output variables used to pick the best frame and count the good and bad frames of a burst
+SCORE_VARIABLE = "Score"
+OK_VARIABLE = "OK"
+NOK_VARIABLE = "NOK"
+
+# Suffix of the output variables with the mean of a numeric output over a burst
+MEAN_SUFFIX = "_mean"
+
+# Output variables appended after the program outputs when bursts are enabled
+BURST_VARIABLES = [
+    ["burst_count", "int"],
+    ["ok_count", "int"],
+    ["nok_count", "int"],
+    ["best_frame", "int"],
+    ["burst_time", "float"],
+]
+
+# Types of the outputs averaged over a burst
+NUMERIC_TYPES = ("int", "float")
+
+
+def get_burst_variables(output_variables: list[list[str]]) -> list[list[str]]:
+    """
+    Returns the output variables appended after the program outputs when bursts are enabled.
+
+    Args:
+        output_variables (list[list[str]]): Name and type of each program output.
+
+    Returns:
+        list[list[str]]: The mean of each numeric output, followed by the burst counters and timing.
+    """
+
+    means = [
+        [name + MEAN_SUFFIX, "float"] for name, variable_type in output_variables if variable_type in NUMERIC_TYPES
+    ]
+    return means + BURST_VARIABLES
+
+
+def select_best_frame(frames: list[dict], output_variables: list[list[str]]) -> int:
+    """
+    Returns the index of the best frame of a burst.
+
+    The best frame is the highest scoring OK frame, the highest scoring frame if none is OK, the
+    last OK frame if the program has no score, or the last frame if it has neither.
+
+    Args:
+        frames (list[dict]): Frames of the burst, with their outputs in the order of the variables.
+        output_variables (list[list[str]]): Name and type of each program output.
+
+    Returns:
+        int: Index of the best frame.
+    """
+
+    names = [name for name, _ in output_variables]
+    ok_index = names.index(OK_VARIABLE) if OK_VARIABLE in names else None
+    score_index = names.index(SCORE_VARIABLE) if SCORE_VARIABLE in names else None
+
+    candidates = list(range(len(frames)))
+    if ok_index is not None:
+        ok_frames = [index for index in candidates if get_first(frames[index]["outputs"][ok_index], 0) == 1]
+        candidates = ok_frames or candidates
+
+    if score_index is None:
+        return candidates[-1]
+    return max(candidates, key=lambda index: get_first(frames[index]["outputs"][score_index], float("-inf")))
+
+
+def aggregate_burst(frames: list[dict], output_variables: list[list[str]]) -> tuple[list, list]:
+    """
+    Aggregates the outputs of the frames of a burst.
+
+    Args:
+        frames (list[dict]): Frames of the burst, each with its outputs in the order of the variables
+            and its run time.
+        output_variables (list[list[str]]): Name and type of each program output.
+
+    Returns:
+        tuple: The outputs of the best frame, and the values of the burst variables in the order of
+            get_burst_variables.
+    """
+
+    best = select_best_frame(frames, output_variables)
+
+    means = []
+    for index, (_, variable_type) in enumerate(output_variables):
+        if variable_type in NUMERIC_TYPES:
+            values = [get_first(frame["outputs"][index]) for frame in frames]
+            values = [float(value) for value in values if isinstance(value, (int, float))]
+            means.append([sum(values) / len(values)] if values else [])
+
+    names = [name for name, _ in output_variables]
+    ok_count = nok_count = 0
+    for frame in frames:
+        if OK_VARIABLE in names:
+            ok_count += get_first(frame["outputs"][names.index(OK_VARIABLE)], 0) == 1
+        if NOK_VARIABLE in names:
+            nok_count += get_first(frame["outputs"][names.index(NOK_VARIABLE)], 0) == 1
+
+    counters = [
+        [len(frames)],
+        [ok_count],
+        [nok_count],
+        [best],
+        [sum(frame["run_time"] for frame in frames)],
+    ]
+    return frames[best]["outputs"], means + counters
@@ -1,17 +1,31 @@
 ###########EXTERNAL IMPORTS############
 
-import halcon as ha
 import concurrent.futures
+import os
+import time
 
 #######################################
 
 #############LOCAL IMPORTS#############
 
-from vision.procedure import VisionProcedure
+from vision.backend import ha
+from vision.procedure import VisionProcedure, ProcedureBinding
+from vision.display import DisplayScheduler
+from vision.frames import encode_jpeg, encode_array_jpeg, crop_image, DEFAULT_PREVIEW_WIDTH
+from vision.history import FrameHistory
+from vision.bridge import image_array
+from vision.loader import program_loader
+from vision.executors import executor_manager, ResourceBudget
+from vision.profiling import ProcedureProfiler
+from vision.data.variables import *
 from util.debug import LoggerManager
+from util.histogram import LatencyStatistics
 
 #######################################
 
+# Cycle periods a prefetched frame may wait for its trigger before it is considered stale
+PREFETCH_AGE_CYCLES = 2.0
+
 
 class VisionCamera:
     """
@@ -20,7 +34,34 @@ class VisionCamera:
     Attributes:
         name (str): The name of the camera.
         description (str): A description of the camera.
-        output_path (str): The path where the output images are saved.
+        output_path (str): Kept for compatibility, rendered frames are encoded in memory instead of
+            being written to disk.
+        pipelined (bool): If True, the acquisition of the next frame is started while the
+            current frame is being processed, when the next trigger is known to follow: in
+            continuous mode (see set_prefetch) and within a burst.
+        max_prefetch_age (float): Seconds a prefetched frame may wait for its trigger, from the end
+            of its acquisition, before it is acquired again, or None for PREFETCH_AGE_CYCLES cycle
+            periods.
+        prefetch (bool): Whether the next frame is prefetched after every cycle.
+        cycle_period (float): Seconds between the starts of the last two consecutive pipelined cycles,
+            0 when unknown.
+        startup_time (float): Seconds it took to load the camera procedures.
+        warmup_image_path (str): Reference image used to warm up every program at startup, or None
+            to only compile the programs.
+        compiled_programs (list[tuple]): Workflow, display procedure and bindings of each program,
+            by program number, resolved once so that changing program is a swap.
+        program_change_time (float): Seconds the last program change took.
+        encoded_frame (tuple[int, bytes]): Frame id and JPEG preview of the last rendered frame, or None.
+        rendered_frame (tuple[int, ha.HObject]): Frame id and full resolution image of the last
+            rendered frame, kept to encode full resolution renditions on demand.
+        preview_width (int): Maximum width of the preview rendition encoded on every frame.
+        history (FrameHistory): Results and timings of the last frames, with the overlays of those that
+            were rendered and, when enabled, their raw images.
+        budget (ResourceBudget): CPU budget of the camera.
+        lane (CameraLane): Executor of the camera on the shared pool, running the acquisitions, the
+            renders and the parallel work of the procedures.
+        profiler (ProcedureProfiler): Operator level profiler of the procedures, writing its reports
+            to the profiles directory next to the output path.
     """
 
     def __init__(
@@ -32,12 +73,22 @@ class VisionCamera:
         trigger_procedure: VisionProcedure,
         process_procedures: list[VisionProcedure] = list(),
         display_procedures: list[VisionProcedure] = list(),
+        pipelined: bool = False,
+        startup_time: float = 0.0,
+        warmup_image_path: str = None,
+        history_spill_path: str = None,
+        budget: ResourceBudget = None,
+        max_prefetch_age: float = None,
+        history_raw_images: bool = False,
     ):
 
         self.name = name
         self.description = description
         self.output_path = output_path
-        self.executor = concurrent.futures.ThreadPoolExecutor()
+        self.budget = budget if budget else ResourceBudget()
+        self.latency = LatencyStatistics([ACQUISITION_STAGE, PROCESSING_STAGE, DISPLAY_STAGE, QUEUE_STAGE])
+        self.lane = executor_manager.register(name, self.budget, self.latency)
+        self.display_scheduler = DisplayScheduler(self.execute_display, self.lane)
         self.open_procedure = open_procedure
         self.trigger_procedure = trigger_procedure
         self.camera_parameters = dict()
@@ -45,18 +96,50 @@ class VisionCamera:
         self.display_procedures = display_procedures
         self.workflow: list[VisionProcedure] = [self.trigger_procedure]
         self.displayflow: VisionProcedure = None
+        self.workflow_bindings: list[ProcedureBinding] = []
+        self.display_binding: ProcedureBinding = None
         self.display_future: concurrent.futures.Future = None
         self.program_number: int = 0
         self.run_time: float = 0
         self.min_run_time: float = 0
         self.max_run_time: float = 0
+        self.pipelined = pipelined
+        self.startup_time = startup_time
+        self.warmup_image_path = warmup_image_path
+        self.program_change_time: float = 0
+        self.acquisition_executor = self.lane
+        self.acquisition_future: concurrent.futures.Future = None
+        self.discarded_acquisition: concurrent.futures.Future = None
+        self.max_prefetch_age = max_prefetch_age
+        self.prefetch = False
+        self.burst_prefetches: int = 0
+        self.cycle_start: float = None
+        self.cycle_period: float = 0
+        self.overlap: float = 0
+        self.frame_id: int = 0
+        self.image: ha.HObject = None
+        self.encoded_frame: tuple[int, bytes] = None
+        self.rendered_frame: tuple[int, ha.HObject] = None
+        self.preview_width: int = DEFAULT_PREVIEW_WIDTH
+        self.history = FrameHistory(spill_path=history_spill_path, raw_images=history_raw_images)
+        self.profiler = ProcedureProfiler(name, os.path.join(os.path.dirname(output_path), "profiles"))
+        for procedure in self.get_procedures():
+            procedure.set_executor(self.lane)
+        self.compiled_programs = [self.compile_program(number) for number in range(len(process_procedures) + 1)]
+        (
+            self.workflow,
+            self.displayflow,
+            self.workflow_bindings,
+            self.display_binding,
+        ) = self.compiled_programs[0]
 
     def init(self) -> bool:
         """Initializes the camera by running the open procedure and preparing the trigger.
 
-        This method performs two main steps:
+        This method performs three main steps:
         1. Executes the camera's open procedure to establish connection
         2. Prepares the trigger settings based on camera parameters
+        3. Prepares every program, so that the first trigger after a program change is not slower
 
         Returns:
             bool: True if initialization succeeds, False if any errors occur
@@ -71,6 +154,7 @@ class VisionCamera:
         try:
             self.open_procedure.run()
             self.prepare_trigger()
+            self.prepare_programs()
             return True
         except Exception as e:
             logger.error(f"Error initializing camera {self.name}: {e}")
@@ -81,8 +165,9 @@ class VisionCamera:
         """Sets the active program and updates the workflow and display procedures.
 
         This method updates the camera's workflow by:
-        1. Setting the workflow to [trigger_procedure, selected process_procedure]
-        2. Setting the display procedure for the selected program
+        1. Swapping in the workflow [trigger_procedure, selected process_procedure, its post-processing
+           stages], the display procedure and the bindings compiled for the selected program
+        2. Discarding the frame prefetched for the previous program, if any, without waiting for it
         3. Resetting all runtime statistics
 
         Args:
@@ -98,50 +183,133 @@ class VisionCamera:
 
         logger = LoggerManager.get_logger(__name__)
 
+        start_time = time.perf_counter()
+
         try:
             if program_number < 0:
                 raise ValueError("Program Number is Invalid")
 
-            if program_number > 0:
-                self.workflow = [
-                    self.trigger_procedure,
-                    self.process_procedures[program_number - 1],
-                ]
-                self.displayflow = self.display_procedures[program_number - 1]
-            else:
-                self.workflow = [self.trigger_procedure]
-                self.displayflow = []
+            (
+                self.workflow,
+                self.displayflow,
+                self.workflow_bindings,
+                self.display_binding,
+            ) = self.compiled_programs[program_number]
 
+            self.discard_prefetch()
             self.program_number = program_number
             self.min_run_time = 0
             self.run_time = 0
             self.max_run_time = 0
+            self.overlap = 0
+            self.program_change_time = time.perf_counter() - start_time
             return True
 
         except Exception as e:
             logger.error(
                 f"Error changing camera {self.name} program to {program_number}: {e}"
             )
-            if self.program_number > 0:
-                self.workflow = [
-                    self.trigger_procedure,
-                    self.process_procedures[self.program_number - 1],
-                ]
-                self.displayflow = self.display_procedures[self.program_number - 1]
-            else:
-                self.workflow = [self.trigger_procedure]
-                self.displayflow = []
 
         return False
 
+    def compile_program(self, program_number: int) -> tuple:
+        """Resolves the workflow, display procedure and bindings of a program.
+
+        The workflow is the trigger, the process procedure and its post-processing stages. Each
+        procedure is bound to the outputs of the procedures before it, and the display procedure
+        to the outputs of the whole workflow. Applying the bindings on every trigger is then a
+        flat list of assignments.
+
+        Args:
+            program_number (int): Number of the program, 0 for the trigger only workflow.
+
+        Returns:
+            tuple: The workflow, the display procedure, the workflow bindings and the display binding.
+        """
+
+        if program_number > 0:
+            process = self.process_procedures[program_number - 1]
+            workflow = [self.trigger_procedure, process] + list(process.post_stages)
+            displayflow = self.display_procedures[program_number - 1]
+        else:
+            workflow = [self.trigger_procedure]
+            displayflow = []
+
+        workflow_bindings = [
+            ProcedureBinding(workflow[position], workflow[:position]) for position in range(1, len(workflow))
+        ]
+        display_binding = ProcedureBinding(displayflow, workflow) if displayflow else None
+
+        return workflow, displayflow, workflow_bindings, display_binding
+
+    def prepare_programs(self) -> None:
+        """Compiles every procedure and warms up every program on the reference image, if any.
+
+        Errors are logged as warnings: a program that fails to warm up is still usable, its
+        first trigger is just slower.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        start_time = time.perf_counter()
+
+        try:
+            program_loader.enable_jit_compilation()
+        except Exception as e:
+            logger.warning(f"Failed to enable JIT compilation in camera {self.name}: {e}")
+
+        for procedure in self.get_procedures():
+            try:
+                procedure.compile()
+            except Exception as e:
+                logger.warning(f"Failed to compile procedure {procedure.name} in camera {self.name}: {e}")
+
+        if self.warmup_image_path:
+            try:
+                image = ha.read_image(self.warmup_image_path)
+                for program_number in range(1, len(self.compiled_programs)):
+                    self.warm_up_program(program_number, image)
+            except Exception as e:
+                logger.warning(f"Failed to read warm up image of camera {self.name}: {e}")
+
+        logger.info(f"Camera {self.name} programs prepared in {time.perf_counter() - start_time:.3f} s")
+
+    def warm_up_program(self, program_number: int, image: ha.HObject) -> None:
+        """Runs a program and its display once on an image, without recording statistics.
+
+        Args:
+            program_number (int): Number of the program to warm up.
+            image (ha.HObject): Image standing for the output of the trigger procedure.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        workflow, displayflow, workflow_bindings, display_binding = self.compiled_programs[program_number]
+        iconic_outputs = [dict.fromkeys(self.trigger_procedure.output_iconic_variables, image)]
+        control_outputs = [dict(self.trigger_procedure.output_control)]
+
+        try:
+            for position in range(1, len(workflow)):
+                workflow_bindings[position - 1].apply(iconic_outputs, control_outputs)
+                workflow[position].warm_up()
+                iconic_outputs.append(dict(workflow[position].output_iconic))
+                control_outputs.append(dict(workflow[position].output_control))
+
+            if displayflow:
+                display_binding.apply(iconic_outputs, control_outputs)
+                displayflow.warm_up()
+        except Exception as e:
+            logger.warning(f"Failed to warm up program number {program_number} in camera {self.name}: {e}")
+
     def execute_program(self) -> bool:
         """Executes the current active program and handles display asynchronously.
 
         This method:
         1. Executes the workflow and collects display data
         2. Updates runtime statistics
-        3. Submits display execution to a thread pool executor
-        4. Sets up callback for handling display results
+        3. Records the frame in the history
+        4. Submits display execution to the display scheduler
+        5. Sets up callback for handling display results
 
         Returns:
             bool: True if program execution succeeds, False if any errors occur
@@ -150,19 +318,26 @@ class VisionCamera:
             Exception: Any exceptions during execution are caught and logged
 
         Note:
-            Display execution happens asynchronously in a separate thread
+            Display execution happens asynchronously in a separate thread. If the display
+            falls behind, frames superseded by newer ones are dropped without being rendered,
+            but every frame is recorded in the history beforehand.
         """
 
         logger = LoggerManager.get_logger(__name__)
 
         try:
 
-            display_iconic, display_control, elapsed_time = self.execute_workflow()
+            iconic_outputs, control_outputs, elapsed_time = self.execute_workflow()
+            self.frame_id += 1
+            self.image = self.find_output(iconic_outputs, "Image")
             self.get_statistics(elapsed_time)
-            self.display_future = self.executor.submit(
-                self.execute_display, display_iconic, display_control
+            self.record_history(self.frame_id, iconic_outputs, control_outputs, elapsed_time)
+            self.display_future = self.display_scheduler.submit(
+                iconic_outputs, control_outputs, self.frame_id, elapsed_time
             )
             self.display_future.add_done_callback(self.handle_display_result)
+            if self.profiler.active and self.profiler.record_trigger():
+                self.stop_profiling()
             return True
         except Exception as e:
             logger.error(
@@ -171,6 +346,37 @@ class VisionCamera:
 
         return False
 
+    def execute_burst(self, count: int) -> list[dict] | None:
+        """Executes the active program on `count` frames back-to-back.
+
+        Every frame goes through execute_program, so the statistics, the history and the display
+        are updated as for single triggers; the display keeps only the latest frame when it falls
+        behind.
+
+        Args:
+            count (int): Number of frames of the burst.
+
+        Returns:
+            list[dict]: Frame id, run time and program outputs of each frame, or None if a frame failed.
+        """
+
+        frames = []
+        self.burst_prefetches = count - 1
+        try:
+            for _ in range(count):
+                if not self.execute_program():
+                    return None
+                frames.append(
+                    {
+                        "frame_id": self.frame_id,
+                        "run_time": self.run_time,
+                        "outputs": [list(output) if output is not None else [] for output in self.get_program_output()],
+                    }
+                )
+        finally:
+            self.burst_prefetches = 0
+        return frames
+
     def handle_display_result(self, future: concurrent.futures.Future) -> None:
         """Callback to handle the result of asynchronous display execution.
 
@@ -207,6 +413,38 @@ class VisionCamera:
             return True
         return self.display_future.done()
 
+    def get_display_future(self) -> concurrent.futures.Future:
+        """Returns the future of the most recent display operation, or None if there is none.
+
+        The future completes with True when the frame is rendered and with False when it is
+        dropped in favour of a newer frame.
+        """
+
+        return self.display_future
+
+    def get_dropped_frames(self) -> int:
+        """Returns the number of display frames dropped because the display fell behind."""
+
+        return self.display_scheduler.get_dropped_frames()
+
+    def set_display_demand(self, watched: bool, headless_rate: float) -> None:
+        """Sets whether a viewer watches the camera, and the render rate while nobody does.
+
+        Frames that are not rendered are not encoded, but they are still recorded in the history,
+        without overlay.
+
+        Args:
+            watched (bool): Whether a viewer is subscribed to the camera.
+            headless_rate (float): Renders per second while nobody watches, 0 to skip every frame.
+        """
+
+        self.display_scheduler.set_demand(watched, headless_rate)
+
+    def get_skipped_renders(self) -> int:
+        """Returns the number of frames not rendered because nobody was watching."""
+
+        return self.display_scheduler.get_skipped_renders()
+
     def set_program_input(self, index: int, variable: int) -> None:
         """Sets the input variable for the active program."""
 
@@ -221,12 +459,22 @@ class VisionCamera:
             )
 
     def get_program_output(self) -> list[ha.HTupleType]:
-        """Gets the output of the active program."""
+        """Gets the output of the active program, the outputs of its post-processing stages included."""
 
-        if self.program_number > 0:
-            output = self.workflow[1].get_output_control()
-            return output
-        return []
+        output = []
+        for procedure in self.workflow[1:]:
+            output.extend(procedure.get_output_control())
+        return output
+
+    def get_frame_id(self) -> int:
+        """Returns the identifier of the last executed frame."""
+
+        return self.frame_id
+
+    def get_image(self) -> ha.HObject:
+        """Returns the image acquired in the last executed frame."""
+
+        return self.image
 
     def get_program_number(self) -> int:
         """Returns the current program number."""
@@ -248,6 +496,35 @@ class VisionCamera:
 
         return self.max_run_time
 
+    def get_overlap(self) -> float:
+        """Returns the fraction of the last acquisition overlapped with processing."""
+
+        return self.overlap
+
+    def get_startup_time(self) -> float:
+        """Returns the time it took to load the camera procedures."""
+
+        return self.startup_time
+
+    def get_program_change_time(self) -> float:
+        """Returns the time the last program change took."""
+
+        return self.program_change_time
+
+    def get_speed_up(self) -> float:
+        """Returns the parallel speed-up of the last execution of the active program."""
+
+        if self.program_number > 0:
+            return self.workflow[1].get_speed_up()
+        return 1.0
+
+    def get_program_statistics(self) -> dict:
+        """Returns the statistics specific to the active program, such as the tracking hit ratio."""
+
+        if self.program_number > 0:
+            return self.workflow[1].get_program_statistics()
+        return {}
+
     def get_program_input_variables(self) -> dict[int, list[str, str]]:
         """Gets the input variables for the active program."""
 
@@ -257,67 +534,441 @@ class VisionCamera:
         return {}
 
     def get_program_output_variables(self) -> dict[int, list[str, str]]:
-        """Gets the output variables for the active program."""
+        """Gets the output variables for the active program, followed by those of its post-processing stages."""
 
-        if self.program_number > 0:
-            output = self.workflow[1].get_output_control_variables()
-            return output
-        return {}
+        output = {}
+        for procedure in self.workflow[1:]:
+            for variable in procedure.get_output_control_variables().values():
+                output[len(output)] = variable
+        return output
 
     def prepare_trigger(self) -> None:
         """Prepares the trigger procedure by setting input controls based on camera parameters."""
 
         self.camera_parameters = self.open_procedure.get_output_control_dict()
-        for parameter_name in self.camera_parameters.copy():
-            if parameter_name in self.trigger_procedure.input_control_variables:
-                self.trigger_procedure.set_input_control_by_name(
-                    parameter_name, self.camera_parameters[parameter_name]
-                )
+        ProcedureBinding(self.trigger_procedure, [self.open_procedure]).apply(
+            [self.open_procedure.get_output_iconic_dict()], [self.camera_parameters]
+        )
 
     def execute_workflow(self) -> tuple:
-        """Executes the current workflow and returns the display input and elapsed time."""
+        """Executes the current workflow and returns the outputs of each procedure and elapsed time.
+
+        Returns:
+            tuple: The iconic outputs and control outputs of each procedure of the workflow, in
+                order, and the sum of their run times.
+        """
+
+        if self.pipelined:
+            return self.execute_pipelined_workflow()
+
+        self.wait_discarded_acquisition()
+        iconic_outputs: list[dict] = []
+        control_outputs: list[dict] = []
+        elapsed_time = self.execute_procedures(0, iconic_outputs, control_outputs)
+
+        self.latency.record(ACQUISITION_STAGE, self.trigger_procedure.run_time_ns)
+        self.latency.record(PROCESSING_STAGE, sum(procedure.run_time_ns for procedure in self.workflow[1:]))
+
+        return iconic_outputs, control_outputs, elapsed_time
+
+    def execute_procedures(self, start: int, iconic_outputs: list[dict], control_outputs: list[dict]) -> float:
+        """Runs the workflow procedures from `start`, binding each one to the outputs of the previous ones.
+
+        The outputs of each procedure are copied and appended to the output lists, so that the
+        display can consume them while the next frame is already running.
+
+        Args:
+            start (int): Position of the first procedure to run in the workflow.
+            iconic_outputs (list[dict]): Iconic outputs of the procedures already run.
+            control_outputs (list[dict]): Control outputs of the procedures already run.
+
+        Returns:
+            float: The sum of the run times of the procedures.
+        """
 
-        input_iconic = None
-        input_control = None
-        display_input_iconic = {}
-        display_input_control = {}
         elapsed_time = 0.0
 
-        for procedure in self.workflow:
-            if input_iconic or input_control:
-                self.set_procedure_inputs(procedure, input_iconic, input_control)
+        for position in range(start, len(self.workflow)):
+            procedure = self.workflow[position]
+            if position > 0:
+                self.workflow_bindings[position - 1].apply(iconic_outputs, control_outputs)
 
             procedure.run()
-            input_iconic = procedure.get_output_iconic_dict()
-            input_control = procedure.get_output_control_dict()
-            display_input_iconic |= input_iconic
-            display_input_control |= input_control
+            iconic_outputs.append(dict(procedure.output_iconic))
+            control_outputs.append(dict(procedure.output_control))
             elapsed_time += procedure.get_run_time()
 
-        return display_input_iconic, display_input_control, elapsed_time
+        return elapsed_time
+
+    def acquire_image(self) -> tuple:
+        """Runs the trigger procedure and returns a snapshot of its outputs, run time and end time.
+
+        The outputs are copied so that a prefetched acquisition can run while the
+        previous frame is still being consumed by the process procedures. The end time,
+        from time.perf_counter, tells how long a prefetched frame waited for its trigger.
+        """
+
+        self.trigger_procedure.run()
+        self.latency.record(ACQUISITION_STAGE, self.trigger_procedure.run_time_ns)
+        return (
+            dict(self.trigger_procedure.get_output_iconic_dict()),
+            dict(self.trigger_procedure.get_output_control_dict()),
+            self.trigger_procedure.get_run_time(),
+            time.perf_counter(),
+        )
+
+    def set_prefetch(self, enabled: bool) -> None:
+        """Sets whether the next frame is prefetched after every cycle, in pipelined mode.
+
+        Prefetching only pays off when the next trigger follows right away, so it is enabled while
+        the camera runs in continuous mode. Disabling it discards the pending prefetch.
+
+        Args:
+            enabled (bool): Whether to prefetch the next frame.
+        """
+
+        self.prefetch = enabled
+        if not enabled:
+            self.discard_prefetch()
+
+    def discard_prefetch(self) -> None:
+        """Drops the prefetched acquisition without waiting for it.
+
+        An acquisition that already started can't be cancelled; it is waited for by the camera
+        thread before the next acquisition, so the trigger procedure never runs twice at once.
+        """
+
+        future = self.acquisition_future
+        self.acquisition_future = None
+        if future is not None and not future.cancel():
+            self.discarded_acquisition = future
+        self.cycle_start = None
+        self.cycle_period = 0
+
+    def wait_discarded_acquisition(self) -> None:
+        """Waits for a discarded acquisition that was still running."""
+
+        if self.discarded_acquisition is not None:
+            concurrent.futures.wait([self.discarded_acquisition])
+            self.discarded_acquisition = None
+
+    def get_max_prefetch_age(self) -> float:
+        """Returns the seconds a prefetched frame may wait for its trigger.
+
+        Without a configured age, the limit is PREFETCH_AGE_CYCLES periods of the previous cycles,
+        or of the run time of the last cycle when the period is not known yet, so a frame prefetched
+        before the loop paused is acquired again while frames of a steady loop are kept.
+        """
+
+        if self.max_prefetch_age is not None:
+            return self.max_prefetch_age
+        return PREFETCH_AGE_CYCLES * (self.cycle_period or self.run_time)
+
+    def execute_pipelined_workflow(self) -> tuple:
+        """Executes the current workflow overlapping the acquisition of the next frame.
+
+        The frame acquired in the previous cycle (or a new one, on the first cycle) is
+        handed to the process procedures while the acquisition of the next frame is
+        already started in the acquisition executor. Since cycles are executed one at a
+        time and each one consumes the acquisition started by its predecessor, results
+        are returned in the order the frames were acquired.
+
+        The next frame is only prefetched while the next trigger is known to follow, in
+        continuous mode and within a burst, so single triggers acquire their own frame. A
+        prefetched frame that waited longer than get_max_prefetch_age for its trigger, from
+        the end of its acquisition, is discarded and the frame is acquired again, so a stale
+        image is never inspected.
+
+        Returns:
+            tuple: The iconic outputs and control outputs of each procedure of the workflow,
+                in order, and the wall time of the cycle.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        start_time = time.perf_counter()
+        max_age = self.get_max_prefetch_age()
+        self.cycle_period = start_time - self.cycle_start if self.cycle_start is not None else 0
+        self.cycle_start = start_time
+
+        frame = None
+        if self.acquisition_future is not None:
+            try:
+                frame = self.acquisition_future.result()
+            finally:
+                self.acquisition_future = None
+
+            age = start_time - frame[3]
+            if age > max_age:
+                logger.debug(f"Camera {self.name} prefetched frame waited {age:.3f} s, acquiring it again")
+                frame = None
+
+        if frame is None:
+            self.wait_discarded_acquisition()
+            frame = self.acquire_image()
+        input_iconic, input_control, acquisition_time, _ = frame
+
+        wait_time = time.perf_counter() - start_time
+        if self.prefetch or self.burst_prefetches > 0:
+            self.burst_prefetches = max(self.burst_prefetches - 1, 0)
+            self.acquisition_future = self.acquisition_executor.submit(self.acquire_image)
+
+        iconic_outputs = [input_iconic]
+        control_outputs = [input_control]
+        self.execute_procedures(1, iconic_outputs, control_outputs)
+
+        elapsed_time = time.perf_counter() - start_time
+        self.update_overlap(acquisition_time, wait_time)
+        self.latency.record(PROCESSING_STAGE, sum(procedure.run_time_ns for procedure in self.workflow[1:]))
+
+        return iconic_outputs, control_outputs, elapsed_time
+
+    def update_overlap(self, acquisition_time: float, wait_time: float) -> None:
+        """Updates the fraction of the acquisition time that was hidden behind processing.
+
+        Args:
+            acquisition_time (float): Run time of the trigger procedure for the frame.
+            wait_time (float): Time the cycle had to wait for that acquisition to finish.
+        """
+
+        if acquisition_time <= 0:
+            self.overlap = 0
+            return
 
-    def set_procedure_inputs(
-        self, procedure: VisionProcedure, iconic: dict, control: dict
+        hidden_time = max(acquisition_time - wait_time, 0.0)
+        self.overlap = min(hidden_time / acquisition_time, 1.0)
+
+    def find_output(self, outputs: list[dict], name: str):
+        """Returns the value of the output `name` of the last procedure producing it, or None."""
+
+        for output in reversed(outputs):
+            if name in output:
+                return output[name]
+        return None
+
+    def execute_display(
+        self, iconic_outputs: list[dict], control_outputs: list[dict], frame_id: int = 0, run_time: float = 0.0
     ) -> None:
-        """Sets the inputs for the procedure based on iconic and control variables."""
+        """Executes the display procedure and encodes a preview of the rendered image, or the acquired one.
 
-        if iconic:
-            for var_name, value in iconic.items():
-                if var_name in procedure.input_iconic_variables:
-                    procedure.set_input_iconic_by_name(var_name, value)
-        if control:
-            for var_name, value in control.items():
-                if var_name in procedure.input_control_variables:
-                    procedure.set_input_control_by_name(var_name, value)
+        The encoding runs in the display thread, so it never blocks the event loop or the next trigger.
+        Only the downscaled preview is encoded on every frame; the full resolution image is kept
+        for get_full_frame. The preview is then attached to the frame in the history as its overlay.
+        """
 
-    def execute_display(self, display_iconic: dict, display_control: dict) -> None:
-        """Executes the display procedure or writes the image to disk."""
+        start_time = time.perf_counter_ns()
 
         if self.displayflow:
-            self.set_procedure_inputs(self.displayflow, display_iconic, display_control)
+            self.display_binding.apply(iconic_outputs, control_outputs)
             self.displayflow.run()
-        elif "Image" in display_iconic:
-            ha.write_image(display_iconic["Image"], "jpg", 0, self.output_path)
+            image = self.displayflow.get_output_iconic_by_name("OutputImage")
+        else:
+            image = self.find_output(iconic_outputs, "Image")
+
+        if image is not None:
+            self.rendered_frame = (frame_id, image)
+            self.encoded_frame = (frame_id, encode_jpeg(image, max_width=self.preview_width))
+
+        display_time = time.perf_counter_ns() - start_time
+        self.latency.record(DISPLAY_STAGE, display_time)
+
+        if image is not None:
+            self.history.attach_overlay(frame_id, self.encoded_frame[1], {"display_time": display_time / 1e9})
+
+    def record_history(
+        self, frame_id: int, iconic_outputs: list[dict], control_outputs: list[dict], run_time: float
+    ) -> None:
+        """Records the program outputs and timings of a frame, rendered or not, and its raw image if enabled.
+
+        Runs in the camera thread for every frame, so frames dropped or skipped by the display are
+        recorded too; the overlay is attached by execute_display if the frame gets rendered. The raw
+        image is read through a view of its pixels, so the only copy is the one kept by the history.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            image = None
+            if self.history.raw_images:
+                raw_image = self.find_output(iconic_outputs, "Image")
+                image = image_array(raw_image) if raw_image is not None else None
+            program_outputs = control_outputs[1:] if len(control_outputs) > 1 else control_outputs
+            results = {
+                variable_name: list(value) if isinstance(value, (list, tuple)) else [value]
+                for outputs in program_outputs
+                for variable_name, value in outputs.items()
+            }
+            self.history.record(frame_id, time.time(), image, results, {"run_time": run_time})
+        except Exception as e:
+            logger.error(f"Failed to record frame {frame_id} in the history of camera {self.name}: {e}")
+
+    def get_encoded_frame(self) -> tuple[int, bytes] | None:
+        """Returns the frame id and JPEG preview of the last rendered frame, or None if nothing was rendered."""
+
+        return self.encoded_frame
+
+    def get_full_frame(self, region: list[int] = None) -> tuple[int, bytes] | None:
+        """Encodes the last rendered frame at full resolution, on demand.
+
+        Args:
+            region (list[int]): Row and column of the top left and bottom right corners to crop the
+                frame to, or None for the whole frame.
+
+        Returns:
+            tuple: The frame id and the JPEG, or None if nothing was rendered.
+        """
+
+        rendered_frame = self.rendered_frame
+        if rendered_frame is None:
+            return None
+
+        frame_id, image = rendered_frame
+        if region:
+            image = crop_image(image, region)
+        return frame_id, encode_jpeg(image)
+
+    def get_history(self) -> list[dict]:
+        """Returns the frame id, time, results and timings of every frame in the history, oldest first."""
+
+        return self.history.get_summary()
+
+    def get_history_frame(self, frame_id: int = None, timestamp: float = None, raw: bool = False) -> tuple | None:
+        """Returns a frame of the history, by frame id or the last one at or before a time.
+
+        Args:
+            frame_id (int): Identifier of the frame.
+            timestamp (float): Time in seconds since the epoch, used when no frame id is given.
+            raw (bool): If True, the raw image is encoded instead of returning the overlay. Frames that
+                were not rendered have no overlay, their raw image is encoded in any case when raw
+                images are kept.
+
+        Returns:
+            tuple: The summary of the frame and its JPEG, or None if the frame is not in the history.
+        """
+
+        entry = self.history.find(frame_id, timestamp)
+        if entry is None:
+            return None
+
+        data = None if raw else self.history.read_overlay(entry)
+        if data is None:
+            image = self.history.read_image(entry)
+            data = encode_array_jpeg(image) if image is not None and image.size else None
+
+        if data is None:
+            return None
+        return entry.get_summary(), data
+
+    def start_profiling(self, window: int) -> bool:
+        """Profiles the lines of the procedures of every program over the next `window` triggers.
+
+        The procedures run from instrumented copies of their programs, which are slower, until the
+        window is complete or stop_profiling is called; the report is then written to the profiles
+        directory. A profiling already active is restarted.
+
+        Args:
+            window (int): Triggers to profile.
+
+        Returns:
+            bool: True if the procedures were switched to the instrumented programs.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            if self.profiler.active:
+                self.set_profiler(None)
+            self.profiler.start(window)
+            self.set_profiler(self.profiler)
+            logger.info(f"Camera {self.name} profiling the next {window} triggers")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start profiling in camera {self.name}: {e}")
+            self.profiler.active = False
+            self.set_profiler(None)
+
+        return False
+
+    def stop_profiling(self) -> str | None:
+        """Switches the procedures back to their programs and writes the profiling report.
+
+        Returns:
+            str: Path of the JSON report, or None if no profiling was active or the report failed.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        if not self.profiler.active:
+            return None
+
+        try:
+            self.set_profiler(None)
+            return self.profiler.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop profiling in camera {self.name}: {e}")
+            self.profiler.active = False
+
+        return None
+
+    def set_profiler(self, profiler: ProcedureProfiler | None) -> None:
+        """Switches every procedure to the instrumented programs of a profiler, or back with None.
+
+        The pending acquisition and display are waited for first, so no procedure executes while
+        its call is replaced.
+        """
+
+        pending = [
+            future
+            for future in (self.acquisition_future, self.discarded_acquisition, self.display_future)
+            if future is not None
+        ]
+        concurrent.futures.wait(pending)
+        for procedure in dict.fromkeys(self.get_procedures()):
+            procedure.set_profiler(profiler)
+
+    def get_profiling_status(self) -> dict:
+        """Returns whether the profiling is active, the triggers profiled and the path of the last report."""
+
+        return self.profiler.get_status()
+
+    def get_profiling_report(self) -> dict:
+        """Returns the lines of every profiled procedure ranked by time, of the active or last window."""
+
+        return self.profiler.get_report()
+
+    def get_procedures(self) -> list[VisionProcedure]:
+        """Returns the procedures executed on every trigger, for all the programs."""
+
+        post_stages = [stage for procedure in self.process_procedures for stage in procedure.post_stages]
+        return [self.trigger_procedure] + list(self.process_procedures) + post_stages + list(self.display_procedures)
+
+    def get_latency_statistics(self) -> dict:
+        """Returns the latency percentiles, since the last reset, of every stage and procedure."""
+
+        return {
+            "stages": self.latency.get_summary(),
+            "procedures": {
+                procedure.name: procedure.latency.total.get_summary() for procedure in self.get_procedures()
+            },
+        }
+
+    def get_latency_window(self, seconds: float) -> dict:
+        """Returns the latency percentiles of every stage and procedure over the last `seconds`."""
+
+        return {
+            "stages": self.latency.get_window_summary(seconds),
+            "procedures": {
+                procedure.name: procedure.latency.get_window(seconds).get_summary()
+                for procedure in self.get_procedures()
+            },
+        }
+
+    def reset_latency_statistics(self) -> None:
+        """Clears the latency histograms of every stage and procedure."""
+
+        self.latency.reset()
+        for procedure in self.get_procedures():
+            procedure.latency.reset()
 
     def get_statistics(self, elapsed_time: float) -> None:
         """Updates the runtime statistics based on the elapsed time."""
@@ -327,3 +978,12 @@ class VisionCamera:
             self.max_run_time = elapsed_time
         if elapsed_time < self.min_run_time or self.min_run_time == 0:
             self.min_run_time = elapsed_time
+
+    def close(self) -> None:
+        """Waits for the display in flight and releases the history spill file."""
+
+        self.discard_prefetch()
+        self.wait_discarded_acquisition()
+        if self.display_future is not None:
+            concurrent.futures.wait([self.display_future])
+        self.history.close()
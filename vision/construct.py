@@ -1,25 +1,48 @@
 ###########EXTERNAL IMPORTS############
 
+import os
+
 #######################################
 
 #############LOCAL IMPORTS#############
 
 from vision.procedure import create_vision_procedure
+from vision.loader import program_loader
+from vision.models import ShapeModelCache, ShapeModelOpenProcedure
+from vision.multireference import MultiReferenceProcedure
+from vision.tracking import TrackingProcedure
+from vision.tiling import TiledPulleyProcedure
+from vision.postprocess import RegionStatisticsStage
 
 #######################################
 
+# Pulleys reported in the output registers: six arrays of 5 and the two counts fill the 32 registers
+PULLEY_OUTPUT_LENGTH = 5
+
+# Search modes of the final inspection program, chosen per camera so the PLC program numbers stay the same
+SINGLE_SEARCH = "single"
+MULTI_REFERENCE_SEARCH = "multireference"
+TRACKING_SEARCH = "tracking"
+
 
-def create_pulley_camera(program_path: str) -> tuple:
+def create_pulley_camera(program_path: str, tiled: bool = False) -> tuple:
     """
     Creates the procedures for the pulley camera, including image processing and display procedures.
 
     Args:
         program_path (str): The directory path for the camera's procedures.
+        tiled (bool): If True, program 1 splits the image into overlapping tiles extracted concurrently,
+            with the same results as the single pass.
 
     Returns:
         tuple: Contains the open, trigger, programs, and displays for the pulley camera.
     """
 
+    program_loader.preload(
+        program_path,
+        ["OpenCamera", "TriggerCamera", "ExtractPulleys", "ExtractPulleyRings", "MeasurePulleys", "GetPulleysImage"],
+    )
+
     open = create_vision_procedure(
         program_directory=program_path,
         name="OpenCamera",
@@ -33,33 +56,46 @@ def create_pulley_camera(program_path: str) -> tuple:
         output_iconic=["Image"],
     )
 
-    program_01 = create_vision_procedure(
-        program_directory=program_path,
-        name="ExtractPulleys",
-        input_iconic=["Image"],
-        input_control={
-            "MinIntRadius": "float",
-            "MaxIntRadius": "float",
-            "MinExtRadius": "float",
-            "MaxExtRadius": "float",
-        },
-        output_iconic=[
-            "Pulleys",
-            "CorrectRefPulleys",
-            "IncorrectRefPulleys",
-            "BestPulley",
-        ],
-        output_control={
-            "X": "float",
-            "Y": "float",
-            "CorrectRefCount": "int",
-            "IncorrectRefCount": "int",
-            "MinIntRadiusResult": "float",
-            "MaxIntRadiusResult": "float",
-            "MinExtRadiusResult": "float",
-            "MaxExtRadiusResult": "float",
-        },
-    )
+    pulley_outputs = {
+        "X": f"float[{PULLEY_OUTPUT_LENGTH}]",
+        "Y": f"float[{PULLEY_OUTPUT_LENGTH}]",
+        "CorrectRefCount": "int",
+        "IncorrectRefCount": "int",
+        "MinIntRadiusResult": f"float[{PULLEY_OUTPUT_LENGTH}]",
+        "MaxIntRadiusResult": f"float[{PULLEY_OUTPUT_LENGTH}]",
+        "MinExtRadiusResult": f"float[{PULLEY_OUTPUT_LENGTH}]",
+        "MaxExtRadiusResult": f"float[{PULLEY_OUTPUT_LENGTH}]",
+    }
+
+    if tiled:
+        program_01 = TiledPulleyProcedure(
+            program_directory=program_path,
+            name="TiledExtractPulleys",
+            output_control=pulley_outputs,
+        )
+    else:
+        program_01 = create_vision_procedure(
+            program_directory=program_path,
+            name="ExtractPulleys",
+            input_iconic=["Image"],
+            input_control={
+                "MinIntRadius": "float",
+                "MaxIntRadius": "float",
+                "MinExtRadius": "float",
+                "MaxExtRadius": "float",
+            },
+            output_iconic=[
+                "Pulleys",
+                "CorrectRefPulleys",
+                "IncorrectRefPulleys",
+                "BestPulley",
+            ],
+            output_control=pulley_outputs,
+        )
+
+    # Area and mean gray value of each pulley, measured in NumPy on the extracted regions. The pulley
+    # outputs already fill the 32 registers, so they are reported in the results and the history only
+    program_01.add_post_stage(RegionStatisticsStage("PulleyStatistics", "Pulleys", output_length=PULLEY_OUTPUT_LENGTH))
 
     programs = [program_01]
 
@@ -73,6 +109,7 @@ def create_pulley_camera(program_path: str) -> tuple:
             "IncorrectRefPulleys",
             "BestPulley",
         ],
+        output_iconic=["OutputImage"],
     )
 
     displays = [display_01]
@@ -80,22 +117,25 @@ def create_pulley_camera(program_path: str) -> tuple:
     return open, trigger, programs, displays
 
 
-def create_final_inspection_camera(program_path: str) -> tuple:
+def create_final_inspection_camera(program_path: str, search: str = SINGLE_SEARCH) -> tuple:
     """
     Creates the procedures for the final inspection camera, including image processing and display procedures.
 
     Args:
         program_path (str): The directory path for the camera's procedures.
+        search (str): Search mode of program 1: SINGLE_SEARCH for the reference chosen by the PLC,
+            MULTI_REFERENCE_SEARCH to search a set of references concurrently and identify an unknown
+            part with one trigger, or TRACKING_SEARCH to search around the pose of the last good result,
+            falling back to the full frame on a miss.
 
     Returns:
         tuple: Contains the open, trigger, programs, and displays for the final inspection camera.
+
+    Raises:
+        ValueError: If the search mode is unknown.
     """
 
-    open = create_vision_procedure(
-        program_directory=program_path,
-        name="OpenCamera",
-        output_control={"AcqHandle": "handle"},
-    )
+    program_loader.preload(program_path, ["OpenCamera", "TriggerCamera", "Inspection", "Display"])
 
     trigger = create_vision_procedure(
         program_directory=program_path,
@@ -104,31 +144,60 @@ def create_final_inspection_camera(program_path: str) -> tuple:
         output_iconic=["Image"],
     )
 
-    program_01 = create_vision_procedure(
+    if search == MULTI_REFERENCE_SEARCH:
+        program_01 = MultiReferenceProcedure(
+            program_directory=program_path,
+            name="MultiReferenceInspection",
+        )
+    elif search == TRACKING_SEARCH:
+        program_01 = TrackingProcedure(
+            program_directory=program_path,
+            name="TrackingInspection",
+        )
+    elif search == SINGLE_SEARCH:
+        program_01 = create_vision_procedure(
+            program_directory=program_path,
+            name="Inspection",
+            input_iconic=["Image"],
+            input_control={
+                "ProgramNumber": "int",
+                "MinAngle": "float",
+                "MaxAngle": "float",
+                "MinScore": "float",
+            },
+            output_control={
+                "Angle": "float",
+                "Score": "float",
+                "OK": "int",
+                "NOK": "int",
+                "X": "float",
+                "Y": "float",
+                "Ref": "string",
+                "Width": "float",
+                "Height": "float",
+            },
+        )
+    else:
+        raise ValueError(f"Unknown search mode: {search}")
+
+    programs = [program_01]
+
+    # Shape models are loaded when the camera opens, and only rebuilt for new or changed references
+    program_folder = os.path.dirname(program_path)
+    open = ShapeModelOpenProcedure(
         program_directory=program_path,
-        name="Inspection",
-        input_iconic=["Image"],
+        name="OpenCamera",
+        cache=ShapeModelCache(os.path.join(program_folder, "models"), os.path.join(program_folder, "regions")),
         input_control={
-            "ProgramNumber": "int",
-            "MinAngle": "float",
-            "MaxAngle": "float",
-            "MinScore": "float",
-        },
-        output_control={
-            "Angle": "float",
-            "Score": "float",
-            "OK": "int",
-            "NOK": "int",
-            "X": "float",
-            "Y": "float",
-            "Ref": "string",
-            "Width": "float",
-            "Height": "float",
+            "ModelHandles": "handle",
+            "ModelNames": "string",
+            "ModelWidths": "float",
+            "ModelHeights": "float",
         },
+        output_control={"AcqHandle": "handle"},
+        reference_procedures=[program_01] if search == MULTI_REFERENCE_SEARCH else None,
     )
 
-    programs = [program_01]
-
     display_01 = create_vision_procedure(
         program_directory=program_path,
         name="Display",
@@ -143,6 +212,7 @@ def create_final_inspection_camera(program_path: str) -> tuple:
             "Ref": "string",
             "Score": "float",
         },
+        output_iconic=["OutputImage"],
     )
 
     displays = [display_01]
@@ -1,20 +1,45 @@
 ###########EXTERNAL IMPORTS############
 
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import collections
+import concurrent.futures
 import logging
+import time
 
 #######################################
 
 #############LOCAL IMPORTS#############
 
 from vision.camera import VisionCamera
+from vision.loader import create_timed_camera
+from vision.worker import RemoteVisionCamera
+from vision.executors import executor_manager, ResourceBudget
 from vision.data.comm import VisionCommunication
+from vision.frames import FULL_RENDITION, HISTORY_RENDITION, RAW_RENDITION
+from vision.burst import aggregate_burst, get_burst_variables
+from vision.conversion import OutputLayout
+from vision.production import ProductionStatistics, get_verdict, PRODUCTION_UPDATE_INTERVAL
 from vision.data.variables import *
 from util.debug import LoggerManager
+from util.histogram import LatencyStatistics
 
 #######################################
 
+# Number of completed cycles used to compute the achieved frame rate
+FPS_WINDOW_CYCLES = 30
+
+# Seconds the continuous mode waits before retrying when the camera is not ready
+CONTINUOUS_RETRY_INTERVAL = 0.01
+
+# Frames per second rendered while no viewer is subscribed to the camera, 0 to render none
+DEFAULT_HEADLESS_DISPLAY_RATE = 1.0
+
+# Seconds between two reads of the latency statistics of the camera
+LATENCY_UPDATE_INTERVAL = 1.0
+
+# Seconds to wait for the camera to change its program before flagging a program change error
+PROGRAM_CHANGE_TIMEOUT = 30.0
+
 
 class VisionController:
     """
@@ -28,12 +53,45 @@ class VisionController:
         program_path (str): Path to the camera program.
         output_path (str): Path to output the camera data.
         create_camera (function): Function to create the camera (open, trigger, program, display procedures).
+        camera_options (dict): Keyword arguments of create_camera selecting the modes of the camera.
+        pipelined (bool): Whether the camera overlaps the acquisition of the next frame with processing.
+        worker_process (bool): Whether the camera runs in its own worker process.
+        display_timeout (float): Seconds to wait for a display to complete before flagging a display error.
+        warmup_image_path (str): Reference image used to warm up every program at startup.
+        history_spill_path (str): Memory-mapped file holding the images of the frame history, or None
+            to keep them in memory.
+        history_raw_images (bool): Whether the frame history keeps the raw image of every frame, which
+            costs a full frame copy per trigger, besides the overlays of the rendered frames.
         communication_data (VisionCommunication): Object managing the communication inputs and outputs.
         inputs (VisionInputs): Inputs communication data.
         outputs (VisionOutputs): Outputs communication data.
-        executor (ThreadPoolExecutor): Thread pool for executing camera tasks asynchronously.
-        camera (VisionCamera): Camera object created using the provided program path and procedures.
+        budget (ResourceBudget): CPU budget of the camera: workers on the shared pool, CPU affinity and
+            HALCON threads.
+        executor (ThreadPoolExecutor): Single thread executing the camera tasks asynchronously, created
+            by the executor manager.
+        camera (VisionCamera | RemoteVisionCamera): Camera object created using the provided program path
+            and procedures, or a proxy to the camera running in a worker process.
         lock (asyncio.Lock): Async lock for ensuring thread-safe access to camera operations.
+        latency (LatencyStatistics): Latency histograms of the handshake and trigger cycle stages.
+        camera_latency (dict): Last latency statistics read from the camera, refreshed at a fixed rate.
+        latency_frame_id (int): Identifier of the last frame when the camera latency was read.
+        acknowledge_time_ns (int): Monotonic time the last trigger acknowledge was sent, or None.
+        sent_frame_id (int): Identifier of the last frame sent to the frontend, or None.
+        continuous (bool): Whether the camera is triggering itself continuously.
+        continuous_rate (float): Frames per second of the continuous mode, 0 to run as fast as possible.
+        continuous_task (asyncio.Task): Task running the continuous mode, or None.
+        cycle_times (collections.deque): Completion times of the last cycles, to compute the frame rate.
+        burst_size (int): Number of frames processed per trigger, 1 for single frames.
+        program_output_variables (list[list[str]]): Name and type of each output of the active program.
+        output_layout (OutputLayout): Registers taken by the program outputs, and by the burst outputs
+            that follow them.
+        headless_display_rate (float): Frames per second rendered while no viewer is subscribed, 0 to
+            render none.
+        watched (bool): Whether the viewer of the single frontend client is subscribed to the camera.
+        production (ProductionStatistics): Parts per minute, yield and utilization of the camera and
+            of each program over the last 1, 15 and 60 minutes.
+        production_task (asyncio.Task): Task sending the production statistics at a fixed rate, or None.
+        latency_task (asyncio.Task): Task reading the latency statistics of the camera at a fixed rate, or None.
     """
 
     def __init__(
@@ -44,6 +102,17 @@ class VisionController:
         output_path: str,
         create_camera,
         communication_data: VisionCommunication,
+        pipelined: bool = False,
+        worker_process: bool = False,
+        display_timeout: float = 5.0,
+        warmup_image_path: str = None,
+        history_spill_path: str = None,
+        burst_size: int = 1,
+        headless_display_rate: float = DEFAULT_HEADLESS_DISPLAY_RATE,
+        budget: ResourceBudget = None,
+        max_prefetch_age: float = None,
+        history_raw_images: bool = False,
+        camera_options: dict = None,
     ):
 
         self.name = name
@@ -51,39 +120,130 @@ class VisionController:
         self.program_path = program_path
         self.output_path = output_path
         self.create_camera = create_camera
+        self.camera_options = camera_options
         self.communication_data = communication_data
         self.inputs = self.communication_data.inputs
         self.outputs = self.communication_data.outputs
 
-        self.executor = ThreadPoolExecutor(max_workers=1)
-
-        (
-            self.open_camera,
-            self.trigger_camera,
-            self.programs_camera,
-            self.displays_camera,
-        ) = create_camera(program_path)
-        self.camera = VisionCamera(
-            name,
-            description,
-            output_path,
-            self.open_camera,
-            self.trigger_camera,
-            self.programs_camera,
-            self.displays_camera,
-        )
+        self.display_timeout = display_timeout
+        self.budget = budget if budget else ResourceBudget()
+
+        # A camera in a worker process is pinned there, the thread calling it only waits for replies
+        self.executor = executor_manager.create_thread(name, ResourceBudget() if worker_process else self.budget)
+
+        if worker_process:
+            # Procedures are created inside the worker process
+            self.open_camera = None
+            self.trigger_camera = None
+            self.programs_camera = []
+            self.displays_camera = []
+            self.camera = RemoteVisionCamera(
+                name,
+                description,
+                program_path,
+                output_path,
+                create_camera,
+                pipelined,
+                warmup_image_path=warmup_image_path,
+                history_spill_path=history_spill_path,
+                budget=self.budget,
+                max_prefetch_age=max_prefetch_age,
+                history_raw_images=history_raw_images,
+                camera_options=camera_options,
+            )
+        else:
+            (
+                self.open_camera,
+                self.trigger_camera,
+                self.programs_camera,
+                self.displays_camera,
+                startup_time,
+            ) = create_timed_camera(create_camera, program_path, camera_options)
+            self.camera = VisionCamera(
+                name,
+                description,
+                output_path,
+                self.open_camera,
+                self.trigger_camera,
+                self.programs_camera,
+                self.displays_camera,
+                pipelined,
+                startup_time,
+                warmup_image_path,
+                history_spill_path,
+                self.budget,
+                max_prefetch_age,
+                history_raw_images,
+            )
 
         self.lock = asyncio.Lock()
 
+        self.latency = LatencyStatistics([HANDSHAKE_STAGE, CYCLE_STAGE])
+        self.camera_latency = {}
+        self.latency_frame_id = 0
+        self.acknowledge_time_ns = None
+        self.sent_frame_id = None
+
+        self.continuous = False
+        self.continuous_rate = 0.0
+        self.continuous_task: asyncio.Task = None
+        self.cycle_times = collections.deque(maxlen=FPS_WINDOW_CYCLES)
+
+        self.burst_size = max(int(burst_size), 1)
+        self.program_output_variables: list[list[str]] = []
+        self.output_layout = OutputLayout([], len(self.outputs.outputs_variables))
+
+        self.headless_display_rate = headless_display_rate
+        self.watched = False
+
+        self.production = ProductionStatistics()
+        self.production_task: asyncio.Task = None
+        self.latency_task: asyncio.Task = None
+
     async def init(self) -> None:
         """
         Initialize the camera and start the necessary async tasks.
+
+        The camera is opened and its programs are compiled and warmed up in the camera thread, so the
+        event loop keeps serving the other cameras meanwhile. The lock is held until it is done.
         """
 
-        sucess = self.camera.init()
+        logger = LoggerManager.get_logger(__name__)
+
+        async with self.lock:
+            sucess = await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.init)
+        self.camera.set_display_demand(self.watched, self.headless_display_rate)
+        self.outputs.statistics[STARTUP_TIME] = self.camera.get_startup_time()
+        logger.info(f"Camera {self.name} procedures loaded in {self.outputs.statistics[STARTUP_TIME]:.3f} s")
+
         if sucess:
             asyncio.gather(self.change_camera_program(self.inputs.program_number))
             asyncio.get_event_loop().create_task(self.camera_set_ready())
+            self.production_task = asyncio.get_event_loop().create_task(self.run_production_updates())
+            self.latency_task = asyncio.get_event_loop().create_task(self.run_latency_updates())
+
+    async def set_watched(self, watched: bool) -> None:
+        """
+        Subscribe or unsubscribe the viewer of the camera. While nobody watches, frames are rendered
+        at the headless display rate only, and rendering resumes on the next frame once subscribed.
+        Every frame is still recorded in the history, so it covers the line running unattended.
+
+        The watch state is a single flag, not a count of subscriptions: the WebSocket server serves a
+        single frontend and rejects other connections, so its viewer is the only one, and it is
+        unsubscribed when it disconnects. Cameras start unwatched until that viewer subscribes.
+
+        :param watched: Whether a viewer is subscribed to the camera
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        if watched != self.watched:
+            logger.info(f"Camera {self.name} display {'resumed' if watched else 'headless'}")
+
+        self.watched = watched
+        self.camera.set_display_demand(watched, self.headless_display_rate)
+        self.outputs.statistics[SKIPPED_RENDERS] = self.camera.get_skipped_renders()
+        await self.outputs.send_statistics()
 
     def set_camera_input(self, index, value) -> None:
         """
@@ -101,40 +261,53 @@ class VisionController:
         """
 
         async with self.lock:
+            if self.acknowledge_time_ns is not None:
+                self.latency.record(HANDSHAKE_STAGE, time.perf_counter_ns() - self.acknowledge_time_ns)
+                self.acknowledge_time_ns = None
+
             self.reset_camera_status()
             await self.outputs.send_status()
 
     async def camera_single_trigger(self) -> None:
         """
-        Trigger the camera for a single capture.
+        Trigger the camera for a single capture, or for a burst of frames when the burst size is
+        greater than 1. A burst is acknowledged once, with the aggregated outputs of its frames.
         """
 
         logger = LoggerManager.get_logger(__name__)
 
         async with self.lock:
             if self.outputs.status[READY]:
+                cycle_start_ns = time.perf_counter_ns()
                 self.update_status(run=True, ready=False)
                 await self.outputs.send_status()
 
-                sucess = await asyncio.get_event_loop().run_in_executor(
-                    self.executor, self.camera.execute_program
-                )
+                if self.burst_size > 1:
+                    result = await asyncio.get_event_loop().run_in_executor(self.executor, self.execute_burst)
+                else:
+                    result = await asyncio.get_event_loop().run_in_executor(self.executor, self.execute_program)
 
-                if sucess:
+                if result is not None:
                     logger.debug("Camera display processing")
 
-                    self.process_camera_outputs()
+                    if self.burst_size > 1:
+                        values, self.outputs.statistics[BURST] = result
+                        self.set_output_registers(values)
+                    else:
+                        self.set_output_registers(result)
                     self.update_status(run=False, trigger_acknowledge=True)
                     await self.outputs.send_status()
+                    self.acknowledge_time_ns = time.perf_counter_ns()
                     await self.outputs.send_outputs()
+                    if self.outputs.statistics[PROFILING].get("active"):
+                        await self.update_profiling()
+                    self.record_cycle()
                     self.update_statistics()
                     await self.outputs.send_statistics()
 
-                    while not self.camera.is_display_complete():
-                        await asyncio.sleep(0.01)
-
-                    self.update_status(new_image=(not self.outputs.status[NEW_IMAGE]))
+                    await self.publish_display(self.camera.get_display_future())
                     await self.outputs.send_status()
+                    self.latency.record(CYCLE_STAGE, time.perf_counter_ns() - cycle_start_ns)
 
                     logger.debug("Finished camera display processing")
 
@@ -142,6 +315,266 @@ class VisionController:
                     self.update_status(run=False, trigger_error=True)
                     await self.outputs.send_status()
 
+    async def publish_display(self, display_future: concurrent.futures.Future) -> None:
+        """
+        Wait for the display of a frame and publish it: send the frame and toggle the new image flag,
+        or flag a display error if it did not complete in time. The status is not sent.
+
+        :param display_future: Future of the display of the frame
+        """
+
+        rendered = await self.wait_display_complete(display_future)
+        if rendered is None:
+            self.update_status(display_error=True)
+        elif rendered:
+            await self.send_rendered_frame()
+            self.update_status(new_image=(not self.outputs.status[NEW_IMAGE]))
+
+    async def wait_display_complete(self, display_future: concurrent.futures.Future = None) -> bool | None:
+        """
+        Wait for the display of a frame to complete.
+
+        The display future is bridged into the event loop, so the wait ends as soon as the display
+        finishes. The display itself is shielded from the timeout: it keeps running, but the caller
+        stops waiting for it.
+
+        :param display_future: Future of the display to wait for, the last executed frame by default
+        :return: True if the frame was rendered, False if it was dropped in favour of a newer frame,
+            None if the display did not complete within the display timeout
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        if display_future is None:
+            display_future = self.camera.get_display_future()
+        if display_future is None:
+            return True
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(display_future)), self.display_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Display in camera {self.name} did not complete within {self.display_timeout} s")
+            return None
+        except Exception:
+            # Display errors are logged by the camera, the frame is still considered displayed
+            pass
+
+        return True
+
+    async def start_continuous(self, rate: float = 0.0) -> None:
+        """
+        Start triggering the camera continuously, without a trigger handshake per frame.
+
+        :param rate: Frames per second, or 0 to trigger as fast as processing and display allow
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        if rate < 0:
+            raise ValueError(f"Invalid continuous rate: {rate}")
+
+        self.continuous_rate = rate
+        if self.continuous_task is None or self.continuous_task.done():
+            self.continuous = True
+            self.continuous_task = asyncio.get_event_loop().create_task(self.run_continuous())
+            logger.info(f"Camera {self.name} continuous mode started at {rate or 'maximum'} fps")
+
+        self.outputs.statistics[CONTINUOUS] = True
+        await self.outputs.send_statistics()
+
+    async def stop_continuous(self) -> None:
+        """
+        Stop the continuous mode after the current cycle and publish its last frame.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        self.continuous = False
+        if self.continuous_task is not None:
+            await self.continuous_task
+            self.continuous_task = None
+            logger.info(f"Camera {self.name} continuous mode stopped")
+
+        self.outputs.statistics[CONTINUOUS] = False
+        await self.outputs.send_statistics()
+
+    async def run_continuous(self) -> None:
+        """
+        Trigger the camera in a loop until the continuous mode is stopped.
+
+        Cycles only start while the camera is ready, so single triggers, program changes and error
+        resets from the PLC or the frontend keep their handshakes and pause the loop until they are
+        done. With a rate, cycles are started at most at that rate, without catching up missed ones.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        loop = asyncio.get_event_loop()
+        next_cycle = loop.time()
+        previous_display = None
+
+        try:
+            await loop.run_in_executor(self.executor, self.camera.set_prefetch, True)
+            while self.continuous:
+                if self.continuous_rate > 0:
+                    delay = next_cycle - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    next_cycle = max(next_cycle + 1 / self.continuous_rate, loop.time())
+
+                async with self.lock:
+                    ready = self.outputs.status[READY]
+                    if ready:
+                        previous_display = await self.continuous_cycle(previous_display)
+
+                if not ready:
+                    await asyncio.sleep(CONTINUOUS_RETRY_INTERVAL)
+                else:
+                    # Let the other requests take the lock between cycles
+                    await asyncio.sleep(0)
+
+            if previous_display is not None:
+                async with self.lock:
+                    await self.publish_display(previous_display)
+                    await self.outputs.send_status()
+
+        except Exception as e:
+            logger.error(f"Camera {self.name} continuous mode failed: {e}")
+        finally:
+            await loop.run_in_executor(self.executor, self.camera.set_prefetch, False)
+            self.continuous = False
+
+    async def continuous_cycle(self, previous_display: concurrent.futures.Future) -> concurrent.futures.Future:
+        """
+        Run one cycle of the continuous mode.
+
+        Applies backpressure: the display of the previous frame runs while this frame is processed,
+        and must finish before the next frame is acquired, so at most one display is in flight and
+        no frame is dropped because the display fell behind.
+
+        :param previous_display: Future of the display of the previous frame, or None
+        :return: Future of the display of this frame, or the previous one if the cycle failed
+        """
+
+        cycle_start_ns = time.perf_counter_ns()
+        self.update_status(run=True, ready=False)
+        await self.outputs.send_status()
+
+        values = await asyncio.get_event_loop().run_in_executor(self.executor, self.execute_program)
+
+        if values is None:
+            self.update_status(run=False, trigger_error=True)
+            await self.outputs.send_status()
+            return previous_display
+
+        display_future = self.camera.get_display_future()
+        self.set_output_registers(values)
+        await self.outputs.send_outputs()
+
+        if previous_display is not None:
+            await self.publish_display(previous_display)
+
+        if self.outputs.statistics[PROFILING].get("active"):
+            await self.update_profiling()
+        self.record_cycle()
+        self.update_statistics()
+        await self.outputs.send_statistics()
+
+        self.update_status(run=False, ready=True)
+        await self.outputs.send_status()
+        self.latency.record(CYCLE_STAGE, time.perf_counter_ns() - cycle_start_ns)
+
+        return display_future
+
+    def record_cycle(self) -> None:
+        """
+        Record the completion of a cycle for the frame rate.
+        """
+
+        self.cycle_times.append(time.perf_counter())
+
+    def get_fps(self) -> float:
+        """
+        Get the frame rate achieved over the last completed cycles.
+
+        :return: Frames per second, or 0 if less than two cycles were completed
+        """
+
+        if len(self.cycle_times) < 2:
+            return 0.0
+
+        elapsed_time = self.cycle_times[-1] - self.cycle_times[0]
+        return (len(self.cycle_times) - 1) / elapsed_time if elapsed_time > 0 else 0.0
+
+    async def send_rendered_frame(self) -> None:
+        """
+        Send the last rendered frame to the frontend, unless it was already sent.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            encoded_frame = await asyncio.get_event_loop().run_in_executor(
+                self.executor, self.camera.get_encoded_frame
+            )
+            if encoded_frame is None:
+                return
+
+            frame_id, data = encoded_frame
+            if frame_id != self.sent_frame_id:
+                await self.outputs.send_frame(frame_id, data)
+                self.sent_frame_id = frame_id
+        except Exception as e:
+            logger.error(f"Failed to send frame of camera {self.name}: {e}")
+
+    async def send_full_frame(self, region: list[int] = None) -> bool:
+        """
+        Encode the last rendered frame at full resolution and send it to the frontend.
+
+        :param region: Row and column of the top left and bottom right corners to crop the frame to,
+            or None for the whole frame
+        :return: True if a frame was sent, False if no frame could be encoded
+        """
+
+        full_frame = await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.camera.get_full_frame, region
+        )
+        if full_frame is None:
+            return False
+
+        frame_id, data = full_frame
+        await self.outputs.send_frame(frame_id, data, FULL_RENDITION, region)
+        return True
+
+    async def get_history(self) -> list[dict]:
+        """
+        Get the frame id, time, results and timings of every frame in the camera history.
+
+        :return: Summary of the frames in the history, oldest first
+        """
+
+        return await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.get_history)
+
+    async def send_history_frame(self, frame_id: int = None, timestamp: float = None, raw: bool = False) -> dict | None:
+        """
+        Send a frame of the camera history to the frontend, by frame id or time.
+
+        :param frame_id: Identifier of the frame
+        :param timestamp: Time in seconds since the epoch, used when no frame id is given
+        :param raw: If True, the raw image is sent instead of the overlay
+        :return: Summary of the frame sent, or None if the frame is not in the history
+        """
+
+        history_frame = await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.camera.get_history_frame, frame_id, timestamp, raw
+        )
+        if history_frame is None:
+            return None
+
+        summary, data = history_frame
+        await self.outputs.send_frame(summary["frame_id"], data, RAW_RENDITION if raw else HISTORY_RENDITION)
+        return summary
+
     async def camera_program_change(self) -> None:
         """
         Change the camera program.
@@ -163,36 +596,197 @@ class VisionController:
 
                 await self.outputs.send_status()
 
-    def process_camera_outputs(self) -> None:
+    def execute_program(self) -> list | None:
+        """
+        Execute the active program and convert its outputs to register values. Runs in the executor
+        thread, so the conversion of large outputs never blocks the event loop.
+
+        :return: Value of each register taken by the outputs, or None if the program failed
+        """
+
+        program_number = self.outputs.program_number_acknowledge
+        if not self.camera.execute_program():
+            self.production.record_error(program_number)
+            return None
+
+        outputs = self.camera.get_program_output()
+        self.production.record(
+            program_number, get_verdict(outputs, self.program_output_variables), self.camera.get_run_time()
+        )
+        return self.output_layout.convert(outputs)
+
+    def execute_burst(self) -> tuple[list, dict] | None:
+        """
+        Execute a burst of frames and aggregate their outputs, in the executor thread.
+
+        The program outputs are those of the best frame, followed by the mean of each numeric output,
+        the number of frames, OK and NOK frames, the index of the best frame and the burst run time.
+
+        :return: Value of each register taken by the outputs and the burst statistics, or None if the
+            burst failed
+        """
+
+        program_number = self.outputs.program_number_acknowledge
+        frames = self.camera.execute_burst(self.burst_size)
+        if not frames:
+            self.production.record_error(program_number)
+            return None
+
+        best_outputs, burst_outputs = aggregate_burst(frames, self.program_output_variables)
+        self.production.record(
+            program_number,
+            get_verdict(best_outputs, self.program_output_variables),
+            sum(frame["run_time"] for frame in frames),
+        )
+        statistics = {
+            "size": len(frames),
+            "frame_ids": [frame["frame_id"] for frame in frames],
+            "run_times": [frame["run_time"] for frame in frames],
+            "best_frame": burst_outputs[-2][0],
+        }
+        return self.output_layout.convert(list(best_outputs) + burst_outputs), statistics
+
+    def set_output_registers(self, values: list) -> None:
+        """
+        Update the output registers with converted values.
+
+        :param values: Value of each register taken by the outputs, in register order
+        """
+
+        for register, value in zip(self.outputs.outputs_register, values):
+            register.set_value(value)
+
+    def update_output_layout(self) -> None:
+        """
+        Lay out the program outputs in the output registers, followed by the burst outputs when
+        bursts are enabled, and publish the variable of each register.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        variables = list(self.program_output_variables)
+        if self.burst_size > 1:
+            variables += get_burst_variables(self.program_output_variables)
+
+        self.output_layout = OutputLayout(variables, len(self.outputs.outputs_variables))
+        if self.output_layout.get_dropped_outputs():
+            logger.warning(
+                f"Camera {self.name} has room for {len(self.output_layout.blocks)} of {len(variables)} outputs"
+            )
+
+        self.outputs.outputs_variables[:] = self.output_layout.register_variables
+
+    async def set_burst_size(self, burst_size: int) -> None:
+        """
+        Set the number of frames processed per trigger and publish the burst output variables.
+
+        :param burst_size: Number of frames per trigger, 1 for single frames
+        """
+
+        if burst_size < 1:
+            raise ValueError(f"Invalid burst size: {burst_size}")
+
+        async with self.lock:
+            self.burst_size = burst_size
+            self.update_output_layout()
+            self.outputs.statistics[BURST] = {}
+            await self.outputs.send_outputs_variables()
+            await self.outputs.send_statistics()
+
+    async def run_production_updates(self) -> None:
+        """
+        Send the production statistics to the frontend and the PLC at a fixed rate, independent of
+        the trigger rate.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        while True:
+            try:
+                await asyncio.sleep(PRODUCTION_UPDATE_INTERVAL)
+                self.outputs.production = self.production.get_summary()
+                await self.outputs.send_production()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to send the production statistics of camera {self.name}: {e}")
+
+    async def run_latency_updates(self) -> None:
+        """
+        Read the latency statistics of the camera at a fixed rate, independent of the trigger rate, so
+        the triggers don't pay for an executor hop, and a round-trip to a camera worker, on every frame.
+        They are only read when frames were executed since the last read, and sent with the statistics
+        of the next cycle.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        while True:
+            try:
+                await asyncio.sleep(LATENCY_UPDATE_INTERVAL)
+                frame_id = self.camera.get_frame_id()
+                if frame_id != self.latency_frame_id:
+                    self.camera_latency = await asyncio.get_event_loop().run_in_executor(
+                        self.executor, self.camera.get_latency_statistics
+                    )
+                    self.latency_frame_id = frame_id
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to read the latency statistics of camera {self.name}: {e}")
+
+    async def start_profiling(self, window: int) -> bool:
+        """
+        Profile the lines of the camera procedures over the next triggers.
+
+        The procedures run from instrumented copies of their programs until the window is complete,
+        then the report is sent to the frontend and written to the profiles directory.
+
+        :param window: Number of triggers to profile
+        :return: True if the profiling started
+        """
+
+        if window < 1:
+            raise ValueError(f"Invalid profiling window: {window}")
+
+        async with self.lock:
+            started = await asyncio.get_event_loop().run_in_executor(
+                self.executor, self.camera.start_profiling, window
+            )
+            await self.update_profiling()
+            await self.outputs.send_statistics()
+
+        return started
+
+    async def stop_profiling(self) -> None:
         """
-        Process the outputs received from the camera and update output registers.
+        Stop the profiling before its window is complete, and send the report of the triggers profiled.
         """
 
-        program_output = self.camera.get_program_output()
-        for i, output in enumerate(program_output):
-            output = self.get_output_value(output, self.outputs.outputs_variables[i][1])
-            self.outputs.outputs_register[i].set_value(output)
+        async with self.lock:
+            await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.stop_profiling)
+            await self.update_profiling()
+            await self.outputs.send_statistics()
 
-    def get_output_value(self, output, var_type: str):
+    async def update_profiling(self) -> None:
+        """
+        Read the profiling status of the camera, and send the report when a window has completed.
         """
-        Determine the correct output value based on its type.
 
-        :param output: The output value from the camera program
-        :param var_type: The type of the output variable (int, float, string)
-        :return: Processed output value
+        was_active = self.outputs.statistics[PROFILING].get("active", False)
+        status = await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.get_profiling_status)
+        self.outputs.statistics[PROFILING] = status
+
+        if was_active and not status.get("active", False):
+            await self.send_profiling_report()
+
+    async def send_profiling_report(self) -> None:
+        """
+        Send the ranked line times of the active or last profiling window to the frontend.
         """
 
-        if len(output) == 1:
-            return output[0]
-        elif len(output) == 0:
-            if var_type == "int":
-                return 0
-            elif var_type == "float":
-                return 0.0
-            elif var_type == "string":
-                return ""
-            else:
-                return None
+        report = await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.get_profiling_report)
+        await self.outputs.send_profiling(report)
 
     def update_status(self, **kwargs) -> None:
         """
@@ -212,6 +806,54 @@ class VisionController:
         self.outputs.statistics[MIN_RUN_TIME] = self.camera.get_min_run_time()
         self.outputs.statistics[RUN_TIME] = self.camera.get_run_time()
         self.outputs.statistics[MAX_RUN_TIME] = self.camera.get_max_run_time()
+        self.outputs.statistics[OVERLAP] = self.camera.get_overlap()
+        self.outputs.statistics[DROPPED_FRAMES] = self.camera.get_dropped_frames()
+        self.outputs.statistics[SKIPPED_RENDERS] = self.camera.get_skipped_renders()
+        self.outputs.statistics[SPEED_UP] = self.camera.get_speed_up()
+        self.outputs.statistics[PROGRAM_STATISTICS] = self.camera.get_program_statistics()
+        self.outputs.statistics[LATENCY] = self.merge_latency(
+            self.camera_latency, self.latency.get_summary()
+        )
+        self.outputs.statistics[FPS] = self.get_fps()
+
+    def merge_latency(self, camera_latency: dict, controller_stages: dict) -> dict:
+        """
+        Merge the camera latency statistics with the controller stages.
+
+        :param camera_latency: Latency statistics of the camera ('stages' and 'procedures')
+        :param controller_stages: Latency summary of the controller stages
+        :return: Latency statistics with the stages of both the camera and the controller
+        """
+
+        return {
+            "stages": {**camera_latency.get("stages", {}), **controller_stages},
+            "procedures": camera_latency.get("procedures", {}),
+        }
+
+    async def get_latency_window(self, seconds: float) -> dict:
+        """
+        Get the latency statistics of the camera and the controller over a rolling time window.
+
+        :param seconds: Length of the window in seconds
+        :return: Latency statistics of the window
+        """
+
+        camera_latency = await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.camera.get_latency_window, seconds
+        )
+        return self.merge_latency(camera_latency, self.latency.get_window_summary(seconds))
+
+    async def reset_latency_statistics(self) -> None:
+        """
+        Clear the latency histograms of the camera and the controller.
+        """
+
+        async with self.lock:
+            await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.reset_latency_statistics)
+            self.latency.reset()
+            self.camera_latency = {}
+            self.update_statistics()
+            await self.outputs.send_statistics()
 
     def reset_camera_status(self) -> None:
         """
@@ -222,6 +864,7 @@ class VisionController:
         self.outputs.status[PROGRAM_CHANGE_ACKNOWLEDGE] = False
         self.outputs.status[TRIGGER_ERROR] = False
         self.outputs.status[PROGRAM_CHANGE_ERROR] = False
+        self.outputs.status[DISPLAY_ERROR] = False
         self.outputs.status[RUN] = False
         self.outputs.status[READY] = True
 
@@ -253,12 +896,35 @@ class VisionController:
         self.outputs.statistics[MIN_RUN_TIME] = 0
         self.outputs.statistics[RUN_TIME] = 0
         self.outputs.statistics[MAX_RUN_TIME] = 0
+        self.outputs.statistics[OVERLAP] = 0
+        self.outputs.statistics[SPEED_UP] = 1.0
+        self.outputs.statistics[PROGRAM_STATISTICS] = {}
 
         self.reset_variable_list(self.inputs.inputs_variables)
         self.reset_register_values(self.inputs.inputs_register)
         self.reset_variable_list(self.outputs.outputs_variables)
         self.reset_register_values(self.outputs.outputs_register)
 
+    def load_camera_program(self, program_number: int, input_values: list[int]) -> tuple | None:
+        """
+        Set the active program of the camera and its inputs. Runs in the executor thread, so the
+        program change and the round-trips to a camera worker never block the event loop.
+
+        :param program_number: The new program number to be set
+        :param input_values: The values of the input registers, set as the program inputs
+        :return: The input and output variables of the program, or None if the program was not set
+        """
+
+        if not self.camera.set_active_program(program_number):
+            return None
+
+        program_input_variables = self.camera.get_program_input_variables()
+        program_output_variables = self.camera.get_program_output_variables()
+        for i in range(len(program_input_variables)):
+            self.camera.set_program_input(i, input_values[i])
+
+        return program_input_variables, program_output_variables
+
     async def change_camera_program(self, program_number: int) -> bool:
         """
         Change the camera program and reset related variables.
@@ -266,22 +932,35 @@ class VisionController:
         :param program_number: The new program number to be set
         """
 
-        if not self.camera.set_active_program(program_number):
+        logger = LoggerManager.get_logger(__name__)
+
+        input_values = [register.value for register in self.inputs.inputs_register]
+        try:
+            program = await asyncio.wait_for(
+                asyncio.get_event_loop().run_in_executor(
+                    self.executor, self.load_camera_program, program_number, input_values
+                ),
+                PROGRAM_CHANGE_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                f"Camera {self.name} did not change to program {program_number} within {PROGRAM_CHANGE_TIMEOUT} s"
+            )
             return False
+        if program is None:
+            return False
+        program_input_variables, program_output_variables = program
+
         self.outputs.program_number_acknowledge = self.camera.get_program_number()
 
         self.reset_camera_variables()
+        self.outputs.statistics[PROGRAM_CHANGE_TIME] = self.camera.get_program_change_time()
 
-        program_input_variables = self.camera.get_program_input_variables()
         for index, variable in program_input_variables.items():
             self.inputs.inputs_variables[index] = variable
 
-        program_output_variables = self.camera.get_program_output_variables()
-        for index, variable in program_output_variables.items():
-            self.outputs.outputs_variables[index] = variable
-
-        for i in range(len(program_input_variables)):
-            self.camera.set_program_input(i, self.inputs.inputs_register[i].value)
+        self.program_output_variables = [program_output_variables[index] for index in sorted(program_output_variables)]
+        self.update_output_layout()
 
         await self.outputs.send_program_number_acknowledge()
         await self.inputs.send_inputs_variables()
@@ -291,3 +970,28 @@ class VisionController:
         await self.outputs.send_statistics()
 
         return True
+
+    async def close(self) -> None:
+        """
+        Stop the continuous mode, the production and latency updates, and release the camera: its worker
+        process and shared memory block when it runs in one, its history otherwise.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            if self.continuous:
+                await self.stop_continuous()
+            if self.production_task is not None:
+                self.production_task.cancel()
+                self.production_task = None
+            if self.latency_task is not None:
+                self.latency_task.cancel()
+                self.latency_task = None
+
+            async with self.lock:
+                await asyncio.get_event_loop().run_in_executor(self.executor, self.camera.close)
+            self.executor.shutdown(wait=False)
+            logger.info(f"Camera {self.name} closed")
+        except Exception as e:
+            logger.error(f"Failed to close camera {self.name}: {e}")
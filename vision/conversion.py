@@ -0,0 +1,138 @@
+###########EXTERNAL IMPORTS############
+
+import re
+import numpy as np
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+#######################################
+
+# NumPy type of the values of the numeric output types
+OUTPUT_DTYPES = {"int": np.int64, "float": np.float64}
+
+# Register value of an output without value, by type
+DEFAULT_VALUES = {"int": 0, "float": 0.0, "string": ""}
+
+# Array output types, the element type and the number of registers of the block, such as float[8]
+ARRAY_TYPE_PATTERN = re.compile(r"^(\w+)\[(\d+)\]$")
+
+
+def parse_output_type(variable_type: str) -> tuple[str, int]:
+    """
+    Splits an output type into its element type and its array length.
+
+    Args:
+        variable_type (str): Type of the output, such as float or float[8].
+
+    Returns:
+        tuple: The element type, and the number of elements of an array output or 0 for a scalar.
+    """
+
+    match = ARRAY_TYPE_PATTERN.match(variable_type)
+    if match:
+        return match.group(1), int(match.group(2))
+    return variable_type, 0
+
+
+def to_array(value, element_type: str) -> np.ndarray:
+    """
+    Converts a whole HTuple into a one dimensional array of the element type.
+
+    Numeric tuples are converted by NumPy in a single pass. Elements of a numeric tuple that are
+    not numbers, such as an empty string returned for a missing value, are converted to the default
+    value of the type. Tuples of other types are returned as object arrays.
+
+    Args:
+        value (ha.HTupleType): The tuple, or a single value.
+        element_type (str): Type of the elements: int, float or string.
+
+    Returns:
+        np.ndarray: The converted elements.
+    """
+
+    values = value if isinstance(value, (list, tuple, np.ndarray)) else [value]
+    dtype = OUTPUT_DTYPES.get(element_type)
+    if dtype is None:
+        return np.array(values, dtype=object).reshape(-1)
+
+    try:
+        return np.asarray(values, dtype=dtype).reshape(-1)
+    except (TypeError, ValueError):
+        default = DEFAULT_VALUES[element_type]
+        return np.array(
+            [item if isinstance(item, (int, float, np.number)) else default for item in values], dtype=dtype
+        )
+
+
+class OutputLayout:
+    """
+    Layout of the outputs of a program in the output registers.
+
+    A scalar output takes one register, its first element, or the default value of its type when
+    the tuple is empty. An array output, declared with a type such as float[8], takes a contiguous
+    block of registers: the first elements of the tuple, padded with the default value of the type.
+    Outputs that do not fit in the registers are left out.
+
+    Attributes:
+        variables (list[list[str]]): Name and type of each output, in order.
+        blocks (list[tuple]): Register offset, number of registers, element type and whether it is
+            an array, for each output laid out.
+        register_variables (list[list[str]]): Name and element type of each register, the elements of
+            an array output named name[index], None for the registers left free.
+        used_registers (int): Number of registers taken by the outputs.
+    """
+
+    def __init__(self, variables: list[list[str]], register_count: int):
+
+        self.variables = variables
+        self.blocks: list[tuple[int, int, str, bool]] = []
+        self.register_variables: list[list[str]] = [None for _ in range(register_count)]
+
+        offset = 0
+        for name, variable_type in variables:
+            element_type, length = parse_output_type(variable_type)
+            if offset + max(length, 1) > register_count:
+                break
+
+            if length:
+                for index in range(length):
+                    self.register_variables[offset + index] = [f"{name}[{index}]", element_type]
+            else:
+                self.register_variables[offset] = [name, variable_type]
+
+            self.blocks.append((offset, max(length, 1), element_type, length > 0))
+            offset += max(length, 1)
+
+        self.used_registers = offset
+
+    def get_dropped_outputs(self) -> int:
+        """Returns the number of outputs left out because they do not fit in the registers."""
+
+        return len(self.variables) - len(self.blocks)
+
+    def convert(self, outputs: list) -> list:
+        """
+        Converts the outputs of a frame to the values of the registers they take.
+
+        Each output is converted with a single NumPy conversion of its whole tuple.
+
+        Args:
+            outputs (list[ha.HTupleType]): Value of each output, in the order of the variables.
+
+        Returns:
+            list: Value of each register taken by the outputs, as Python numbers and strings.
+        """
+
+        values = []
+        for (_, length, element_type, is_array), output in zip(self.blocks, outputs):
+            elements = to_array(output if output is not None else [], element_type)[:length].tolist()
+            default = DEFAULT_VALUES.get(element_type)
+
+            if is_array:
+                values.extend(elements + [default] * (length - len(elements)))
+            else:
+                values.append(elements[0] if elements else default)
+
+        return values
@@ -8,6 +8,7 @@ import logging
 #############LOCAL IMPORTS#############
 
 from vision.data.variables import *
+from vision.frames import pack_frame, PREVIEW_RENDITION
 from util.debug import LoggerManager
 
 #######################################
@@ -21,6 +22,7 @@ class VisionOutputs:
         device_name (str): The name of the camera.
         status (dict): Status flags for the camera.
         statistics (dict): Runtime statistics.
+        production (dict): Parts per minute, yield and utilization over the production windows.
         program_number_acknowledge (int): Acknowledged program number.
         outputs_variables (List[List[str]]): A list of output variables.
         outputs_register (List[Variable]): A list of register variables to handle camera output.
@@ -38,9 +40,28 @@ class VisionOutputs:
             TRIGGER_ERROR: False,
             PROGRAM_CHANGE_ERROR: False,
             NEW_IMAGE: False,
+            DISPLAY_ERROR: False,
         }
 
-        self.statistics = {MIN_RUN_TIME: 0.0, RUN_TIME: 0.0, MAX_RUN_TIME: 0.0}
+        self.statistics = {
+            MIN_RUN_TIME: 0.0,
+            RUN_TIME: 0.0,
+            MAX_RUN_TIME: 0.0,
+            OVERLAP: 0.0,
+            DROPPED_FRAMES: 0,
+            SKIPPED_RENDERS: 0,
+            STARTUP_TIME: 0.0,
+            PROGRAM_CHANGE_TIME: 0.0,
+            SPEED_UP: 1.0,
+            PROGRAM_STATISTICS: {},
+            LATENCY: {},
+            FPS: 0.0,
+            CONTINUOUS: False,
+            BURST: {},
+            PROFILING: {},
+        }
+
+        self.production: dict = {}
 
         self.program_number_acknowledge = 0
         self.outputs_variables: list[list[str]] = [None for _ in range(register_size)]
@@ -78,6 +99,55 @@ class VisionOutputs:
             type="status", section="statistics", value=self.statistics
         )
 
+    async def send_latency_window(self, value: dict) -> None:
+        """Sends the latency statistics of a rolling time window to the queue."""
+
+        await self.send_message(type="status", section=LATENCY_WINDOW_SECTION, value=value)
+
+    async def send_frame(
+        self, frame_id: int, data: bytes, rendition: str = PREVIEW_RENDITION, region: list[int] = None
+    ) -> None:
+        """
+        Sends an encoded frame as a binary message to the frontend queue.
+
+        Frames are only sent to the first update queue, the frontend, as the other peripherals
+        have no use for images.
+
+        Args:
+            frame_id (int): Identifier of the frame.
+            data (bytes): JPEG encoded image.
+            rendition (str): Rendition of the frame, preview or full.
+            region (list[int]): Crop region of a full rendition, or None for the whole image.
+
+        Raises:
+            RuntimeError: If the update outputs queue is not set.
+        """
+
+        if len(self.update_outputs_queues) == 0:
+            raise RuntimeError("Update outputs queues are not set.")
+
+        await self.update_outputs_queues[0].put(pack_frame(self.device_name, frame_id, data, rendition, region))
+
+    async def send_history(self, value: list[dict]) -> None:
+        """Sends the summary of the frames in the history to the queue."""
+
+        await self.send_message(type="status", section=HISTORY_SECTION, value=value)
+
+    async def send_history_frame(self, value: dict) -> None:
+        """Sends the results and timings of a frame read from the history to the queue."""
+
+        await self.send_message(type="status", section=HISTORY_FRAME_SECTION, value=value)
+
+    async def send_production(self) -> None:
+        """Sends the production statistics to the queue."""
+
+        await self.send_message(type="status", section=PRODUCTION_SECTION, value=self.production)
+
+    async def send_profiling(self, value: dict) -> None:
+        """Sends the ranked line times of a profiling window to the queue."""
+
+        await self.send_message(type="status", section=PROFILING_SECTION, value=value)
+
     async def send_program_number_acknowledge(self) -> None:
         """Sends the acknowledged program number to the queue."""
 
@@ -18,6 +18,15 @@ PROGRAM_NUMBER_ACKNOWLEDGE_SECTION = "program_number_acknowledge"
 STATISTICS_SECTION = "statistics"
 OUTPUTS_SECTION = "outputs_register"
 OUTPUTS_VARIABLES_SECTION = "outputs_variables"
+LATENCY_WINDOW_SECTION = "latency_window"
+FRAME_SECTION = "frame"
+HISTORY_SECTION = "history"
+HISTORY_FRAME_SECTION = "history_frame"
+CONTINUOUS_SECTION = "continuous"
+BURST_SECTION = "burst"
+VIEWER_SECTION = "viewer"
+PROFILING_SECTION = "profiling"
+PRODUCTION_SECTION = "production"
 
 # Control variables
 TRIGGER = "trigger"
@@ -32,11 +41,32 @@ PROGRAM_CHANGE_ACKNOWLEDGE = "program_change_acknowledge"
 TRIGGER_ERROR = "trigger_error"
 PROGRAM_CHANGE_ERROR = "program_change_error"
 NEW_IMAGE = "new_image"
+DISPLAY_ERROR = "display_error"
 
 # Statistics variables
 MIN_RUN_TIME = "min_run_time"
 RUN_TIME = "run_time"
 MAX_RUN_TIME = "max_run_time"
+OVERLAP = "overlap"
+DROPPED_FRAMES = "dropped_frames"
+SKIPPED_RENDERS = "skipped_renders"
+STARTUP_TIME = "startup_time"
+PROGRAM_CHANGE_TIME = "program_change_time"
+SPEED_UP = "speed_up"
+PROGRAM_STATISTICS = "program_statistics"
+LATENCY = "latency"
+FPS = "fps"
+CONTINUOUS = "continuous"
+BURST = "burst"
+PROFILING = "profiling"
+
+# Latency stages
+ACQUISITION_STAGE = "acquisition"
+PROCESSING_STAGE = "processing"
+DISPLAY_STAGE = "display"
+HANDSHAKE_STAGE = "handshake"
+CYCLE_STAGE = "cycle"
+QUEUE_STAGE = "queue"
 
 # Message fields
 PERIPHERAL_KEY = "peripheral"
@@ -48,6 +78,10 @@ DATA_KEY = "data"
 VALUE_KEY = "value"
 VALUE_TYPE_KEY = "value_type"
 VALUE_INDEX_KEY = "index"
+FRAME_ID_KEY = "frame_id"
+FORMAT_KEY = "format"
+RENDITION_KEY = "rendition"
+REGION_KEY = "region"
 
 
 class VariableType(Enum):
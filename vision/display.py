@@ -0,0 +1,142 @@
+###########EXTERNAL IMPORTS############
+
+import concurrent.futures
+import threading
+import time
+from typing import Callable
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+#######################################
+
+
+class DisplayScheduler:
+    """
+    Latest-wins scheduler for the display jobs of a camera.
+
+    At most one render is in flight and at most one is pending. When a new frame is submitted
+    while another one is already pending, the pending frame is superseded: it is dropped without
+    being rendered and its future completes with False. This keeps the operator view showing the
+    most recent frame and bounds the memory held by display jobs when triggers arrive faster than
+    the display procedures can render.
+
+    Rendering is demand-driven: while nobody watches the camera, frames are skipped without being
+    rendered, or rendered at most `headless_rate` times per second. A skipped frame completes with
+    False, like a dropped one, and the next frame submitted after a viewer subscribes is rendered.
+
+    The scheduler only decides what gets rendered. Frames are recorded in the history by the camera
+    before they are submitted, so dropped and skipped frames are kept there too, without overlay.
+
+    Attributes:
+        render (Callable): Function that renders a frame, called with the submitted arguments.
+        executor (concurrent.futures.Executor): Executor running the renders, a single worker pool by
+            default or the lane of the camera.
+        dropped_frames (int): Number of frames dropped since the scheduler was created.
+        watched (bool): Whether a viewer is subscribed to the camera.
+        headless_rate (float): Renders per second while nobody watches, 0 to skip every frame.
+        skipped_renders (int): Number of frames skipped because nobody was watching.
+    """
+
+    def __init__(self, render: Callable, executor: concurrent.futures.Executor = None):
+
+        self.render = render
+        self.executor = executor if executor else concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.running = False
+        self.pending: tuple[tuple, concurrent.futures.Future] = None
+        self.dropped_frames = 0
+        self.watched = True
+        self.headless_rate = 0.0
+        self.last_headless_render = 0.0
+        self.skipped_renders = 0
+
+    def set_demand(self, watched: bool, headless_rate: float) -> None:
+        """
+        Sets whether a viewer watches the camera, and the render rate while nobody does.
+
+        Args:
+            watched (bool): Whether a viewer is subscribed to the camera.
+            headless_rate (float): Renders per second while nobody watches, 0 to skip every frame.
+        """
+
+        with self.lock:
+            self.watched = watched
+            self.headless_rate = headless_rate
+
+    def is_wanted(self) -> bool:
+        """Returns True if the next frame should be rendered, must be called with the lock held."""
+
+        if self.watched:
+            return True
+        if self.headless_rate <= 0:
+            return False
+
+        now = time.monotonic()
+        if now - self.last_headless_render < 1.0 / self.headless_rate:
+            return False
+        self.last_headless_render = now
+        return True
+
+    def submit(self, *args) -> concurrent.futures.Future:
+        """
+        Submits a frame to be rendered.
+
+        Args:
+            *args: Arguments passed to the render function.
+
+        Returns:
+            concurrent.futures.Future: Completes with True once the frame is rendered, with False if
+                it is dropped in favour of a newer frame or skipped because nobody watches, or with
+                the exception raised by the render.
+        """
+
+        future = concurrent.futures.Future()
+        superseded: concurrent.futures.Future = None
+
+        with self.lock:
+            if not self.is_wanted():
+                self.skipped_renders += 1
+                future.set_result(False)
+                return future
+            if self.running:
+                if self.pending is not None:
+                    superseded = self.pending[1]
+                    self.dropped_frames += 1
+                self.pending = (args, future)
+            else:
+                self.running = True
+                self.executor.submit(self.run, args, future)
+
+        if superseded is not None:
+            superseded.set_result(False)
+
+        return future
+
+    def run(self, args: tuple, future: concurrent.futures.Future) -> None:
+        """Renders the submitted frame and then the pending one, until there is nothing pending."""
+
+        while True:
+            try:
+                self.render(*args)
+                future.set_result(True)
+            except Exception as e:
+                future.set_exception(e)
+
+            with self.lock:
+                if self.pending is None:
+                    self.running = False
+                    return
+                args, future = self.pending
+                self.pending = None
+
+    def get_dropped_frames(self) -> int:
+        """Returns the number of frames dropped since the scheduler was created."""
+
+        return self.dropped_frames
+
+    def get_skipped_renders(self) -> int:
+        """Returns the number of frames skipped because nobody was watching."""
+
+        return self.skipped_renders
@@ -0,0 +1,326 @@
+###########EXTERNAL IMPORTS############
+
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.data.variables import *
+from util.debug import LoggerManager
+from util.histogram import LatencyStatistics
+
+#######################################
+
+# Fewest threads of the shared pool, enough for the acquisition and the render of two cameras to overlap
+MIN_SHARED_WORKERS = 4
+
+# Threads of the pool shared by the cameras of a process
+DEFAULT_SHARED_WORKERS = max(os.cpu_count() or 1, MIN_SHARED_WORKERS)
+
+# HALCON system parameter limiting the operator parallelism of the calling thread
+HALCON_THREAD_PARAMETER = "tsp_thread_num"
+
+
+class ResourceBudget:
+    """
+    CPU budget of a camera.
+
+    Attributes:
+        workers (int): Tasks of the camera running at the same time on the shared pool, or None for
+            as many as the pool has threads.
+        cpus (list[int]): CPUs the threads running the camera are pinned to, or None to not pin them.
+        halcon_threads (int): Threads each HALCON operator of the camera may use, or None to keep
+            the HALCON default.
+    """
+
+    def __init__(self, workers: int = None, cpus: list[int] = None, halcon_threads: int = None):
+
+        if workers is not None and workers < 1:
+            raise ValueError("A camera needs at least one worker")
+        if halcon_threads is not None and halcon_threads < 1:
+            raise ValueError("HALCON needs at least one thread")
+
+        self.workers = workers
+        self.cpus = list(cpus) if cpus else None
+        self.halcon_threads = halcon_threads
+
+    def __repr__(self) -> str:
+
+        return f"ResourceBudget(workers={self.workers}, cpus={self.cpus}, halcon_threads={self.halcon_threads})"
+
+
+thread_settings = threading.local()
+
+# CPU affinity and HALCON operator threads of the process, restored for budgets without their own
+default_settings = {"saved": False, "cpus": None, "halcon_threads": None}
+
+
+def save_default_settings() -> None:
+    """Saves the CPU affinity and HALCON operator threads of the process, once, before any budget is applied."""
+
+    logger = LoggerManager.get_logger(__name__)
+
+    if default_settings["saved"]:
+        return
+    default_settings["saved"] = True
+
+    if hasattr(os, "sched_getaffinity"):
+        default_settings["cpus"] = tuple(sorted(os.sched_getaffinity(0)))
+    try:
+        default_settings["halcon_threads"] = int(ha.get_system(HALCON_THREAD_PARAMETER)[0])
+    except Exception as e:
+        logger.warning(f"Failed to read the default HALCON threads: {e}")
+
+
+def apply_thread_settings(budget: ResourceBudget) -> None:
+    """
+    Pins the calling thread to the CPUs of a budget and limits its HALCON operator parallelism.
+
+    Pool threads run tasks of every camera, so a budget without CPUs or HALCON threads restores
+    the process defaults saved by save_default_settings, instead of keeping the settings of the
+    camera that ran before. The settings of each thread are remembered, so applying the budget
+    the thread already runs with costs nothing.
+
+    Args:
+        budget (ResourceBudget): Budget of the camera the thread is about to work for.
+    """
+
+    logger = LoggerManager.get_logger(__name__)
+
+    cpus = tuple(budget.cpus) if budget.cpus else default_settings["cpus"]
+    if cpus and getattr(thread_settings, "cpus", None) != cpus:
+        thread_settings.cpus = cpus
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Failed to pin thread {threading.current_thread().name} to CPUs {list(cpus)}: {e}")
+
+    halcon_threads = budget.halcon_threads or default_settings["halcon_threads"]
+    if halcon_threads and getattr(thread_settings, "halcon_threads", None) != halcon_threads:
+        thread_settings.halcon_threads = halcon_threads
+        try:
+            ha.set_system(HALCON_THREAD_PARAMETER, halcon_threads)
+        except Exception as e:
+            logger.warning(f"Failed to limit HALCON to {halcon_threads} threads: {e}")
+
+
+class CameraLane(concurrent.futures.Executor):
+    """
+    Executor of a camera on the pool shared by every camera of the process.
+
+    Tasks are started in the order they are submitted, at most `workers` of them at a time, so
+    a camera can't take the whole pool from the others. Each task runs with the CPU affinity and
+    HALCON thread settings of the camera, and the time it waited before starting is recorded as
+    the queue stage of the camera latency.
+
+    Tasks running in the lane must not wait for other tasks of the shared pool.
+
+    Attributes:
+        name (str): Name of the camera.
+        budget (ResourceBudget): CPU budget of the camera.
+        pool (concurrent.futures.ThreadPoolExecutor): Pool shared by every camera.
+        workers (int): Tasks running at the same time.
+        latency (LatencyStatistics): Latency statistics of the camera, where queue waits are recorded.
+        queue (collections.deque): Tasks waiting for a free worker.
+        running (int): Tasks started and not finished.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        budget: ResourceBudget,
+        pool: concurrent.futures.ThreadPoolExecutor,
+        workers: int,
+        latency: LatencyStatistics = None,
+    ):
+
+        self.name = name
+        self.budget = budget
+        self.pool = pool
+        self.workers = workers
+        self.latency = latency if latency is not None else LatencyStatistics([QUEUE_STAGE])
+        self.lock = threading.Lock()
+        self.queue: collections.deque = collections.deque()
+        self.running = 0
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Queues a task of the camera.
+
+        Args:
+            fn (Callable): Function to run.
+            *args: Arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            concurrent.futures.Future: Completes with the result of the function.
+        """
+
+        future = concurrent.futures.Future()
+        with self.lock:
+            self.queue.append((fn, args, kwargs, future, time.perf_counter_ns()))
+            self.dispatch()
+        return future
+
+    def dispatch(self) -> None:
+        """Starts queued tasks while the camera has free workers, must be called with the lock held."""
+
+        while self.queue and self.running < self.workers:
+            self.running += 1
+            self.pool.submit(self.run, self.queue.popleft())
+
+    def run(self, task: tuple) -> None:
+        """Runs a task in a thread of the shared pool, then starts the next queued one."""
+
+        fn, args, kwargs, future, submit_time = task
+        try:
+            self.latency.record(QUEUE_STAGE, time.perf_counter_ns() - submit_time)
+            if future.set_running_or_notify_cancel():
+                apply_thread_settings(self.budget)
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.dispatch()
+
+    def get_queued_tasks(self) -> int:
+        """Returns the number of tasks waiting for a free worker."""
+
+        return len(self.queue)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Cancels the queued tasks if requested, the shared pool keeps running for the other cameras."""
+
+        if cancel_futures:
+            with self.lock:
+                while self.queue:
+                    self.queue.popleft()[3].cancel()
+
+
+class ExecutorManager:
+    """
+    Central owner of the threads running camera work in a process.
+
+    Cameras do not create thread pools of their own: acquisitions, renders and parallel searches
+    run in a CameraLane on one pool of bounded size, and the threads driving each camera are
+    created here with the camera budget applied. The thread count of the process no longer grows
+    with the number of cameras and procedures, and the queue wait of each camera is measured.
+
+    Attributes:
+        max_workers (int): Threads of the shared pool.
+        pool (concurrent.futures.ThreadPoolExecutor): Pool shared by every camera, created on first use.
+        lanes (dict[str, CameraLane]): Lane of each camera, by name.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_SHARED_WORKERS):
+
+        self.max_workers = max_workers
+        self.pool: concurrent.futures.ThreadPoolExecutor = None
+        self.lanes: dict[str, CameraLane] = {}
+        self.lock = threading.Lock()
+
+    def configure(self, max_workers: int) -> None:
+        """
+        Sets the number of threads of the shared pool, before the first camera is registered.
+
+        Args:
+            max_workers (int): Threads of the shared pool.
+
+        Raises:
+            RuntimeError: If the shared pool is already running.
+        """
+
+        with self.lock:
+            if self.pool is not None:
+                raise RuntimeError("The shared pool is already running")
+            self.max_workers = max(int(max_workers), 1)
+
+    def get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Returns the shared pool, creating it the first time."""
+
+        with self.lock:
+            if self.pool is None:
+                save_default_settings()
+                self.pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="vision-pool"
+                )
+            return self.pool
+
+    def register(self, name: str, budget: ResourceBudget, latency: LatencyStatistics = None) -> CameraLane:
+        """
+        Creates the lane of a camera on the shared pool.
+
+        Args:
+            name (str): Name of the camera.
+            budget (ResourceBudget): CPU budget of the camera.
+            latency (LatencyStatistics): Latency statistics of the camera, where queue waits are recorded.
+
+        Returns:
+            CameraLane: The executor of the camera.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        pool = self.get_pool()
+        workers = min(budget.workers or self.max_workers, self.max_workers)
+        if budget.workers and budget.workers > self.max_workers:
+            logger.warning(
+                f"Camera {name} asks for {budget.workers} workers, limited to the {self.max_workers} of the shared pool"
+            )
+
+        if budget.cpus and hasattr(os, "sched_getaffinity"):
+            available = os.sched_getaffinity(0)
+            cpus = [cpu for cpu in budget.cpus if cpu in available]
+            if cpus != budget.cpus:
+                logger.warning(f"Camera {name} CPUs {budget.cpus} limited to the available CPUs {cpus or 'all'}")
+            budget.cpus = cpus or None
+
+        lane = CameraLane(name, budget, pool, workers, latency)
+        with self.lock:
+            self.lanes[name] = lane
+        return lane
+
+    def create_thread(self, name: str, budget: ResourceBudget) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Creates the single thread driving a camera, with the camera budget applied.
+
+        The thread running the workflow of a camera waits for the acquisitions of its lane, so it
+        is not taken from the shared pool.
+
+        Args:
+            name (str): Name of the camera.
+            budget (ResourceBudget): CPU budget of the camera.
+
+        Returns:
+            concurrent.futures.ThreadPoolExecutor: Executor with a single thread.
+        """
+
+        with self.lock:
+            save_default_settings()
+
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=name, initializer=apply_thread_settings, initargs=(budget,)
+        )
+
+    def get_statistics(self) -> dict[str, dict]:
+        """Returns the workers, running and queued tasks of every lane, by camera name."""
+
+        with self.lock:
+            lanes = list(self.lanes.values())
+
+        return {
+            lane.name: {"workers": lane.workers, "running": lane.running, "queued": lane.get_queued_tasks()}
+            for lane in lanes
+        }
+
+
+executor_manager = ExecutorManager()
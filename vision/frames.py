@@ -0,0 +1,145 @@
+###########EXTERNAL IMPORTS############
+
+import io
+import json
+import struct
+import numpy as np
+from PIL import Image
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.data.variables import *
+
+#######################################
+
+# Quality of the JPEG frames sent to the frontend
+DEFAULT_JPEG_QUALITY = 85
+
+# Format of the encoded frames, sent in the frame header
+FRAME_FORMAT = "jpeg"
+
+# Renditions of a frame: a downscaled preview on every frame, full resolution on demand
+PREVIEW_RENDITION = "preview"
+FULL_RENDITION = "full"
+
+# Renditions of the frames read back from the history: the overlay or the raw acquired image
+HISTORY_RENDITION = "history"
+RAW_RENDITION = "raw"
+
+# Maximum width in pixels of the preview rendition
+DEFAULT_PREVIEW_WIDTH = 640
+
+# Size of the header length prefix of a binary frame message: unsigned 32 bit, big endian
+FRAME_HEADER_LENGTH = struct.Struct(">I")
+
+
+def encode_jpeg(image: ha.HObject, quality: int = DEFAULT_JPEG_QUALITY, max_width: int = None) -> bytes:
+    """
+    Encodes a HALCON image as JPEG in memory.
+
+    Images that are not byte images are converted first. Single channel images are encoded as
+    grayscale and three channel images as RGB. Images wider than `max_width` are downscaled in
+    HALCON before the conversion, so the conversion and the encoding only handle the small image.
+
+    Args:
+        image (ha.HObject): Image to encode.
+        quality (int): JPEG quality, from 1 to 95.
+        max_width (int): Maximum width of the encoded image, or None to keep the full resolution.
+
+    Returns:
+        bytes: The JPEG file contents.
+    """
+
+    if max_width:
+        width, height = ha.get_image_size_s(image)
+        if width > max_width:
+            image = ha.zoom_image_size(image, max_width, max(round(height * max_width / width), 1), "constant")
+
+    if ha.get_image_type(image)[0] != "byte":
+        image = ha.convert_image_type(image, "byte")
+
+    return encode_array_jpeg(ha.himage_as_numpy_array(image), quality)
+
+
+def encode_array_jpeg(array: np.ndarray, quality: int = DEFAULT_JPEG_QUALITY) -> bytes:
+    """
+    Encodes an image array as JPEG in memory.
+
+    Args:
+        array (np.ndarray): Image of shape (height, width) or (height, width, channels).
+        quality (int): JPEG quality, from 1 to 95.
+
+    Returns:
+        bytes: The JPEG file contents.
+    """
+
+    if array.dtype != np.uint8:
+        array = np.clip(array, 0, 255).astype(np.uint8)
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def crop_image(image: ha.HObject, region: list[int]) -> ha.HObject:
+    """
+    Crops an image to a rectangle, clipped to the image.
+
+    Args:
+        image (ha.HObject): Image to crop.
+        region (list[int]): Row and column of the top left corner and of the bottom right corner.
+
+    Returns:
+        ha.HObject: The cropped image.
+
+    Raises:
+        ValueError: If the rectangle does not overlap the image.
+    """
+
+    width, height = ha.get_image_size_s(image)
+    row1, column1, row2, column2 = (int(value) for value in region)
+    row1, column1 = max(row1, 0), max(column1, 0)
+    row2, column2 = min(row2, height - 1), min(column2, width - 1)
+
+    if row2 < row1 or column2 < column1:
+        raise ValueError(f"Crop region {region} is outside the image")
+
+    return ha.crop_rectangle1(image, row1, column1, row2, column2)
+
+
+def pack_frame(
+    camera_name: str, frame_id: int, data: bytes, rendition: str = PREVIEW_RENDITION, region: list[int] = None
+) -> bytes:
+    """
+    Builds the binary WebSocket message of an encoded frame.
+
+    The message is the length of the header as an unsigned 32 bit big endian integer, the header
+    as UTF-8 JSON with the camera name, frame id, format, rendition and crop region, and then the
+    encoded image.
+
+    Args:
+        camera_name (str): Name of the camera that produced the frame.
+        frame_id (int): Identifier of the frame.
+        data (bytes): Encoded image.
+        rendition (str): Rendition of the frame: preview, full, history or raw.
+        region (list[int]): Crop region of a full rendition, or None for the whole image.
+
+    Returns:
+        bytes: The binary message.
+    """
+
+    header = json.dumps(
+        {
+            PERIPHERAL_KEY: camera_name,
+            FRAME_ID_KEY: frame_id,
+            FORMAT_KEY: FRAME_FORMAT,
+            RENDITION_KEY: rendition,
+            REGION_KEY: region,
+        }
+    ).encode()
+    return FRAME_HEADER_LENGTH.pack(len(header)) + header + data
@@ -0,0 +1,347 @@
+###########EXTERNAL IMPORTS############
+
+import bisect
+import collections
+import mmap
+import os
+import threading
+import numpy as np
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from util.debug import LoggerManager
+
+#######################################
+
+# Maximum number of frames kept in the history of a camera
+DEFAULT_HISTORY_CAPACITY = 500
+
+# Maximum number of bytes of images and overlays kept in the history of a camera
+DEFAULT_HISTORY_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class HistoryEntry:
+    """
+    A frame kept in the history: its metadata and where its image and overlay are stored.
+
+    Attributes:
+        frame_id (int): Identifier of the frame.
+        timestamp (float): Wall clock time the frame was recorded, in seconds since the epoch.
+        results (dict): Output register values of the frame, by variable name.
+        timings (dict): Timings of the frame in seconds, by name.
+        shape (tuple): Shape of the raw image array, None when raw images are not kept.
+        dtype (str): Data type of the raw image array, None when raw images are not kept.
+        image (bytes | tuple[int, int]): Raw image bytes, or offset and length in the spill file, None
+            when raw images are not kept.
+        overlay (bytes | tuple[int, int]): JPEG overlay, or offset and length in the spill file, None
+            until the frame is rendered.
+        size (int): Bytes used by the image and the overlay.
+    """
+
+    def __init__(
+        self,
+        frame_id: int,
+        timestamp: float,
+        results: dict,
+        timings: dict,
+        shape: tuple,
+        dtype: str,
+        image,
+        overlay,
+        size: int,
+    ):
+
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.results = results
+        self.timings = timings
+        self.shape = shape
+        self.dtype = dtype
+        self.image = image
+        self.overlay = overlay
+        self.size = size
+
+    def get_summary(self) -> dict:
+        """Returns the metadata of the frame, without the image and overlay."""
+
+        return {
+            "frame_id": self.frame_id,
+            "timestamp": self.timestamp,
+            "results": self.results,
+            "timings": self.timings,
+            "rendered": self.overlay is not None,
+        }
+
+
+class SpillFile:
+    """
+    Fixed size memory-mapped file used as a circular store of byte blocks.
+
+    Blocks are written one after the other and the write position wraps to the start of the file
+    when a block does not fit at the end. The owner evicts the entries whose blocks are about to
+    be overwritten. Writes only touch the page cache, the kernel flushes the pages in background.
+
+    Attributes:
+        path (str): Path of the file.
+        size (int): Size of the file in bytes.
+        position (int): Offset where the next block is written.
+    """
+
+    def __init__(self, path: str, size: int):
+
+        self.path = path
+        self.size = size
+        self.position = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "w+b")
+        self.file.truncate(size)
+        self.memory = mmap.mmap(self.file.fileno(), size)
+
+    def reserve(self, length: int) -> int:
+        """
+        Returns the offset where a block of `length` bytes will be written, without writing it.
+
+        Raises:
+            ValueError: If the block is larger than the file.
+        """
+
+        if length > self.size:
+            raise ValueError(f"Block of {length} bytes does not fit in a spill file of {self.size} bytes")
+        return 0 if self.position + length > self.size else self.position
+
+    def write(self, data: bytes) -> tuple[int, int]:
+        """Writes a block at the reserved offset and returns its offset and length."""
+
+        offset = self.reserve(len(data))
+        self.memory[offset : offset + len(data)] = data
+        self.position = offset + len(data)
+        return offset, len(data)
+
+    def read(self, location: tuple[int, int]) -> bytes:
+        """Reads the block at an offset and length."""
+
+        offset, length = location
+        return bytes(self.memory[offset : offset + length])
+
+    def close(self) -> None:
+        """Unmaps and closes the file."""
+
+        self.memory.close()
+        self.file.close()
+
+
+class FrameHistory:
+    """
+    Bounded, in-memory history of the last frames of a camera.
+
+    Every frame is recorded with its output register values and its timings, whether it is rendered
+    or not; the JPEG overlay is attached later, only to the frames that get rendered. Copying the raw
+    image of every frame costs a full frame copy in the camera thread, so raw images are only kept
+    when enabled. The oldest frames are evicted when the number of frames exceeds the capacity or
+    when their images and overlays exceed the memory budget. With a spill path, the images and
+    overlays are stored in a memory-mapped file of `max_bytes` instead of the Python heap, so the
+    history can be much larger than the process memory without per-frame disk I/O.
+
+    Frames are queried by frame id or by time; recording and queries may run in different threads.
+
+    Attributes:
+        capacity (int): Maximum number of frames kept.
+        max_bytes (int): Maximum bytes of images and overlays kept, or the size of the spill file.
+        raw_images (bool): Whether the raw image of every frame is kept.
+        spill (SpillFile): Memory-mapped file storing images and overlays, or None to keep them in memory.
+        entries (collections.deque[HistoryEntry]): Frames kept, oldest first.
+        size (int): Bytes of images and overlays currently kept in memory.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_HISTORY_CAPACITY,
+        max_bytes: int = DEFAULT_HISTORY_MAX_BYTES,
+        spill_path: str = None,
+        raw_images: bool = False,
+    ):
+
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.raw_images = raw_images
+        self.spill = SpillFile(spill_path, max_bytes) if spill_path else None
+        self.entries: collections.deque[HistoryEntry] = collections.deque()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def record(self, frame_id: int, timestamp: float, image: np.ndarray, results: dict, timings: dict) -> None:
+        """
+        Records a frame, evicting the oldest frames to stay within the capacity and memory budget.
+
+        Args:
+            frame_id (int): Identifier of the frame.
+            timestamp (float): Wall clock time of the frame, in seconds since the epoch.
+            image (np.ndarray): Raw image of the frame, ignored unless raw images are kept.
+            results (dict): Output register values of the frame, by variable name.
+            timings (dict): Timings of the frame in seconds, by name.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        image_bytes, shape, dtype = None, None, None
+        if self.raw_images and image is not None:
+            image_bytes, shape, dtype = np.ascontiguousarray(image).tobytes(), image.shape, str(image.dtype)
+        size = len(image_bytes) if image_bytes is not None else 0
+        if size > self.max_bytes:
+            logger.warning(f"Frame {frame_id} of {size} bytes does not fit in the history, not recorded")
+            return
+
+        with self.lock:
+            if self.spill and image_bytes is not None:
+                image_bytes = self.write_spill(image_bytes)
+            elif not self.spill:
+                while self.entries and self.size + size > self.max_bytes:
+                    self.evict_oldest()
+                self.size += size
+
+            self.entries.append(
+                HistoryEntry(frame_id, timestamp, results, timings, shape, dtype, image_bytes, None, size)
+            )
+            while len(self.entries) > self.capacity:
+                self.evict_oldest()
+
+    def attach_overlay(self, frame_id: int, overlay: bytes, timings: dict) -> bool:
+        """
+        Attaches the JPEG overlay of a rendered frame to its entry.
+
+        Args:
+            frame_id (int): Identifier of the frame.
+            overlay (bytes): JPEG of the rendered frame.
+            timings (dict): Timings of the rendering in seconds, by name, added to those of the frame.
+
+        Returns:
+            bool: True if the overlay was attached, False if the frame is no longer in the history.
+        """
+
+        with self.lock:
+            entry = self.find_entry(frame_id)
+            if entry is None or len(overlay) > self.max_bytes:
+                return False
+
+            if self.spill:
+                location = self.write_spill(overlay)
+                if self.find_entry(frame_id) is None:
+                    return False
+                entry.overlay = location
+            else:
+                while self.entries and self.entries[0] is not entry and self.size + len(overlay) > self.max_bytes:
+                    self.evict_oldest()
+                if self.size + len(overlay) > self.max_bytes:
+                    return False
+                entry.overlay = overlay
+                self.size += len(overlay)
+
+            entry.size += len(overlay)
+            entry.timings.update(timings)
+            return True
+
+    def find_entry(self, frame_id: int) -> HistoryEntry | None:
+        """Returns the entry of a frame id, must be called with the lock held.
+
+        Frame ids are consecutive, so the entry is found at its offset from the oldest frame id; the
+        entries are only searched when frames are missing, such as those too large to be recorded.
+        """
+
+        if not self.entries:
+            return None
+
+        position = frame_id - self.entries[0].frame_id
+        if position < 0:
+            return None
+        if position >= len(self.entries) or self.entries[position].frame_id != frame_id:
+            position = bisect.bisect_left(self.entries, frame_id, key=lambda entry: entry.frame_id)
+            if position == len(self.entries) or self.entries[position].frame_id != frame_id:
+                return None
+        return self.entries[position]
+
+    def write_spill(self, data: bytes) -> tuple[int, int]:
+        """Writes a block to the spill file, first evicting the frames whose blocks it overwrites.
+
+        When the block wraps to the start of the file, the blocks between the write position and
+        the end of the file are the oldest ones and are evicted too.
+        """
+
+        offset = self.spill.reserve(len(data))
+        overwritten = [(offset, offset + len(data))]
+        if offset < self.spill.position:
+            overwritten.append((self.spill.position, self.spill.size))
+
+        while self.entries:
+            oldest = self.entries[0]
+            if any(
+                start < end and first < start + length
+                for start, length in (location for location in (oldest.image, oldest.overlay) if location is not None)
+                for first, end in overwritten
+            ):
+                self.evict_oldest()
+            else:
+                break
+
+        return self.spill.write(data)
+
+    def evict_oldest(self) -> None:
+        """Removes the oldest frame."""
+
+        entry = self.entries.popleft()
+        if not self.spill:
+            self.size -= entry.size
+
+    def find(self, frame_id: int = None, timestamp: float = None) -> HistoryEntry | None:
+        """
+        Finds a frame by frame id, or the last frame recorded at or before a time.
+
+        Args:
+            frame_id (int): Identifier of the frame.
+            timestamp (float): Time in seconds since the epoch, used when no frame id is given.
+
+        Returns:
+            HistoryEntry: The frame, or None if it is not in the history.
+        """
+
+        with self.lock:
+            if frame_id is not None:
+                return self.find_entry(frame_id)
+
+            if timestamp is not None:
+                position = bisect.bisect_right(self.entries, timestamp, key=lambda entry: entry.timestamp)
+                return self.entries[position - 1] if position > 0 else None
+
+            return self.entries[-1] if self.entries else None
+
+    def read_image(self, entry: HistoryEntry) -> np.ndarray | None:
+        """Returns the raw image of a frame, or None if it was not kept or was evicted in the meantime."""
+
+        with self.lock:
+            if entry.image is None or not self.entries or entry.frame_id < self.entries[0].frame_id:
+                return None
+            data = self.spill.read(entry.image) if self.spill else entry.image
+
+        return np.frombuffer(data, dtype=entry.dtype).reshape(entry.shape)
+
+    def read_overlay(self, entry: HistoryEntry) -> bytes | None:
+        """Returns the JPEG overlay of a frame, or None if it was not rendered or was evicted in the meantime."""
+
+        with self.lock:
+            if entry.overlay is None or not self.entries or entry.frame_id < self.entries[0].frame_id:
+                return None
+            return self.spill.read(entry.overlay) if self.spill else entry.overlay
+
+    def get_summary(self) -> list[dict]:
+        """Returns the metadata of every frame kept, oldest first."""
+
+        with self.lock:
+            return [entry.get_summary() for entry in self.entries]
+
+    def close(self) -> None:
+        """Releases the spill file."""
+
+        if self.spill:
+            self.spill.close()
@@ -0,0 +1,163 @@
+###########EXTERNAL IMPORTS############
+
+import concurrent.futures
+import threading
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from util.debug import LoggerManager
+
+#######################################
+
+# Number of procedures loaded at the same time
+DEFAULT_LOADER_WORKERS = 4
+
+
+class ProgramLoader:
+    """
+    Loads HDevelop programs and their local procedures once and shares them across procedures.
+
+    Each program file is parsed a single time into an HDevProgram, and every local procedure is
+    loaded from that parsed program instead of re-reading the file. Procedures can be preloaded in
+    parallel, the procedure objects are cached by program and name, and each VisionProcedure gets
+    its own HDevProcedureCall on top of the shared procedure.
+
+    Attributes:
+        executor (concurrent.futures.ThreadPoolExecutor): Pool loading the procedures in parallel.
+        programs (dict[str, concurrent.futures.Future]): Parsed program of each program path.
+        procedures (dict[tuple[str, str], concurrent.futures.Future]): Loaded procedure by program
+            path and procedure name.
+        lock (threading.Lock): Protects the program and procedure caches.
+        jit_enabled (bool): Whether the JIT compilation of the procedures is enabled.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_LOADER_WORKERS):
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.programs: dict[str, concurrent.futures.Future] = {}
+        self.procedures: dict[tuple[str, str], concurrent.futures.Future] = {}
+        self.lock = threading.Lock()
+        self.jit_enabled = False
+
+    def enable_jit_compilation(self) -> None:
+        """Enables the JIT compilation of the procedures executed by the HDevEngine of the process."""
+
+        with self.lock:
+            if not self.jit_enabled:
+                ha.HDevEngine().set_attribute("execute_procedures_jit_compiled", "true")
+                self.jit_enabled = True
+
+    def get_program(self, program_path: str) -> ha.HDevProgram:
+        """
+        Returns the parsed program, parsing the program file the first time it is requested.
+
+        Args:
+            program_path (str): Path to the .hdev program.
+
+        Returns:
+            ha.HDevProgram: The parsed program.
+        """
+
+        with self.lock:
+            future = self.programs.get(program_path)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self.programs[program_path] = future
+
+        if owner:
+            try:
+                future.set_result(ha.HDevProgram(program_path))
+            except Exception as e:
+                future.set_exception(e)
+                with self.lock:
+                    del self.programs[program_path]
+
+        return future.result()
+
+    def load_procedure(self, program_path: str, procedure_name: str) -> concurrent.futures.Future:
+        """
+        Starts loading a local procedure of a program, unless it is already loaded or loading.
+
+        Args:
+            program_path (str): Path to the .hdev program.
+            procedure_name (str): Name of the local procedure.
+
+        Returns:
+            concurrent.futures.Future: Completes with the loaded ha.HDevProcedure.
+        """
+
+        key = (program_path, procedure_name)
+
+        with self.lock:
+            future = self.procedures.get(key)
+            if future is None:
+                future = self.executor.submit(self.read_procedure, program_path, procedure_name)
+                self.procedures[key] = future
+
+        return future
+
+    def read_procedure(self, program_path: str, procedure_name: str) -> ha.HDevProcedure:
+        """Loads a local procedure from the parsed program."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            return ha.HDevProcedure.load_local(self.get_program(program_path), procedure_name)
+        except Exception as e:
+            logger.error(f"Error loading procedure {procedure_name} from {program_path}: {e}")
+            with self.lock:
+                self.procedures.pop((program_path, procedure_name), None)
+            raise
+
+    def preload(self, program_path: str, procedure_names: list[str]) -> None:
+        """
+        Starts loading several local procedures of a program in parallel.
+
+        Args:
+            program_path (str): Path to the .hdev program.
+            procedure_names (list[str]): Names of the local procedures.
+        """
+
+        for procedure_name in procedure_names:
+            self.load_procedure(program_path, procedure_name)
+
+    def get_procedure(self, program_path: str, procedure_name: str) -> ha.HDevProcedure:
+        """
+        Returns a local procedure of a program, waiting for it to be loaded.
+
+        Args:
+            program_path (str): Path to the .hdev program.
+            procedure_name (str): Name of the local procedure.
+
+        Returns:
+            ha.HDevProcedure: The loaded procedure, shared by every caller.
+        """
+
+        return self.load_procedure(program_path, procedure_name).result()
+
+
+# Loader shared by all the cameras of the process
+program_loader = ProgramLoader()
+
+
+def create_timed_camera(create_camera, program_path: str, options: dict = None) -> tuple:
+    """
+    Create the procedures of a camera and measure how long it took.
+
+    Args:
+        create_camera (function): Function creating the camera procedures from the program path.
+        program_path (str): Path to the .hdev program.
+        options (dict): Keyword arguments of the construct function, selecting the modes of the camera.
+
+    Returns:
+        tuple: The open, trigger, programs and displays procedures, and the startup time in seconds.
+    """
+
+    start_time = time.perf_counter()
+    open, trigger, programs, displays = create_camera(program_path, **(options or {}))
+    return open, trigger, programs, displays, time.perf_counter() - start_time
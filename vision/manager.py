@@ -97,8 +97,9 @@ class VisionManager:
             return
 
         try:
-            del self.vision_systems[vision_system_name]
+            vision_system = self.vision_systems.pop(vision_system_name)
             self.vision_systems_name.remove(vision_system_name)
+            await vision_system.close()
         except KeyError as e:
             logger.error(
                 f"Vision Manager - KeyError while removing Vision System {vision_system_name}: {e}"
@@ -108,6 +109,18 @@ class VisionManager:
                 f"Vision Manager - Error removing Vision System {vision_system_name}: {e}"
             )
 
+    async def close(self):
+        """
+        Stop processing the queues and close every VisionSystem, releasing their cameras.
+        """
+
+        for task in self.queue_tasks:
+            task.cancel()
+        self.queue_tasks.clear()
+
+        for vision_system_name in list(self.vision_systems):
+            await self.remove_vision_system(vision_system_name)
+
     def get_vision_system_devices(self) -> list[str]:
         """
         Get the list of vision system devices.
@@ -175,6 +188,16 @@ class VisionManager:
 
         try:
             if (
+                message.get(TYPE_KEY) == "status"
+                and message.get(DATA_KEY) == "disconnected"
+            ):
+                # The WebSocket server serves a single client and rejects the others, so once it
+                # disconnects nobody watches the cameras anymore and their displays go headless.
+                # Supporting several clients requires counting the subscriptions per connection
+                for vision_system in self.vision_systems.values():
+                    await vision_system.process_incoming_messages(message)
+
+            elif (
                 message.get(TYPE_KEY) == "status"
                 and message.get(DATA_KEY) == "connected"
             ):
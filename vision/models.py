@@ -0,0 +1,263 @@
+###########EXTERNAL IMPORTS############
+
+import hashlib
+import json
+import os
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import VisionProcedure
+from util.debug import LoggerManager
+
+#######################################
+
+# Parameters of create_shape_model after the template image:
+# NumLevels, AngleStart, AngleExtent, AngleStep, Optimization, Metric, Contrast, MinContrast
+DEFAULT_SHAPE_MODEL_PARAMETERS = ("auto", -0.01, 0.01, "auto", "auto", "use_polarity", "auto", "auto")
+
+# Name of the cache folder created inside the models folder
+CACHE_FOLDER_NAME = "cache"
+
+# Name of the file holding the metadata of the cached models
+CACHE_INDEX_NAME = "index.json"
+
+
+class ShapeModelCache:
+    """
+    Persistent cache of the shape models created from the reference images of a camera.
+
+    Each reference is a PNG template in the models folder with a region of the same name in the
+    regions folder. The shape model created from the template is serialized with write_shape_model
+    into a cache folder next to the templates, together with the width and height of the region.
+    Entries are keyed by a SHA-256 hash of the template, the region and the creation parameters, so
+    only new or changed references are rebuilt; entries of removed or changed references are evicted.
+
+    Attributes:
+        models_folder (str): Folder with the PNG templates.
+        regions_folder (str): Folder with the .hobj regions.
+        cache_folder (str): Folder where the serialized shape models and the index are stored.
+        parameters (tuple): Parameters of create_shape_model after the template image.
+        index (dict): Metadata of each cached reference by name (key, model file, width, height).
+    """
+
+    def __init__(
+        self,
+        models_folder: str,
+        regions_folder: str,
+        cache_folder: str = None,
+        parameters: tuple = DEFAULT_SHAPE_MODEL_PARAMETERS,
+    ):
+
+        self.models_folder = models_folder
+        self.regions_folder = regions_folder
+        self.cache_folder = cache_folder if cache_folder else os.path.join(models_folder, CACHE_FOLDER_NAME)
+        self.parameters = tuple(parameters)
+        self.index: dict[str, dict] = {}
+
+    def get_references(self) -> list[str]:
+        """Returns the names of the references, sorted, that have a PNG template."""
+
+        return sorted(
+            os.path.splitext(file_name)[0]
+            for file_name in os.listdir(self.models_folder)
+            if file_name.lower().endswith(".png") and os.path.isfile(os.path.join(self.models_folder, file_name))
+        )
+
+    def get_key(self, reference: str) -> str:
+        """Returns the content hash of a reference template, region and creation parameters."""
+
+        digest = hashlib.sha256()
+        for path in (self.get_template_path(reference), self.get_region_path(reference)):
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+        digest.update(json.dumps(self.parameters).encode())
+        return digest.hexdigest()
+
+    def get_template_path(self, reference: str) -> str:
+        """Returns the path of the PNG template of a reference."""
+
+        return os.path.join(self.models_folder, reference + ".png")
+
+    def get_region_path(self, reference: str) -> str:
+        """Returns the path of the region of a reference."""
+
+        return os.path.join(self.regions_folder, reference + ".hobj")
+
+    def load(self) -> tuple[list, list[str], list[float], list[float]]:
+        """
+        Loads the shape model of every reference, rebuilding only the new or changed ones.
+
+        Returns:
+            tuple: The shape model handles, reference names, region widths and region heights, in
+                the order of the reference names, all empty if the models folder does not exist.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        if not os.path.isdir(self.models_folder):
+            logger.error(f"Shape models folder {self.models_folder} does not exist, no models loaded")
+            return [], [], [], []
+
+        os.makedirs(self.cache_folder, exist_ok=True)
+        self.read_index()
+
+        models, names, widths, heights = [], [], [], []
+        index = {}
+        rebuilt = 0
+
+        for reference in self.get_references():
+            try:
+                key = self.get_key(reference)
+                entry = self.index.get(reference)
+                model = None
+
+                if entry is not None and entry["key"] == key:
+                    try:
+                        model = ha.read_shape_model(os.path.join(self.cache_folder, entry["model"]))
+                    except Exception as e:
+                        logger.warning(f"Failed to read cached shape model of {reference}, rebuilding it: {e}")
+
+                if model is None:
+                    model, entry = self.build(reference, key)
+                    rebuilt += 1
+
+                models.append(model)
+                names.append(reference)
+                widths.append(entry["width"])
+                heights.append(entry["height"])
+                index[reference] = entry
+
+            except Exception as e:
+                logger.error(f"Error loading shape model of reference {reference}: {e}")
+
+        self.index = index
+        self.write_index()
+        self.evict()
+
+        logger.info(f"Loaded {len(models)} shape models from {self.models_folder}, {rebuilt} rebuilt")
+
+        return models, names, widths, heights
+
+    def build(self, reference: str, key: str) -> tuple:
+        """
+        Creates the shape model of a reference and stores it in the cache.
+
+        Args:
+            reference (str): Name of the reference.
+            key (str): Content hash of the reference.
+
+        Returns:
+            tuple: The shape model handle and its index entry.
+        """
+
+        image = ha.read_image(self.get_template_path(reference))
+        model = ha.create_shape_model(image, *self.parameters)
+
+        region = ha.read_object(self.get_region_path(reference))
+        row1, column1, row2, column2 = ha.smallest_rectangle1_s(region)
+
+        model_file = f"{reference}.{key[:16]}.shm"
+        ha.write_shape_model(model, os.path.join(self.cache_folder, model_file))
+
+        entry = {
+            "key": key,
+            "model": model_file,
+            "width": float(column2 - column1),
+            "height": float(row2 - row1),
+        }
+        return model, entry
+
+    def read_index(self) -> None:
+        """Reads the metadata of the cached models, starting empty if it is missing or corrupt."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        self.index = {}
+        index_path = os.path.join(self.cache_folder, CACHE_INDEX_NAME)
+        if not os.path.isfile(index_path):
+            return
+
+        try:
+            with open(index_path, "r") as file:
+                self.index = json.load(file)
+        except Exception as e:
+            logger.warning(f"Failed to read shape model cache index {index_path}: {e}")
+
+    def write_index(self) -> None:
+        """Writes the metadata of the cached models, replacing the previous index atomically."""
+
+        index_path = os.path.join(self.cache_folder, CACHE_INDEX_NAME)
+        temporary_path = index_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(self.index, file, indent=2)
+        os.replace(temporary_path, index_path)
+
+    def evict(self) -> None:
+        """Removes the cached models that are not referenced by the index anymore."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        model_files = {entry["model"] for entry in self.index.values()}
+        for file_name in os.listdir(self.cache_folder):
+            if file_name.endswith(".shm") and file_name not in model_files:
+                try:
+                    os.remove(os.path.join(self.cache_folder, file_name))
+                    logger.debug(f"Evicted stale shape model {file_name}")
+                except OSError as e:
+                    logger.warning(f"Failed to evict stale shape model {file_name}: {e}")
+
+
+class ShapeModelOpenProcedure(VisionProcedure):
+    """
+    Open procedure of a camera searching shape models, fed with the models of its references.
+
+    The shape models are loaded from the cache when the procedure runs, as the camera is
+    initialized, so building the procedures of the camera neither reads nor writes the cache.
+    The loaded models are set on the first control inputs, in the order of load(), and the
+    procedures searching every reference are given the number of references loaded.
+
+    Attributes:
+        cache (ShapeModelCache): Cache the shape models are loaded from.
+        reference_procedures (list[VisionProcedure]): Procedures with a set_reference_count method,
+            such as MultiReferenceProcedure.
+    """
+
+    def __init__(
+        self,
+        program_directory: str,
+        name: str,
+        cache: ShapeModelCache,
+        input_control: dict[str, str],
+        output_control: dict[str, str],
+        reference_procedures: list[VisionProcedure] = None,
+    ):
+
+        super().__init__(
+            program_directory=program_directory,
+            name=name,
+            input_iconic_variables=[],
+            output_iconic_variables=[],
+            input_control_variables=list(input_control),
+            input_control_types=list(input_control.values()),
+            output_control_variables=list(output_control),
+            output_control_types=list(output_control.values()),
+        )
+
+        self.cache = cache
+        self.reference_procedures = list(reference_procedures) if reference_procedures else []
+
+    def execute(self):
+        """Loads the shape models into the inputs, then opens the camera."""
+
+        models = self.cache.load()
+        for index, value in enumerate(models):
+            self.set_input_control_by_index(index, value)
+        for procedure in self.reference_procedures:
+            procedure.set_reference_count(len(models[0]))
+
+        super().execute()
@@ -0,0 +1,201 @@
+###########EXTERNAL IMPORTS############
+
+import concurrent.futures
+import os
+import queue
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import VisionProcedure, initialize_procedure, get_first
+from util.debug import LoggerManager
+
+#######################################
+
+# Outputs of the single reference procedure read for every candidate
+REFERENCE_OUTPUTS = ["Angle", "Score", "OK", "NOK", "X", "Y", "Ref", "Width", "Height"]
+
+
+class MultiReferenceProcedure(VisionProcedure):
+    """
+    Searches a set of references against the same image concurrently and keeps the best match.
+
+    The single reference procedure (Inspection by default) is executed once for every candidate
+    model, each execution on its own HDevProcedureCall so that the searches run in parallel in a
+    thread pool. The outputs are those of the best scoring reference, plus the margin to the
+    runner-up, so one trigger identifies an unknown part instead of one trigger per reference.
+
+    Inputs:
+        Image: Image to search.
+        FirstReference (int): Index of the first candidate model.
+        ReferenceCount (int): Number of candidate models, 0 for all the models from the first one.
+        MinAngle, MaxAngle, MinScore (float): Search parameters of the single reference procedure.
+
+    Outputs:
+        Angle, Score, OK, NOK, X, Y, Ref, Width, Height: Outputs of the best match.
+        Margin (float): Score of the best match minus the score of the runner-up, 0 with a single candidate.
+        RunnerUp (string): Reference of the runner-up, empty with a single candidate.
+
+    Attributes:
+        reference_count (int): Number of models loaded in the program, set once they are loaded.
+        max_workers (int): Searches run at the same time, or None for one per reference up to the CPU count.
+        executor (concurrent.futures.Executor): Executor running the searches, the lane of the camera
+            once set_executor is called.
+        calls (queue.Queue): Procedure calls available to the searches, one per worker.
+        speed_up (float): Sum of the search times over the wall time of the last execution.
+    """
+
+    def __init__(
+        self,
+        program_directory: str,
+        name: str,
+        reference_count: int = 0,
+        reference_procedure_name: str = "Inspection",
+        max_workers: int = None,
+    ):
+
+        super().__init__(
+            program_directory=program_directory,
+            name=name,
+            input_iconic_variables=["Image"],
+            output_iconic_variables=[],
+            input_control_variables=["FirstReference", "ReferenceCount", "MinAngle", "MaxAngle", "MinScore"],
+            input_control_types=["int", "int", "float", "float", "float"],
+            output_control_variables=REFERENCE_OUTPUTS + ["Margin", "RunnerUp"],
+            output_control_types=["float", "float", "int", "int", "float", "float", "string", "float", "float"]
+            + ["float", "string"],
+            procedure_name=reference_procedure_name,
+        )
+
+        self.reference_count = reference_count
+        self.max_workers = max_workers
+        workers = self.get_workers()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+        self.calls: queue.Queue = queue.Queue()
+        self.calls.put(self.procedure)
+        for _ in range(workers - 1):
+            self.calls.put(initialize_procedure(self.program_directory, self.procedure_name))
+
+        self.speed_up: float = 1.0
+
+    def get_workers(self) -> int:
+        """Returns the number of searches run at the same time for the current reference count."""
+
+        return self.max_workers if self.max_workers else min(max(self.reference_count, 1), os.cpu_count() or 1)
+
+    def set_reference_count(self, reference_count: int):
+        """
+        Set the number of models loaded in the program, adding procedure calls for the new workers.
+
+        Must not be called while the procedure executes.
+
+        Args:
+            reference_count (int): Number of models loaded in the program.
+        """
+
+        self.reference_count = reference_count
+        for _ in range(self.get_workers() - self.calls.qsize()):
+            self.calls.put(initialize_procedure(self.program_directory, self.procedure_name))
+
+    def get_candidates(self) -> list[int]:
+        """Returns the indexes of the candidate models from the current inputs."""
+
+        first = int(get_first(self.input_control["FirstReference"], 0))
+        count = int(get_first(self.input_control["ReferenceCount"], 0))
+
+        last = self.reference_count if count <= 0 else min(first + count, self.reference_count)
+        return list(range(max(first, 0), last))
+
+    def search(self, reference: int) -> tuple[dict, int]:
+        """
+        Runs the single reference procedure for one candidate model.
+
+        Args:
+            reference (int): Index of the candidate model.
+
+        Returns:
+            tuple: The outputs of the search and its duration in nanoseconds.
+        """
+
+        call: ha.HDevProcedureCall = self.calls.get()
+        try:
+            start_time = time.perf_counter_ns()
+            call.set_input_iconic_param_by_name("Image", self.input_iconic["Image"])
+            call.set_input_control_param_by_name("ProgramNumber", reference)
+            for variable_name in ("MinAngle", "MaxAngle", "MinScore"):
+                call.set_input_control_param_by_name(variable_name, self.input_control[variable_name])
+            call.execute()
+            outputs = {
+                variable_name: call.get_output_control_param_by_name(variable_name)
+                for variable_name in REFERENCE_OUTPUTS
+            }
+            return outputs, time.perf_counter_ns() - start_time
+        finally:
+            self.calls.put(call)
+
+    def execute(self):
+        """Searches every candidate concurrently and sets the outputs of the best match."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        start_time = time.perf_counter_ns()
+        futures = [self.executor.submit(self.search, reference) for reference in self.get_candidates()]
+
+        results = []
+        search_time = 0
+        for future in futures:
+            try:
+                outputs, duration = future.result()
+                search_time += duration
+                results.append(outputs)
+            except Exception as e:
+                logger.debug(f"Reference search failed in {self.name}: {e}")
+
+        wall_time = time.perf_counter_ns() - start_time
+        self.speed_up = search_time / wall_time if wall_time > 0 else 1.0
+
+        results.sort(key=lambda outputs: get_first(outputs["Score"], 0.0), reverse=True)
+        if not results:
+            raise RuntimeError("No reference could be searched")
+
+        best = results[0]
+        for variable_name in REFERENCE_OUTPUTS:
+            self.output_control[variable_name] = best[variable_name]
+
+        if len(results) > 1:
+            runner_up = results[1]
+            self.output_control["Margin"] = [
+                get_first(best["Score"], 0.0) - get_first(runner_up["Score"], 0.0)
+            ]
+            self.output_control["RunnerUp"] = runner_up["Ref"]
+        else:
+            self.output_control["Margin"] = [0.0]
+            self.output_control["RunnerUp"] = [""]
+
+    def set_profiler(self, profiler=None):
+        """Run the searches from the instrumented program of a profiler, or back from the program."""
+
+        workers = self.calls.qsize()
+        super().set_profiler(profiler)
+
+        calls: queue.Queue = queue.Queue()
+        calls.put(self.procedure)
+        for _ in range(workers - 1):
+            calls.put(self.create_procedure_call(profiler))
+        self.calls = calls
+
+    def set_executor(self, executor: concurrent.futures.Executor):
+        """Run the searches in the executor of the camera instead of a pool of their own."""
+
+        if executor is not self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = executor
+
+    def get_speed_up(self) -> float:
+        """Return the parallel speed-up of the last execution."""
+
+        return self.speed_up
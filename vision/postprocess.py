@@ -0,0 +1,164 @@
+###########EXTERNAL IMPORTS############
+
+import abc
+import numpy as np
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import VisionProcedure
+from vision.bridge import image_array, region_runs, runs_statistics
+
+#######################################
+
+
+class StageCall:
+    """
+    Procedure call of a Python stage.
+
+    A stage reads its inputs from its own dictionaries, which the bindings fill before setting the
+    parameters of the call, so the parameters are ignored.
+    """
+
+    def set_input_iconic_param_by_name(self, name: str, value: ha.HObject) -> None:
+        pass
+
+    def set_input_control_param_by_name(self, name: str, value) -> None:
+        pass
+
+
+class PostProcessStage(VisionProcedure, abc.ABC):
+    """
+    Python stage run in the camera workflow after a process procedure, before the display.
+
+    A stage is a procedure without HDevelop program: its inputs are bound, by name, to the outputs
+    of the trigger, of the process procedure and of the stages before it, and process() computes its
+    outputs in Python. Images and regions are read as NumPy arrays through the bridge, without
+    copying the pixels, so the checks can be vectorized instead of looping in HDevelop.
+
+    Stages are attached to a process procedure with add_post_stage. Their control outputs follow
+    the outputs of the procedure in the program outputs, and their outputs can be used by the
+    display procedure. They run in the thread of the camera, so they add to the processing time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        input_iconic: list[str] = None,
+        input_control: dict[str, str] = None,
+        output_iconic: list[str] = None,
+        output_control: dict[str, str] = None,
+    ):
+
+        input_control = input_control if input_control else {}
+        output_control = output_control if output_control else {}
+
+        super().__init__(
+            program_directory=None,
+            name=name,
+            input_iconic_variables=input_iconic if input_iconic else [],
+            output_iconic_variables=output_iconic if output_iconic else [],
+            input_control_variables=list(input_control),
+            input_control_types=list(input_control.values()),
+            output_control_variables=list(output_control),
+            output_control_types=list(output_control.values()),
+        )
+
+    def create_procedure_call(self, profiler=None) -> StageCall:
+        """Returns the call the bindings set the inputs on, the stage has no HDevelop procedure to profile."""
+
+        return StageCall()
+
+    def compile(self):
+        """Nothing to compile for a Python stage."""
+
+        pass
+
+    def execute(self):
+        """Runs process() and stores its outputs, outputs it does not return are reset to None."""
+
+        outputs = self.process()
+        for variable_name in self.output_iconic_variables:
+            self.output_iconic[variable_name] = outputs.get(variable_name)
+        for variable_name in self.output_control_variables:
+            self.output_control[variable_name] = outputs.get(variable_name)
+
+    @abc.abstractmethod
+    def process(self) -> dict:
+        """
+        Computes the outputs of the stage from its inputs.
+
+        :return: Value of each output, by name
+        """
+
+    def get_image_array(self, variable_name: str = "Image") -> np.ndarray:
+        """
+        Returns an iconic input image as a NumPy array, a view of its pixels for single channel images.
+
+        :param variable_name: Name of the iconic input
+        :return: The pixels, or None if the input is not set
+        """
+
+        image = self.input_iconic.get(variable_name)
+        return image_array(image) if image is not None else None
+
+    def get_region_runs(self, variable_name: str) -> list[np.ndarray]:
+        """
+        Returns the runs of each region of an iconic input.
+
+        :param variable_name: Name of the iconic input
+        :return: Row, first column and last column of each run, for each region, empty if the input is not set
+        """
+
+        regions = self.input_iconic.get(variable_name)
+        return region_runs(regions) if regions is not None else []
+
+
+class RegionStatisticsStage(PostProcessStage):
+    """
+    Measures the area and the mean gray value of each region of an iconic output, such as Pulleys.
+
+    Inputs:
+        Image: Image acquired by the trigger.
+        <regions>: Regions to measure.
+
+    Outputs:
+        <regions>Area (int): Area in pixels of each region.
+        <regions>Mean (float): Mean gray value of the first channel of the image in each region.
+    """
+
+    def __init__(self, name: str, regions_variable: str, image_variable: str = "Image", output_length: int = 0):
+        """
+        :param name: Name of the stage
+        :param regions_variable: Name of the iconic output with the regions
+        :param image_variable: Name of the iconic output with the image
+        :param output_length: Length of the array outputs, such as 5 for int[5], 0 to only report the first region
+        """
+
+        suffix = f"[{output_length}]" if output_length else ""
+        self.regions_variable = regions_variable
+        self.image_variable = image_variable
+        self.area_variable = f"{regions_variable}Area"
+        self.mean_variable = f"{regions_variable}Mean"
+
+        super().__init__(
+            name=name,
+            input_iconic=[image_variable, regions_variable],
+            output_control={self.area_variable: f"int{suffix}", self.mean_variable: f"float{suffix}"},
+        )
+
+    def process(self) -> dict:
+
+        image = self.get_image_array(self.image_variable)
+        if image is None:
+            return {self.area_variable: [], self.mean_variable: []}
+        if image.ndim == 3:
+            image = image[:, :, 0]
+
+        statistics = [runs_statistics(runs, image) for runs in self.get_region_runs(self.regions_variable)]
+        return {
+            self.area_variable: [area for area, _ in statistics],
+            self.mean_variable: [mean for _, mean in statistics],
+        }
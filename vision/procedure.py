@@ -1,12 +1,16 @@
 ###########EXTERNAL IMPORTS############
 
-import halcon as ha
+import concurrent.futures
 import time
 
 #######################################
 
 #############LOCAL IMPORTS#############
 
+from vision.backend import ha, declare_signature
+from vision.loader import program_loader
+from util.histogram import RollingLatencyHistogram
+
 #######################################
 
 
@@ -17,6 +21,7 @@ def create_vision_procedure(
     output_control: dict[str, str] = None,
     input_iconic: list[str] = None,
     output_iconic: list[str] = None,
+    procedure_name: str = None,
 ):
     """
     Create a VisionProcedure with input/output control and iconic variables.
@@ -27,6 +32,7 @@ def create_vision_procedure(
     :param output_control: Control outputs for the procedure
     :param input_iconic: Iconic inputs for the procedure
     :param output_iconic: Iconic outputs for the procedure
+    :param procedure_name: Name of the HDevelop procedure, if different from the name
     :return: A VisionProcedure instance
     """
 
@@ -55,21 +61,39 @@ def create_vision_procedure(
         output_control_types=output_control_types,
         input_iconic_variables=input_iconic if input_iconic else [],
         output_iconic_variables=output_iconic if output_iconic else [],
+        procedure_name=procedure_name,
     )
 
 
+def get_first(value, default=None):
+    """
+    Get the first element of a HALCON tuple.
+
+    :param value: HALCON tuple or single value
+    :param default: Value returned if the tuple is empty or None
+    :return: The first element of the tuple
+    """
+
+    if isinstance(value, (list, tuple)):
+        return value[0] if len(value) > 0 else default
+    return value if value is not None else default
+
+
 def initialize_procedure(
     program_directory: str, procedure_name: str
 ) -> ha.HDevProcedureCall:
     """
     Initialize a Halcon procedure from the given directory and name.
 
+    The program is parsed and the procedure is loaded only once, by the shared program loader,
+    each call gets its own procedure call.
+
     :param program_directory: Path to the procedure directory
     :param procedure_name: Name of the procedure
     :return: A Halcon procedure call
     """
 
-    procedure_proc = ha.HDevProcedure.load_local(program_directory, procedure_name)
+    procedure_proc = program_loader.get_procedure(program_directory, procedure_name)
     procedure = ha.HDevProcedureCall(procedure_proc)
     return procedure
 
@@ -81,10 +105,15 @@ class VisionProcedure:
     Attributes:
         program_directory (str): The directory where the procedure resides
         name (str): The name of the procedure
+        procedure_name (str): The name of the HDevelop procedure executed, the name by default
         input_iconic (dict): Dictionary of iconic input variables
         output_iconic (dict): Dictionary of iconic output variables
         input_control (dict): Dictionary of control input variables
         output_control (dict): Dictionary of control output variables
+        input_iconic_index (dict): Index of each iconic input variable by name
+        input_control_index (dict): Index of each control input variable by name
+        latency (RollingLatencyHistogram): Histogram of the procedure run times
+        post_stages (list[VisionProcedure]): Python stages run after the procedure, before the display
     """
 
     def __init__(
@@ -97,10 +126,12 @@ class VisionProcedure:
         input_control_types: list,
         output_control_variables: list,
         output_control_types: list,
+        procedure_name: str = None,
     ):
 
         self.program_directory = program_directory
         self.name = name
+        self.procedure_name = procedure_name if procedure_name else name
         self.input_iconic_variables = input_iconic_variables
         self.output_iconic_variables = output_iconic_variables
         self.input_control_variables = input_control_variables
@@ -113,11 +144,65 @@ class VisionProcedure:
         self.input_control = {key: None for key in input_control_variables}
         self.output_control = {key: None for key in output_control_variables}
 
-        self.procedure = initialize_procedure(self.program_directory, self.name)
+        # Signature compiled once, so that parameters can be addressed by index without scanning
+        self.input_iconic_index = {key: index for index, key in enumerate(input_iconic_variables)}
+        self.input_control_index = {key: index for index, key in enumerate(input_control_variables)}
+
+        self.procedure = self.create_procedure_call()
+        self.post_stages: list[VisionProcedure] = []
 
         self.run_time: float = 0
         self.min_run_time: float = 0
         self.max_run_time: float = 0
+        self.run_time_ns: int = 0
+        self.latency = RollingLatencyHistogram()
+
+    def create_procedure_call(self, profiler=None):
+        """
+        Declare the signature of the HDevelop procedure and create its procedure call.
+
+        :param profiler: ProcedureProfiler to run the procedure from the instrumented program, or None
+        :return: The procedure call the inputs are set on
+        """
+
+        program_path = self.program_directory
+        if profiler is not None:
+            program_path = profiler.get_profile(self.program_directory).instrumented_path
+
+        declare_signature(
+            program_path,
+            self.procedure_name,
+            self.output_iconic_variables,
+            dict(zip(self.output_control_variables, self.output_control_types)),
+        )
+        if profiler is not None:
+            return profiler.create_call(self.program_directory, self.procedure_name)
+        return initialize_procedure(self.program_directory, self.procedure_name)
+
+    def set_profiler(self, profiler=None):
+        """
+        Run the procedure from the instrumented program of a profiler, or back from its program.
+
+        The procedure call is replaced and the current inputs are set on the new call. Must not be
+        called while the procedure executes.
+
+        :param profiler: ProcedureProfiler recording the line times, or None to stop profiling
+        """
+
+        self.procedure = self.create_procedure_call(profiler)
+        self.set_input_variables()
+
+    def add_post_stage(self, stage: "VisionProcedure"):
+        """
+        Run a stage after the procedure, in the camera workflow, before the display.
+
+        The stage inputs are bound to the outputs of the trigger, the procedure and the stages
+        added before it, and its control outputs follow the procedure outputs.
+
+        :param stage: Stage to run, such as a PostProcessStage
+        """
+
+        self.post_stages.append(stage)
 
     def set_input_iconic_by_name(self, variable_name: str, value: ha.HObject):
         """Set iconic input by its name."""
@@ -129,10 +214,10 @@ class VisionProcedure:
     def set_input_iconic_by_index(self, index: int, value: ha.HObject):
         """Set iconic input by its index."""
 
-        for variable_index, variable_name in enumerate(self.input_iconic.copy()):
-            if index == variable_index:
-                self.input_iconic[variable_name] = value
-                self.procedure.set_input_iconic_param_by_name(variable_name, value)
+        if 0 <= index < len(self.input_iconic_variables):
+            variable_name = self.input_iconic_variables[index]
+            self.input_iconic[variable_name] = value
+            self.procedure.set_input_iconic_param_by_name(variable_name, value)
 
     def get_output_iconic_by_name(self, variable_name: str) -> ha.HObject:
         """Get iconic output by its name."""
@@ -143,9 +228,8 @@ class VisionProcedure:
     def get_output_iconic_by_index(self, index: int) -> ha.HObject:
         """Get iconic output by its index."""
 
-        for variable_index, variable_name in enumerate(self.output_iconic.copy()):
-            if index == variable_index:
-                return self.output_iconic[variable_name]
+        if 0 <= index < len(self.output_iconic_variables):
+            return self.output_iconic[self.output_iconic_variables[index]]
 
     def set_input_control_by_name(self, variable_name: str, value: ha.HTupleType):
         """Set control input by its name."""
@@ -157,10 +241,10 @@ class VisionProcedure:
     def set_input_control_by_index(self, index: int, value: ha.HTupleType):
         """Set control input by its index."""
 
-        for variable_index, variable_name in enumerate(self.input_control.copy()):
-            if index == variable_index:
-                self.input_control[variable_name] = value
-                self.procedure.set_input_control_param_by_name(variable_name, value)
+        if 0 <= index < len(self.input_control_variables):
+            variable_name = self.input_control_variables[index]
+            self.input_control[variable_name] = value
+            self.procedure.set_input_control_param_by_name(variable_name, value)
 
     def get_output_control_by_name(self, variable_name: str) -> ha.HTupleType:
         """Get control output by its name."""
@@ -171,17 +255,13 @@ class VisionProcedure:
     def get_output_control_by_index(self, index: int) -> ha.HTupleType:
         """Get control output by its index."""
 
-        for variable_index, variable_name in enumerate(self.output_control.copy()):
-            if index == variable_index:
-                return self.output_control[variable_name]
+        if 0 <= index < len(self.output_control_variables):
+            return self.output_control[self.output_control_variables[index]]
 
     def get_output_control(self) -> list[ha.HTupleType]:
         """Get all control output values as a list."""
 
-        output = []
-        for variable_name in self.output_control.copy():
-            output.append(self.output_control[variable_name])
-        return output
+        return [self.output_control[variable_name] for variable_name in self.output_control_variables]
 
     def get_input_control_variables(self) -> dict[int, list[str]]:
         """Return a dictionary of input control variables and their types."""
@@ -224,36 +304,68 @@ class VisionProcedure:
 
         return self.max_run_time
 
-    def run(self):
-        """Run the vision procedure and calculate the execution time."""
+    def compile(self):
+        """JIT compile the procedure and the procedures it calls, ahead of its first execution."""
+
+        program_loader.get_procedure(self.program_directory, self.procedure_name).compile_used_procedures()
+
+    def execute(self):
+        """Execute the procedure call and retrieve its outputs."""
 
-        start_time = time.time()
         self.procedure.execute()
         self.get_output_variables()
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        self.get_statistics(elapsed_time)
 
-    def set_input_variables(self):
-        """Helper method to set procedure input parameters from the class dictionaries."""
+    def warm_up(self):
+        """Execute the procedure once with its current inputs, without recording statistics."""
 
-        for iconic_variable in self.input_iconic.copy():
-            self.procedure.set_input_iconic_param_by_name(
-                iconic_variable, self.input_iconic[iconic_variable]
-            )
-        for control_variable in self.input_control.copy():
-            self.procedure.set_input_control_param_by_name(
-                control_variable, self.input_control[control_variable]
-            )
+        self.execute()
+
+    def get_speed_up(self) -> float:
+        """Return the parallel speed-up of the last execution, 1 for sequential procedures."""
+
+        return 1.0
+
+    def set_executor(self, executor: concurrent.futures.Executor):
+        """Run the parallel work of the procedure in the executor of its camera, ignored by sequential procedures."""
+
+        pass
+
+    def get_program_statistics(self) -> dict:
+        """Return the statistics specific to the procedure, empty for plain procedures."""
+
+        return {}
+
+    def run(self):
+        """Run the vision procedure and calculate the execution time."""
+
+        start_time = time.perf_counter_ns()
+        self.execute()
+        self.run_time_ns = time.perf_counter_ns() - start_time
+        self.latency.record(self.run_time_ns)
+        self.get_statistics(self.run_time_ns / 1e9)
+
+    def set_input_variables(self):
+        """Helper method to set procedure input parameters from the class dictionaries, unset inputs are skipped."""
+
+        for iconic_variable in self.input_iconic_variables:
+            if self.input_iconic[iconic_variable] is not None:
+                self.procedure.set_input_iconic_param_by_name(
+                    iconic_variable, self.input_iconic[iconic_variable]
+                )
+        for control_variable in self.input_control_variables:
+            if self.input_control[control_variable] is not None:
+                self.procedure.set_input_control_param_by_name(
+                    control_variable, self.input_control[control_variable]
+                )
 
     def get_output_variables(self):
         """Retrieve output variables from the procedure and update internal state."""
 
-        for iconic_variable in self.output_iconic.copy():
+        for iconic_variable in self.output_iconic_variables:
             self.output_iconic[iconic_variable] = (
                 self.procedure.get_output_iconic_param_by_name(iconic_variable)
             )
-        for control_variable in self.output_control.copy():
+        for control_variable in self.output_control_variables:
             self.output_control[control_variable] = (
                 self.procedure.get_output_control_param_by_name(control_variable)
             )
@@ -266,3 +378,58 @@ class VisionProcedure:
             self.max_run_time = elapsed_time
         if elapsed_time < self.min_run_time or self.min_run_time == 0:
             self.min_run_time = elapsed_time
+
+
+class ProcedureBinding:
+    """
+    Pre-resolved wiring of the outputs of one or more producer procedures into the inputs of a consumer.
+
+    The producer signatures are matched against the consumer signature once, when the binding is
+    created, so applying it on every trigger is a flat list of assignments without membership checks.
+    When several producers output a variable with the same name, the last producer wins, like merging
+    their output dictionaries in order.
+
+    Attributes:
+        consumer (VisionProcedure): Procedure whose inputs are set
+        iconic_assignments (list[tuple[int, str]]): Producer position and name of each bound iconic input
+        control_assignments (list[tuple[int, str]]): Producer position and name of each bound control input
+    """
+
+    def __init__(self, consumer: VisionProcedure, producers: list[VisionProcedure]):
+
+        self.consumer = consumer
+
+        iconic_sources: dict[str, int] = {}
+        control_sources: dict[str, int] = {}
+        for position, producer in enumerate(producers):
+            for variable_name in producer.output_iconic_variables:
+                if variable_name in consumer.input_iconic_index:
+                    iconic_sources[variable_name] = position
+            for variable_name in producer.output_control_variables:
+                if variable_name in consumer.input_control_index:
+                    control_sources[variable_name] = position
+
+        self.iconic_assignments = [(position, name) for name, position in iconic_sources.items()]
+        self.control_assignments = [(position, name) for name, position in control_sources.items()]
+
+    def apply(self, iconic_sources: list[dict], control_sources: list[dict]) -> None:
+        """
+        Set the consumer inputs from the producer outputs.
+
+        :param iconic_sources: Iconic outputs of each producer, in the order given at creation
+        :param control_sources: Control outputs of each producer, in the order given at creation
+        """
+
+        consumer_iconic = self.consumer.input_iconic
+        consumer_control = self.consumer.input_control
+        set_iconic_param = self.consumer.procedure.set_input_iconic_param_by_name
+        set_control_param = self.consumer.procedure.set_input_control_param_by_name
+
+        for position, variable_name in self.iconic_assignments:
+            value = iconic_sources[position][variable_name]
+            consumer_iconic[variable_name] = value
+            set_iconic_param(variable_name, value)
+        for position, variable_name in self.control_assignments:
+            value = control_sources[position][variable_name]
+            consumer_control[variable_name] = value
+            set_control_param(variable_name, value)
@@ -0,0 +1,174 @@
+###########EXTERNAL IMPORTS############
+
+import threading
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.burst import OK_VARIABLE, NOK_VARIABLE
+from util.counters import RollingCounters
+
+#######################################
+
+# Windows of the production statistics, in minutes
+PRODUCTION_WINDOWS = (1, 15, 60)
+
+# Seconds between two updates of the production statistics sent to the frontend and the PLC
+PRODUCTION_UPDATE_INTERVAL = 2.0
+
+# Seconds covered by each slot of the rolling counters
+PRODUCTION_SLOT_SECONDS = 10.0
+
+# Counters of every window: parts inspected, OK and NOK parts, failed triggers and processing time
+PRODUCTION_FIELDS = ("parts", "ok", "nok", "errors", "busy_ns")
+
+# Outputs giving the verdict of a part: NOK when one of the NOK outputs is non-zero, otherwise OK
+# when one of the OK outputs is, no verdict when the program has none of them
+OK_OUTPUTS = (OK_VARIABLE, "CorrectRefCount")
+NOK_OUTPUTS = (NOK_VARIABLE, "IncorrectRefCount")
+
+# Values of the production registers of each camera, for each window in order
+PRODUCTION_REGISTER_VALUES = ("parts_per_minute", "yield", "utilization")
+PRODUCTION_REGISTERS = [f"{value}_{minutes}min" for minutes in PRODUCTION_WINDOWS for value in PRODUCTION_REGISTER_VALUES]
+
+# Factor each value is multiplied by to fit a 16-bit register: parts per minute in whole parts (up to
+# 65535 parts/min), yield and utilization in hundredths of a percent (0 to 10000)
+PRODUCTION_REGISTER_SCALES = {"parts_per_minute": 1, "yield": 100, "utilization": 100}
+
+
+def get_verdict(outputs: list, variables: list[list[str]]) -> bool | None:
+    """
+    Returns whether a part is OK from the outputs of the program that inspected it.
+
+    Args:
+        outputs (list): Value of each output of the program.
+        variables (list[list[str]]): Name and type of each output of the program.
+
+    Returns:
+        bool: True if the part is OK, False if it is NOK, None if the program gives no verdict.
+    """
+
+    values = {}
+    for variable, value in zip(variables, outputs):
+        if variable and variable[0] in OK_OUTPUTS + NOK_OUTPUTS:
+            if isinstance(value, (list, tuple)):
+                value = value[0] if len(value) > 0 else None
+            try:
+                values[variable[0]] = float(value)
+            except (TypeError, ValueError):
+                values[variable[0]] = 0.0
+
+    if any(values.get(name, 0.0) > 0 for name in NOK_OUTPUTS):
+        return False
+    if any(values.get(name, 0.0) > 0 for name in OK_OUTPUTS):
+        return True
+    return None
+
+
+def summarize_window(window: dict) -> dict:
+    """Returns the throughput, yield and utilization of the counters of a window."""
+
+    minutes = window["seconds"] / 60
+    judged = window["ok"] + window["nok"]
+    return {
+        "parts": window["parts"],
+        "ok": window["ok"],
+        "nok": window["nok"],
+        "errors": window["errors"],
+        "parts_per_minute": window["parts"] / minutes if minutes > 0 else 0.0,
+        "yield": 100 * window["ok"] / judged if judged else None,
+        "utilization": 100 * window["busy_ns"] / 1e9 / window["seconds"] if window["seconds"] > 0 else 0.0,
+    }
+
+
+class ProductionStatistics:
+    """
+    Throughput, yield and utilization of a camera and of each of its programs over rolling windows.
+
+    Every trigger is counted in constant time and fixed memory (see RollingCounters), once for the
+    camera and once for the program that ran it, so the statistics survive program changes and are
+    read without scanning the history of the triggers. A burst of frames counts as one part.
+
+    Attributes:
+        camera (RollingCounters): Counters of every trigger of the camera.
+        programs (dict[int, RollingCounters]): Counters of the triggers of each program, by number.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.camera = self.create_counters()
+        self.programs: dict[int, RollingCounters] = {}
+
+    def create_counters(self) -> RollingCounters:
+        """Returns counters over the production windows."""
+
+        return RollingCounters(
+            PRODUCTION_FIELDS,
+            tuple(minutes * 60 for minutes in PRODUCTION_WINDOWS),
+            PRODUCTION_SLOT_SECONDS,
+        )
+
+    def add(self, program_number: int, values: dict[str, int]) -> None:
+        """Adds values to the counters of the camera and of a program."""
+
+        now_ns = time.monotonic_ns()
+        with self.lock:
+            self.camera.add(values, now_ns)
+            counters = self.programs.get(program_number)
+            if counters is None:
+                counters = self.programs[program_number] = self.create_counters()
+            counters.add(values, now_ns)
+
+    def record(self, program_number: int, verdict: bool | None, run_time: float) -> None:
+        """
+        Counts an inspected part.
+
+        Args:
+            program_number (int): Program that inspected the part.
+            verdict (bool): True if the part is OK, False if it is NOK, None without verdict.
+            run_time (float): Seconds the camera spent processing the part.
+        """
+
+        self.add(
+            program_number,
+            {"parts": 1, "ok": int(verdict is True), "nok": int(verdict is False), "busy_ns": int(run_time * 1e9)},
+        )
+
+    def record_error(self, program_number: int) -> None:
+        """Counts a trigger that failed, it is not a part."""
+
+        self.add(program_number, {"errors": 1})
+
+    def get_summary(self) -> dict:
+        """
+        Returns the production statistics of every window.
+
+        Returns:
+            dict: 'camera' and, by program number, 'programs' with the parts, OK, NOK and errors,
+                the parts per minute, the yield and the utilization in percent of each window, by
+                window length in minutes, and 'registers' the values of the production registers.
+        """
+
+        now_ns = time.monotonic_ns()
+        with self.lock:
+            camera = self.camera.get_windows(now_ns)
+            programs = {number: counters.get_windows(now_ns) for number, counters in self.programs.items()}
+
+        summary = {
+            "camera": {
+                minutes: summarize_window(window) for minutes, window in zip(PRODUCTION_WINDOWS, camera)
+            },
+            "programs": {
+                number: {minutes: summarize_window(window) for minutes, window in zip(PRODUCTION_WINDOWS, windows)}
+                for number, windows in programs.items()
+            },
+        }
+        summary["registers"] = [
+            summary["camera"][minutes][value] or 0.0
+            for minutes in PRODUCTION_WINDOWS
+            for value in PRODUCTION_REGISTER_VALUES
+        ]
+        return summary
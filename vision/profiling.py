@@ -0,0 +1,463 @@
+###########EXTERNAL IMPORTS############
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.loader import program_loader
+from util.debug import LoggerManager
+
+#######################################
+
+# Control output added to every instrumented procedure: the seconds spent in each line of the
+# program, followed by the number of times each line ran
+PROFILE_VARIABLE = "ProfileTimes"
+
+# Lines of control flow, declarations and returns, left untimed
+CONTROL_KEYWORDS = {
+    "if", "elseif", "else", "endif", "for", "endfor", "while", "endwhile", "repeat", "until",
+    "switch", "case", "default", "endswitch", "break", "continue", "return", "stop", "exit",
+    "try", "catch", "endtry", "throw", "global", "import", "comment",
+}
+
+# Statement calling a procedure, optionally started in a thread, and its trailing comment
+CALL_PATTERN = re.compile(r"^(?P<prefix>par_start\s*<\w+>\s*:\s*)?(?P<name>\w+)\s*\((?P<arguments>.*)\)\s*(//.*)?$")
+
+# Triggers profiled when no window is given
+DEFAULT_PROFILE_WINDOW = 100
+
+# Directory of the instrumented copies of the programs
+INSTRUMENTED_DIRECTORY = os.path.join(tempfile.gettempdir(), "vision-profiling")
+
+
+class ProfiledLine:
+    """
+    Line of an HDevelop procedure timed by the instrumented program.
+
+    Attributes:
+        procedure_name (str): Name of the local procedure of the line.
+        number (int): Number of the line in the procedure body, starting at 1.
+        statement (str): HDevelop statement of the line.
+        operator (str): Operator or procedure called by the line, or the assigned variable.
+        is_call (bool): Whether the line calls a local procedure, its time includes the callee.
+    """
+
+    def __init__(self, procedure_name: str, number: int, statement: str, operator: str, is_call: bool):
+
+        self.procedure_name = procedure_name
+        self.number = number
+        self.statement = statement
+        self.operator = operator
+        self.is_call = is_call
+
+
+def instrument_program(program_path: str, instrumented_path: str) -> list[ProfiledLine]:
+    """
+    Writes a copy of a program where every statement of the local procedures is timed.
+
+    Each statement, other than control flow, is surrounded by count_seconds calls, and its time and
+    run count are added to the ProfileTimes control output of its procedure. Calls of local procedures
+    get ProfileTimes as an extra output, added to the caller one, after par_join for calls started
+    with par_start. The times are thread safe, as each call returns its own tuple, and the outputs of
+    the procedures are unchanged.
+
+    Args:
+        program_path (str): Path to the .hdev program.
+        instrumented_path (str): Path of the instrumented copy.
+
+    Returns:
+        list[ProfiledLine]: The timed lines, by index in ProfileTimes.
+    """
+
+    tree = ElementTree.parse(program_path)
+    procedures = [procedure for procedure in tree.getroot().iter("procedure") if procedure.get("name") != "main"]
+    local_names = {procedure.get("name") for procedure in procedures}
+
+    # The main procedure is not timed, but its calls must match the new signatures
+    for main in tree.getroot().iter("procedure"):
+        if main.get("name") == "main" and main.find("body") is not None:
+            for element in main.find("body").iter("l"):
+                call = CALL_PATTERN.match((element.text or "").strip())
+                if call and call.group("name") in local_names:
+                    element.text = add_profile_output(call, "_ProfileMain")
+
+    # Lines are numbered across the program first, so every procedure returns a tuple of the same length
+    lines: list[ProfiledLine] = []
+    timed: dict[tuple[str, int], int] = {}
+    for procedure in procedures:
+        body = procedure.find("body")
+        statements = [element for element in (body if body is not None else []) if element.tag == "l"]
+        for number, element in enumerate(statements, start=1):
+            statement = (element.text or "").strip()
+            keyword = re.match(r"^(\w+)", statement)
+            if not statement or element.get("disabled") or (keyword and keyword.group(1) in CONTROL_KEYWORDS):
+                continue
+            call = CALL_PATTERN.match(statement)
+            operator = call.group("name") if call else f"{statement.split(':=')[0].strip()} :="
+            timed[(procedure.get("name"), number)] = len(lines)
+            lines.append(ProfiledLine(procedure.get("name"), number, statement, operator, bool(call) and operator in local_names))
+
+    count = len(lines)
+    for procedure in procedures:
+        instrument_procedure(procedure, timed, lines, count)
+
+    os.makedirs(os.path.dirname(instrumented_path), exist_ok=True)
+    tree.write(instrumented_path, encoding="UTF-8", xml_declaration=True)
+    return lines
+
+
+def create_line(text: str) -> ElementTree.Element:
+    """Returns a program line element."""
+
+    element = ElementTree.Element("l")
+    element.text = text
+    element.tail = "\n"
+    return element
+
+
+def add_profile_output(call: re.Match, variable_name: str) -> str:
+    """Returns a call of a local procedure with the ProfileTimes output stored in a variable."""
+
+    arguments = call.group("arguments").strip()
+    return f"{call.group('prefix') or ''}{call.group('name')}({arguments + ', ' if arguments else ''}{variable_name})"
+
+
+def instrument_procedure(procedure: ElementTree.Element, timed: dict, lines: list[ProfiledLine], count: int) -> None:
+    """Times the lines of a procedure and adds the ProfileTimes output, see instrument_program."""
+
+    name = procedure.get("name")
+    interface = procedure.find("interface")
+    if interface is None:
+        interface = ElementTree.SubElement(procedure, "interface")
+    outputs = interface.find("oc")
+    if outputs is None:
+        outputs = ElementTree.SubElement(interface, "oc")
+    ElementTree.SubElement(outputs, "par", {"name": PROFILE_VARIABLE, "base_type": "ctrl", "dimension": "0"}).tail = "\n"
+
+    documentation = procedure.find("docu/parameters")
+    if documentation is not None:
+        ElementTree.SubElement(documentation, "parameter", {"id": PROFILE_VARIABLE}).tail = "\n"
+
+    body = procedure.find("body")
+    if body is None:
+        return
+
+    elements = list(body)
+    for element in elements:
+        body.remove(element)
+
+    # The tuple is created after the global declarations at the start of the body
+    start = 0
+    while start < len(elements) and (
+        elements[start].tag != "l" or (elements[start].text or "").strip().startswith("global ")
+    ):
+        start += 1
+
+    instrumented = elements[:start]
+    instrumented.append(create_line(f"{PROFILE_VARIABLE} := gen_tuple_const({2 * count}, 0)"))
+
+    number = sum(1 for element in elements[:start] if element.tag == "l")
+    threads: list[str] = []
+    for element in elements[start:]:
+        if element.tag != "l":
+            instrumented.append(element)
+            continue
+
+        number += 1
+        index = timed.get((name, number))
+        if index is None:
+            instrumented.append(element)
+            continue
+
+        statement = lines[index].statement
+        callee = None
+        if lines[index].is_call:
+            callee = f"_ProfileCallee{index}"
+            statement = add_profile_output(CALL_PATTERN.match(statement), callee)
+
+        instrumented.append(create_line("count_seconds(_ProfileStart)"))
+        instrumented.append(create_line(statement))
+        instrumented.append(create_line("count_seconds(_ProfileEnd)"))
+        instrumented.append(
+            create_line(f"{PROFILE_VARIABLE}[{index}] := {PROFILE_VARIABLE}[{index}] + _ProfileEnd - _ProfileStart")
+        )
+        instrumented.append(create_line(f"{PROFILE_VARIABLE}[{count + index}] := {PROFILE_VARIABLE}[{count + index}] + 1"))
+
+        if callee and statement.startswith("par_start"):
+            threads.append(callee)
+        elif callee:
+            instrumented.append(create_line(f"{PROFILE_VARIABLE} := {PROFILE_VARIABLE} + {callee}"))
+
+        if lines[index].operator == "par_join":
+            for thread_callee in threads:
+                instrumented.append(create_line(f"{PROFILE_VARIABLE} := {PROFILE_VARIABLE} + {thread_callee}"))
+            threads = []
+
+    body.extend(instrumented)
+
+
+class ProgramProfile:
+    """
+    Line times of a program accumulated over the profiled executions.
+
+    Attributes:
+        program_path (str): Path to the .hdev program.
+        instrumented_path (str): Path of the instrumented copy.
+        lines (list[ProfiledLine]): The timed lines, by index.
+        times (list[float]): Seconds spent in each line.
+        counts (list[int]): Runs of each line.
+        executions (int): Profiled executions.
+        rejected (int): Executions whose times did not match the lines, such as simulated ones.
+    """
+
+    def __init__(self, program_path: str, instrumented_path: str):
+
+        self.program_path = program_path
+        self.instrumented_path = instrumented_path
+        self.lines = instrument_program(program_path, instrumented_path)
+        self.times = [0.0] * len(self.lines)
+        self.counts = [0] * len(self.lines)
+        self.executions = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def record(self, values: list) -> None:
+        """Adds the ProfileTimes output of an execution."""
+
+        count = len(self.lines)
+        with self.lock:
+            if not isinstance(values, (list, tuple)) or len(values) != 2 * count:
+                self.rejected += 1
+                return
+            for index in range(count):
+                self.times[index] += float(values[index])
+                self.counts[index] += int(values[count + index])
+            self.executions += 1
+
+    def get_report(self) -> dict:
+        """
+        Returns the lines of each procedure ranked by the time spent in them.
+
+        Returns:
+            dict: Per procedure name, its total time and its lines with the operator, statement, runs,
+                total and mean time and share of the procedure time, slowest first.
+        """
+
+        with self.lock:
+            times = list(self.times)
+            counts = list(self.counts)
+
+        procedures: dict[str, dict] = {}
+        for line, total, runs in zip(self.lines, times, counts):
+            if not runs:
+                continue
+            procedure = procedures.setdefault(line.procedure_name, {"total_time": 0.0, "lines": []})
+            procedure["total_time"] += total
+            procedure["lines"].append(
+                {
+                    "line": line.number,
+                    "operator": line.operator,
+                    "statement": line.statement,
+                    "call": line.is_call,
+                    "runs": runs,
+                    "total_time": total,
+                    "mean_time": total / runs,
+                }
+            )
+
+        for procedure in procedures.values():
+            procedure["lines"].sort(key=lambda line: line["total_time"], reverse=True)
+            for line in procedure["lines"]:
+                line["share"] = line["total_time"] / procedure["total_time"] if procedure["total_time"] > 0 else 0.0
+
+        return dict(sorted(procedures.items(), key=lambda item: item[1]["total_time"], reverse=True))
+
+
+class ProfiledProcedureCall:
+    """
+    Procedure call on the instrumented program, recording the line times of every execution.
+
+    The other methods are those of the wrapped call.
+    """
+
+    def __init__(self, call: ha.HDevProcedureCall, profile: ProgramProfile):
+
+        self.call = call
+        self.profile = profile
+
+    def execute(self) -> None:
+
+        self.call.execute()
+        self.profile.record(self.call.get_output_control_param_by_name(PROFILE_VARIABLE))
+
+    def __getattr__(self, name: str):
+
+        return getattr(self.call, name)
+
+
+class ProcedureProfiler:
+    """
+    Operator level profiler of the procedures of a camera over a window of triggers.
+
+    While active, the procedures run from instrumented copies of their programs, which report the
+    time of every line, and the camera counts the triggers. When the window is complete, or the
+    profiling is stopped, the procedures go back to their programs and a report ranking the lines
+    of every procedure is written as JSON and text.
+
+    Attributes:
+        name (str): Name of the camera.
+        report_directory (str): Directory the reports are written to.
+        profiles (dict[str, ProgramProfile]): Profile of each program, by program path.
+        window (int): Triggers to profile.
+        triggers (int): Triggers profiled so far.
+        start_time (float): Time the profiling started, in seconds since the epoch.
+        active (bool): Whether the procedures run from the instrumented programs.
+        report_path (str): Path of the last report written, or None.
+    """
+
+    def __init__(self, name: str, report_directory: str):
+
+        self.name = name
+        self.report_directory = report_directory
+        self.profiles: dict[str, ProgramProfile] = {}
+        self.window: int = 0
+        self.triggers: int = 0
+        self.start_time: float = 0
+        self.active = False
+        self.report_path: str = None
+
+    def start(self, window: int) -> None:
+        """
+        Starts a new profiling window, the procedures must then be switched with set_profiler.
+
+        Args:
+            window (int): Triggers to profile.
+        """
+
+        if window < 1:
+            raise ValueError(f"Invalid profiling window: {window}")
+
+        self.profiles = {}
+        self.window = window
+        self.triggers = 0
+        self.start_time = time.time()
+        self.active = True
+
+    def get_profile(self, program_path: str) -> ProgramProfile:
+        """Returns the profile of a program, instrumenting it the first time."""
+
+        profile = self.profiles.get(program_path)
+        if profile is None:
+            name = os.path.splitext(os.path.basename(program_path))[0]
+            instrumented_path = os.path.join(INSTRUMENTED_DIRECTORY, self.name, f"{name}_{len(self.profiles)}.hdev")
+            profile = ProgramProfile(program_path, instrumented_path)
+            self.profiles[program_path] = profile
+        return profile
+
+    def create_call(self, program_path: str, procedure_name: str) -> ProfiledProcedureCall:
+        """
+        Creates a call of a procedure on the instrumented copy of its program.
+
+        Args:
+            program_path (str): Path to the .hdev program.
+            procedure_name (str): Name of the local procedure.
+
+        Returns:
+            ProfiledProcedureCall: The call, recording the line times of every execution.
+        """
+
+        profile = self.get_profile(program_path)
+        procedure = program_loader.get_procedure(profile.instrumented_path, procedure_name)
+        return ProfiledProcedureCall(ha.HDevProcedureCall(procedure), profile)
+
+    def record_trigger(self) -> bool:
+        """Counts a profiled trigger, returns True when the window is complete."""
+
+        self.triggers += 1
+        return self.triggers >= self.window
+
+    def stop(self) -> str:
+        """
+        Ends the profiling window and writes its report, the procedures must be switched back first.
+
+        Returns:
+            str: Path of the JSON report.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        self.active = False
+        report = self.get_report()
+
+        os.makedirs(self.report_directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.start_time)) + f"_{int(self.start_time * 1e3) % 1000:03d}"
+        path = os.path.join(self.report_directory, f"{self.name}_profile_{stamp}")
+        with open(f"{path}.json", "w") as file:
+            json.dump(report, file, indent=2)
+        with open(f"{path}.txt", "w") as file:
+            file.write(format_report(report))
+
+        self.report_path = f"{path}.json"
+        logger.info(f"Camera {self.name} profile of {self.triggers} triggers written to {self.report_path}")
+        return self.report_path
+
+    def get_report(self) -> dict:
+        """Returns the ranked lines of every procedure of every profiled program."""
+
+        return {
+            "camera": self.name,
+            "start_time": self.start_time,
+            "triggers": self.triggers,
+            "programs": {
+                path: {
+                    "executions": profile.executions,
+                    "rejected": profile.rejected,
+                    "procedures": profile.get_report(),
+                }
+                for path, profile in self.profiles.items()
+            },
+        }
+
+    def get_status(self) -> dict:
+        """Returns whether the profiling is active, its progress and the path of the last report."""
+
+        return {
+            "active": self.active,
+            "window": self.window,
+            "triggers": self.triggers,
+            "report_path": self.report_path,
+        }
+
+
+def format_report(report: dict, max_lines: int = 10) -> str:
+    """
+    Formats a profile report as text, the slowest lines of each procedure first.
+
+    Args:
+        report (dict): Report returned by ProcedureProfiler.get_report.
+        max_lines (int): Lines listed per procedure.
+
+    Returns:
+        str: The report.
+    """
+
+    text = [f"Camera {report['camera']}, {report['triggers']} triggers"]
+    for path, program in report["programs"].items():
+        text.append(f"\n{path}: {program['executions']} executions")
+        for procedure_name, procedure in program["procedures"].items():
+            text.append(f"  {procedure_name}: {procedure['total_time'] * 1e3:.2f} ms")
+            for line in procedure["lines"][:max_lines]:
+                text.append(
+                    f"    {line['share'] * 100:5.1f}% {line['total_time'] * 1e3:9.2f} ms {line['runs']:6d}x "
+                    f"line {line['line']:3d} {line['operator']}{' (calls)' if line['call'] else ''}"
+                )
+    return "\n".join(text) + "\n"
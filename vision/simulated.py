@@ -0,0 +1,570 @@
+###########EXTERNAL IMPORTS############
+
+import json
+import math
+import os
+import random
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+import numpy as np
+from PIL import Image
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.conversion import parse_output_type
+
+#######################################
+
+# Stands in for the halcon module when the simulated backend is selected (see vision/backend.py). It
+# implements the subset of the HALCON API used by the vision package: HDevEngine programs and
+# procedure calls, with outputs generated from the declared signatures after a simulated latency, and
+# the image operators used on acquired and rendered images, on NumPy arrays.
+
+# Environment variable with the path of a JSON simulation profile, merged over the default profile
+PROFILE_ENVIRONMENT_VARIABLE = "VISION_SIMULATION_PROFILE"
+
+# Default simulation profile:
+#   image: size and channels of the synthetic acquired images
+#   seed: seed of the generated latencies and outputs, or None for a random seed
+#   latency: latency distribution of the procedures without their own distribution
+#   procedures: per procedure name, a latency distribution and the outputs to generate, by name,
+#       either a constant list or {"range": [low, high]} or {"values": [...]} to draw from
+#       (outputs without a setting are drawn from their declared type, up to N elements for type[N])
+DEFAULT_PROFILE = {
+    "image": {"width": 2048, "height": 1536, "channels": 1},
+    "seed": None,
+    "latency": {"distribution": "lognormal", "mean": 0.01, "spread": 0.25},
+    "procedures": {
+        "OpenCamera": {"latency": {"distribution": "constant", "mean": 0.0}},
+        "TriggerCamera": {"latency": {"distribution": "normal", "mean": 0.02, "spread": 0.002}},
+    },
+}
+
+# Number of synthetic images generated once and acquired in turn
+SYNTHETIC_IMAGE_COUNT = 4
+
+# Marker written at the start of the simulated shape model files, so HALCON fails to read them
+SHAPE_MODEL_MARKER = b"SIMULATED SHAPE MODEL\n"
+
+# HALCON pixel type of each array data type
+PIXEL_TYPES = {np.dtype(np.uint8): "byte", np.dtype(np.uint16): "uint2", np.dtype(np.float32): "real"}
+
+HTupleType = list
+
+
+class HOperatorError(Exception):
+    """Raised by the simulated operators, as HALCON does on operator errors."""
+
+
+class HObject:
+    """
+    Simulated iconic object: an image, a rectangular region, or a tuple of objects.
+
+    Attributes:
+        pixels (np.ndarray): Pixels of shape (height, width, channels), or None for a region.
+        rectangle (tuple[int, int, int, int]): Row and column of the corners of a region, or None.
+        objects (list[HObject]): Objects of a tuple, or None for a single object.
+        channels (dict[int, HObject]): Single channel copies returned by access_channel, kept with
+            the image so that their pixel pointers stay valid as long as the image.
+    """
+
+    def __init__(self, pixels: np.ndarray = None, rectangle: tuple = None, objects: list = None):
+
+        if pixels is not None and pixels.ndim == 2:
+            pixels = pixels[:, :, np.newaxis]
+        self.pixels = np.ascontiguousarray(pixels) if pixels is not None else None
+        self.rectangle = rectangle
+        self.objects = objects
+        self.channels: dict[int, HObject] = {}
+
+    def get_objects(self) -> list:
+        """Returns the objects of a tuple, or the object itself."""
+
+        return self.objects if self.objects is not None else [self]
+
+    def get_image(self) -> np.ndarray:
+        """Returns the pixels of the image, raising an operator error for regions."""
+
+        if self.pixels is None:
+            raise HOperatorError("Object is not an image")
+        return self.pixels
+
+
+class LatencyModel:
+    """
+    Distribution of the latency of a simulated procedure.
+
+    Distributions: constant (mean), uniform (mean +/- spread), normal (mean and standard deviation
+    spread, clipped at 0) and lognormal (median mean and shape spread).
+    """
+
+    def __init__(self, distribution: str = "constant", mean: float = 0.0, spread: float = 0.0):
+
+        if distribution not in ("constant", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.mean = float(mean)
+        self.spread = float(spread)
+
+    def sample(self, generator: random.Random) -> float:
+        """Returns a latency in seconds."""
+
+        if self.distribution == "uniform":
+            return max(generator.uniform(self.mean - self.spread, self.mean + self.spread), 0.0)
+        if self.distribution == "normal":
+            return max(generator.gauss(self.mean, self.spread), 0.0)
+        if self.distribution == "lognormal":
+            return self.mean * math.exp(generator.gauss(0.0, self.spread)) if self.mean > 0 else 0.0
+        return self.mean
+
+
+class Simulation:
+    """
+    Shared state of the simulated backend: the profile, the declared signatures and the generators.
+
+    Attributes:
+        profile (dict): Simulation profile, see DEFAULT_PROFILE.
+        signatures (dict[tuple[str, str], dict]): Iconic outputs and control output types declared
+            for each program path and procedure name.
+        seed (int): Seed of the generators, drawn once when the profile has none.
+        generators (dict[str, random.Random]): Generator of the latencies and outputs of each
+            procedure, so that the sequence of a procedure does not depend on the threads of the others.
+        images (list[HObject]): Synthetic images acquired in turn.
+        acquisitions (int): Number of images acquired.
+    """
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.signatures: dict[tuple[str, str], dict] = {}
+        self.configure(load_profile())
+
+    def configure(self, profile: dict) -> None:
+        """Sets the simulation profile, merged over the default profile."""
+
+        merged = json.loads(json.dumps(DEFAULT_PROFILE))
+        for key, value in profile.items():
+            if key == "procedures":
+                for procedure_name, settings in value.items():
+                    merged["procedures"].setdefault(procedure_name, {}).update(settings)
+            elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key].update(value)
+            else:
+                merged[key] = value
+
+        with self.lock:
+            self.profile = merged
+            self.seed = merged["seed"] if merged["seed"] is not None else random.randrange(2**32)
+            self.generators: dict[str, random.Random] = {}
+            self.images: list[HObject] = []
+            self.acquisitions = 0
+
+    def get_latency_model(self, procedure_name: str) -> LatencyModel:
+        """Returns the latency distribution of a procedure."""
+
+        settings = self.profile["procedures"].get(procedure_name, {}).get("latency", self.profile["latency"])
+        return LatencyModel(**settings)
+
+    def sample_latency(self, procedure_name: str) -> float:
+        """Returns a latency of a procedure, in seconds."""
+
+        model = self.get_latency_model(procedure_name)
+        with self.lock:
+            return model.sample(self.get_generator(procedure_name))
+
+    def get_generator(self, procedure_name: str) -> random.Random:
+        """Returns the generator of a procedure, must be called with the lock held."""
+
+        generator = self.generators.get(procedure_name)
+        if generator is None:
+            generator = self.generators[procedure_name] = random.Random(f"{self.seed}:{procedure_name}")
+        return generator
+
+    def acquire_image(self) -> HObject:
+        """Returns the next synthetic image, generating the set of images the first time."""
+
+        with self.lock:
+            if not self.images:
+                settings = self.profile["image"]
+                generator = np.random.default_rng(self.seed)
+                shape = (settings["height"], settings["width"], settings["channels"])
+                self.images = [
+                    HObject(generator.integers(0, 256, size=shape, dtype=np.uint8))
+                    for _ in range(SYNTHETIC_IMAGE_COUNT)
+                ]
+            image = self.images[self.acquisitions % len(self.images)]
+            self.acquisitions += 1
+            return image
+
+    def generate_output(self, procedure_name: str, variable_name: str, variable_type: str) -> list:
+        """Returns a control output of a procedure, from the profile or from its declared type."""
+
+        setting = self.profile["procedures"].get(procedure_name, {}).get("outputs", {}).get(variable_name)
+        element_type, length = parse_output_type(variable_type)
+
+        with self.lock:
+            generator = self.get_generator(procedure_name)
+            if isinstance(setting, list):
+                return list(setting)
+            if isinstance(setting, dict) and "range" in setting:
+                low, high = setting["range"]
+                value = generator.uniform(low, high)
+                return [int(round(value)) if element_type == "int" else value]
+            if isinstance(setting, dict) and "values" in setting:
+                return [generator.choice(setting["values"])]
+
+            if length:
+                return [
+                    self.generate_value(generator, procedure_name, variable_name, element_type)
+                    for _ in range(generator.randint(0, length))
+                ]
+            return [self.generate_value(generator, procedure_name, variable_name, element_type)]
+
+    def generate_value(self, generator: random.Random, procedure_name: str, variable_name: str, variable_type: str):
+        """Returns a value of a type, must be called with the lock held."""
+
+        if variable_type == "float":
+            return generator.random()
+        if variable_type == "int":
+            return generator.randint(0, 1)
+        if variable_type == "string":
+            return f"{variable_name}{generator.randint(0, 9)}"
+        if variable_type == "handle":
+            return f"{procedure_name}.{variable_name}"
+        return 0
+
+
+def load_profile() -> dict:
+    """Reads the simulation profile of the environment, or returns an empty profile."""
+
+    path = os.environ.get(PROFILE_ENVIRONMENT_VARIABLE)
+    if not path:
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+simulation = Simulation()
+
+
+def configure(profile: dict) -> None:
+    """Sets the simulation profile of the process, merged over the default profile."""
+
+    simulation.configure(profile)
+
+
+def declare_signature(
+    program_path: str, procedure_name: str, output_iconic: list[str], output_control: dict[str, str]
+) -> None:
+    """Declares the outputs of a procedure, merged with the outputs already declared for it."""
+
+    with simulation.lock:
+        signature = simulation.signatures.setdefault(
+            (program_path, procedure_name), {"output_iconic": [], "output_control": {}}
+        )
+        signature["output_iconic"] += [name for name in output_iconic if name not in signature["output_iconic"]]
+        signature["output_control"].update(output_control)
+
+
+class HDevEngine:
+    """Simulated HDevEngine, its attributes are accepted and ignored."""
+
+    def set_attribute(self, name: str, value) -> None:
+        pass
+
+
+class HDevProgram:
+    """
+    Simulated HDevelop program: the interface of every local procedure, parsed from the .hdev file.
+
+    Attributes:
+        program_path (str): Path to the .hdev program.
+        interfaces (dict[str, dict[str, list[str]]]): Parameter names of each procedure, by kind
+            (io, oo, ic, oc).
+    """
+
+    def __init__(self, program_path: str):
+
+        if not os.path.isfile(program_path):
+            raise HOperatorError(f"Program file not found: {program_path}")
+
+        self.program_path = program_path
+        self.interfaces: dict[str, dict[str, list[str]]] = {}
+        for procedure in ElementTree.parse(program_path).getroot().iter("procedure"):
+            interface = procedure.find("interface")
+            self.interfaces[procedure.get("name")] = {
+                kind: [
+                    parameter.get("name")
+                    for element in (interface.findall(kind) if interface is not None else [])
+                    for parameter in element
+                ]
+                for kind in ("io", "oo", "ic", "oc")
+            }
+
+
+class HDevProcedure:
+    """Simulated local procedure of a program."""
+
+    def __init__(self, program: HDevProgram, name: str):
+
+        self.program_path = program.program_path
+        self.name = name
+        self.interface = program.interfaces[name]
+
+    @classmethod
+    def load_local(cls, program: HDevProgram, name: str) -> "HDevProcedure":
+        """Loads a local procedure of a program."""
+
+        if name not in program.interfaces:
+            raise HOperatorError(f"Procedure {name} not found in {program.program_path}")
+        return cls(program, name)
+
+    def compile_used_procedures(self) -> None:
+        pass
+
+
+class HDevProcedureCall:
+    """
+    Simulated procedure call.
+
+    execute() sleeps for a latency drawn from the profile of the procedure, releasing the GIL as the
+    HALCON operators do, then generates the outputs: the acquisition procedure (an iconic output named
+    Image without iconic inputs) returns the synthetic images, other iconic outputs return the input
+    image, and control outputs are generated from the declared types or from the profile.
+    """
+
+    def __init__(self, procedure: HDevProcedure):
+
+        self.procedure = procedure
+        self.inputs: dict = {}
+        self.outputs: dict = {}
+
+    def set_input_iconic_param_by_name(self, name: str, value: HObject) -> None:
+        self.inputs[name] = value
+
+    def set_input_control_param_by_name(self, name: str, value) -> None:
+        self.inputs[name] = value
+
+    def execute(self) -> None:
+
+        name = self.procedure.name
+        signature = simulation.signatures.get(
+            (self.procedure.program_path, name), {"output_iconic": [], "output_control": {}}
+        )
+
+        time.sleep(simulation.sample_latency(name))
+
+        outputs = {}
+        input_image = next((value for value in self.inputs.values() if isinstance(value, HObject)), None)
+        for variable_name in dict.fromkeys(self.procedure.interface["oo"] + signature["output_iconic"]):
+            outputs[variable_name] = input_image if input_image is not None else simulation.acquire_image()
+
+        control_types = dict.fromkeys(self.procedure.interface["oc"], "float") | signature["output_control"]
+        for variable_name, variable_type in control_types.items():
+            outputs[variable_name] = simulation.generate_output(name, variable_name, variable_type)
+
+        self.outputs = outputs
+
+    def get_output_iconic_param_by_name(self, name: str) -> HObject:
+        return self.outputs.get(name)
+
+    def get_output_control_param_by_name(self, name: str) -> list:
+        return self.outputs.get(name, [])
+
+
+# System parameters, by name, with the default operator parallelism
+system_parameters = {"thread_num": os.cpu_count() or 1, "tsp_thread_num": os.cpu_count() or 1}
+
+
+def set_system(name: str, value) -> None:
+    """System parameters, such as the operator parallelism, are stored and change nothing else."""
+
+    system_parameters[name] = value
+
+
+def get_system(name: str) -> list:
+    """Returns the value of a system parameter."""
+
+    return [system_parameters.get(name, 0)]
+
+
+def read_image(path: str) -> HObject:
+    """Reads an image file."""
+
+    try:
+        with Image.open(path) as image:
+            return HObject(np.asarray(image))
+    except Exception as e:
+        raise HOperatorError(f"Could not read image {path}: {e}")
+
+
+def himage_as_numpy_array(image: HObject) -> np.ndarray:
+    """Returns the pixels of an image, of shape (height, width) or (height, width, channels)."""
+
+    pixels = image.get_image()
+    return pixels[:, :, 0] if pixels.shape[2] == 1 else pixels
+
+
+def get_image_type(image: HObject) -> list[str]:
+    return [PIXEL_TYPES.get(image.get_image().dtype, "real")]
+
+
+def convert_image_type(image: HObject, new_type: str) -> HObject:
+    if new_type != "byte":
+        raise HOperatorError(f"Unsupported image type: {new_type}")
+    return HObject(np.clip(image.get_image(), 0, 255).astype(np.uint8))
+
+
+def scale_image_max(image: HObject) -> HObject:
+    """Spreads the gray values of an image over the range of a byte image, with a lookup table for byte images."""
+
+    pixels = image.get_image()
+    low, high = float(pixels.min()), float(pixels.max())
+    if high <= low:
+        return HObject(pixels.copy())
+    if pixels.dtype == np.uint8:
+        table = np.clip((np.arange(256) - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+        return HObject(table[pixels])
+    return HObject(((pixels - low) * (255.0 / (high - low))).astype(pixels.dtype))
+
+
+def get_image_size_s(image: HObject) -> tuple[int, int]:
+    height, width, _ = image.get_image().shape
+    return width, height
+
+
+def count_channels(image: HObject) -> list[int]:
+    return [image.get_image().shape[2]]
+
+
+def access_channel(image: HObject, channel: int) -> HObject:
+    """Returns a channel of an image, kept with the image so that its pixels live as long as the image."""
+
+    pixels = image.get_image()
+    if pixels.shape[2] == 1:
+        return image
+    if channel not in image.channels:
+        image.channels[channel] = HObject(pixels[:, :, channel - 1])
+    return image.channels[channel]
+
+
+def get_image_pointer1(image: HObject) -> tuple[list[int], list[str], list[int], list[int]]:
+    channel = image.get_image()
+    height, width, _ = channel.shape
+    return [channel.ctypes.data], [PIXEL_TYPES.get(channel.dtype, "real")], [width], [height]
+
+
+def zoom_image_size(image: HObject, width: int, height: int, interpolation: str) -> HObject:
+    """Resizes an image with nearest neighbour interpolation."""
+
+    pixels = image.get_image()
+    rows = (np.arange(height) * pixels.shape[0] // height).astype(np.intp)
+    columns = (np.arange(width) * pixels.shape[1] // width).astype(np.intp)
+    return HObject(pixels[rows][:, columns])
+
+
+def crop_rectangle1(image: HObject, row1: int, column1: int, row2: int, column2: int) -> HObject:
+    return HObject(image.get_image()[row1 : row2 + 1, column1 : column2 + 1])
+
+
+def gen_rectangle1(row1: float, column1: float, row2: float, column2: float) -> HObject:
+    return HObject(rectangle=(row1, column1, row2, column2))
+
+
+def reduce_domain(image: HObject, region: HObject) -> HObject:
+    """Returns the image; the simulated operators always process the full image."""
+
+    return image
+
+
+def read_object(path: str) -> HObject:
+    """Returns a region covering the synthetic image; region files are not parsed."""
+
+    settings = simulation.profile["image"]
+    return HObject(rectangle=(0, 0, settings["height"] - 1, settings["width"] - 1))
+
+
+def gen_empty_obj() -> HObject:
+    return HObject(objects=[])
+
+
+def count_obj(objects: HObject) -> list[int]:
+    return [len(objects.get_objects())]
+
+
+def select_obj(objects: HObject, index) -> HObject:
+    """Selects an object of a tuple, or a tuple of objects for a list of indexes."""
+
+    items = objects.get_objects()
+    indexes = index if isinstance(index, (list, tuple)) else [index]
+    if any(not 1 <= item <= len(items) for item in indexes):
+        raise HOperatorError(f"Object index {index} out of range")
+    if isinstance(index, (list, tuple)):
+        return HObject(objects=[items[item - 1] for item in indexes])
+    return items[index - 1]
+
+
+def concat_obj(objects1: HObject, objects2: HObject) -> HObject:
+    return HObject(objects=objects1.get_objects() + objects2.get_objects())
+
+
+def move_region(region: HObject, row: int, column: int) -> HObject:
+    """Translates the regions of a tuple, images become the rectangle of their domain."""
+
+    moved = []
+    for item in region.get_objects():
+        row1, column1, row2, column2 = smallest_rectangle1_s(item)
+        moved.append(HObject(rectangle=(row1 + row, column1 + column, row2 + row, column2 + column)))
+    return moved[0] if region.objects is None else HObject(objects=moved)
+
+
+def smallest_rectangle1(regions: HObject) -> tuple[list, list, list, list]:
+    """Returns the corners of the bounding box of every region of a tuple."""
+
+    rectangles = [smallest_rectangle1_s(item) for item in regions.get_objects()]
+    return tuple(list(values) for values in zip(*rectangles)) if rectangles else ([], [], [], [])
+
+
+def sort_region(regions: HObject, sort_mode: str, order: str, row_or_col: str) -> HObject:
+    """Sorts the regions of a tuple by the top left corner of their bounding box."""
+
+    items = sorted(
+        regions.get_objects(),
+        key=lambda item: smallest_rectangle1_s(item)[:2] if row_or_col == "row" else smallest_rectangle1_s(item)[1::-1],
+        reverse=order != "true",
+    )
+    return HObject(objects=items)
+
+
+def get_region_runs(region: HObject) -> tuple[list[int], list[int], list[int]]:
+    """Returns the runs of a rectangular region, or of the full domain of an image."""
+
+    row1, column1, row2, column2 = (int(value) for value in smallest_rectangle1_s(region))
+    rows = list(range(row1, row2 + 1))
+    return rows, [column1] * len(rows), [column2] * len(rows)
+
+
+def smallest_rectangle1_s(region: HObject) -> tuple:
+    if region.rectangle is not None:
+        return region.rectangle
+    height, width, _ = region.get_image().shape
+    return 0, 0, height - 1, width - 1
+
+
+def create_shape_model(image: HObject, *parameters) -> str:
+    return "simulated shape model"
+
+
+def write_shape_model(model, path: str) -> None:
+    with open(path, "wb") as file:
+        file.write(SHAPE_MODEL_MARKER)
+
+
+def read_shape_model(path: str) -> str:
+    with open(path, "rb") as file:
+        if not file.read().startswith(SHAPE_MODEL_MARKER):
+            raise HOperatorError(f"Not a simulated shape model: {path}")
+    return "simulated shape model"
@@ -8,7 +8,9 @@ import logging
 #############LOCAL IMPORTS#############
 
 from vision.data.comm import VisionCommunication
-from vision.controller import VisionController
+from vision.controller import VisionController, DEFAULT_HEADLESS_DISPLAY_RATE
+from vision.executors import ResourceBudget
+from vision.profiling import DEFAULT_PROFILE_WINDOW
 from vision.data.variables import *
 from util.debug import LoggerManager
 
@@ -26,6 +28,27 @@ class VisionSystem:
         program_path (str): Path to the vision program.
         output_path (str): Path where the output data will be stored.
         init_program (int): Initial program to load.
+        pipelined (bool): If True, the next frame is acquired while the current one is processed.
+        worker_process (bool): If True, the camera runs in its own worker process, outside of the
+            main process GIL.
+        display_timeout (float): Seconds to wait for a display to complete before flagging a display error.
+        warmup_image_path (str): Reference image used to warm up every program at startup, or None
+            to only compile the programs.
+        history_spill_path (str): Memory-mapped file holding the images of the frame history, or None
+            to keep them in memory.
+        history_raw_images (bool): If True, the frame history keeps the raw image of every frame, not
+            only the overlays of the rendered frames.
+        camera_options (dict): Keyword arguments of the camera construct function selecting the modes
+            of the camera, such as the tiled pulley extraction or the final inspection search mode,
+            so a mode is chosen per camera without changing the program numbers used by the PLC.
+        burst_size (int): Number of frames processed per trigger, 1 for single frames.
+        headless_display_rate (float): Frames per second rendered while no viewer is subscribed to
+            the camera, 0 to render none.
+        budget (ResourceBudget): CPU budget of the camera: workers on the shared pool, CPU affinity and
+            HALCON threads, or None for the defaults.
+        max_prefetch_age (float): Seconds a frame prefetched in pipelined mode may wait for its trigger
+            before it is acquired again instead of being inspected, or None to scale it with the cycle
+            period.
     """
 
     def __init__(
@@ -37,6 +60,17 @@ class VisionSystem:
         camera_construct_function,
         register_size: int = 32,
         init_program: int = 0,
+        pipelined: bool = False,
+        worker_process: bool = False,
+        display_timeout: float = 5.0,
+        warmup_image_path: str = None,
+        history_spill_path: str = None,
+        burst_size: int = 1,
+        headless_display_rate: float = DEFAULT_HEADLESS_DISPLAY_RATE,
+        budget: ResourceBudget = None,
+        max_prefetch_age: float = None,
+        history_raw_images: bool = False,
+        camera_options: dict = None,
     ):
 
         logger = LoggerManager.get_logger(__name__)
@@ -48,6 +82,8 @@ class VisionSystem:
             self.program_path = program_path
             self.output_path = output_path
             self.init_program = init_program
+            self.pipelined = pipelined
+            self.worker_process = worker_process
             self.communication = VisionCommunication(name, register_size, init_program)
             self.controller = VisionController(
                 name,
@@ -56,6 +92,17 @@ class VisionSystem:
                 output_path,
                 camera_construct_function,
                 self.communication,
+                pipelined,
+                worker_process,
+                display_timeout,
+                warmup_image_path,
+                history_spill_path,
+                burst_size,
+                headless_display_rate,
+                budget,
+                max_prefetch_age,
+                history_raw_images,
+                camera_options,
             )
 
         except Exception as e:
@@ -77,6 +124,22 @@ class VisionSystem:
         except Exception as e:
             logger.error(f"{self.name}- Error initializing controller: {e}")
 
+    async def close(self) -> None:
+        """
+        Close the vision controller.
+
+        This method stops the camera work and releases the camera, its worker process and shared
+        memory included when it runs in one.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            await self.controller.close()
+
+        except Exception as e:
+            logger.error(f"{self.name}- Error closing controller: {e}")
+
     async def process_incoming_messages(self, message: dict) -> None:
         """
         Process incoming messages and route them based on their type.
@@ -149,6 +212,9 @@ class VisionSystem:
             if data == "connected":
                 await self.communication.inputs.send_all()
                 await self.communication.outputs.send_all()
+            elif data == "disconnected":
+                # The frontend is the single client of the WebSocket server, its viewer is gone
+                await self.controller.set_watched(False)
             else:
                 if data:
                     raise ValueError(f"Invalid data in status message: {data}")
@@ -187,6 +253,20 @@ class VisionSystem:
                 self.communication.inputs.program_number = int(message[VALUE_KEY])
             elif section == INPUTS_SECTION:
                 await self.handle_inputs_section(message)
+            elif section == STATISTICS_SECTION:
+                await self.handle_statistics_section(message)
+            elif section == FRAME_SECTION:
+                await self.handle_frame_section(message)
+            elif section == HISTORY_SECTION:
+                await self.handle_history_section(message)
+            elif section == CONTINUOUS_SECTION:
+                await self.handle_continuous_section(message)
+            elif section == BURST_SECTION:
+                await self.handle_burst_section(message)
+            elif section == VIEWER_SECTION:
+                await self.handle_viewer_section(message)
+            elif section == PROFILING_SECTION:
+                await self.handle_profiling_section(message)
             else:
                 if section:
                     raise ValueError(f"Invalid section in request message: {section}")
@@ -370,6 +450,251 @@ class VisionSystem:
         except Exception as e:
             logger.error(f"{self.name}- Error processing inputs section: {e}")
 
+    async def handle_statistics_section(self, message: dict) -> None:
+        """
+        Handle statistics section requests from the request message.
+
+        Args:
+            message (dict): The statistics section message.
+                For latency windows: DATA_KEY is 'window' and VALUE_KEY the window length in seconds
+                For resetting the latency histograms: DATA_KEY is 'reset'
+
+        Raises:
+            ValueError: If the statistics data or window length is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "window":
+                seconds = float(message.get(VALUE_KEY))
+                if seconds <= 0:
+                    raise ValueError(f"Invalid latency window: {seconds}")
+
+                latency = await self.controller.get_latency_window(seconds)
+                await self.communication.outputs.send_latency_window({"seconds": seconds, LATENCY: latency})
+            elif data_key == "reset":
+                await self.controller.reset_latency_statistics()
+            else:
+                raise ValueError(f"Invalid data key in statistics section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing statistics section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing statistics section: {e}")
+
+    async def handle_frame_section(self, message: dict) -> None:
+        """
+        Handle frame section requests from the request message.
+
+        Args:
+            message (dict): The frame section message.
+                For a full resolution rendition: DATA_KEY is 'full' and VALUE_KEY optionally the
+                crop region as [row1, column1, row2, column2]
+
+        Raises:
+            ValueError: If the frame data or the crop region is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "full":
+                region = message.get(VALUE_KEY)
+                if region:
+                    if len(region) != 4:
+                        raise ValueError(f"Invalid crop region: {region}")
+                    region = [int(value) for value in region]
+                else:
+                    region = None
+
+                if not await self.controller.send_full_frame(region):
+                    logger.warning(f"{self.name}- No full resolution frame available to send")
+            else:
+                raise ValueError(f"Invalid data key in frame section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing frame section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing frame section: {e}")
+
+    async def handle_history_section(self, message: dict) -> None:
+        """
+        Handle history section requests from the request message.
+
+        Args:
+            message (dict): The history section message.
+                For the summary of the frames in the history: DATA_KEY is 'list'
+                For a frame by id: DATA_KEY is 'frame' and VALUE_KEY the frame id
+                For the last frame at or before a time: DATA_KEY is 'time' and VALUE_KEY the time
+                    in seconds since the epoch
+                For the raw image of a frame: DATA_KEY is 'raw' and VALUE_KEY the frame id
+
+        Raises:
+            ValueError: If the history data or value is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "list":
+                await self.communication.outputs.send_history(await self.controller.get_history())
+                return
+            elif data_key == "frame":
+                summary = await self.controller.send_history_frame(frame_id=int(message.get(VALUE_KEY)))
+            elif data_key == "time":
+                summary = await self.controller.send_history_frame(timestamp=float(message.get(VALUE_KEY)))
+            elif data_key == "raw":
+                summary = await self.controller.send_history_frame(frame_id=int(message.get(VALUE_KEY)), raw=True)
+            else:
+                raise ValueError(f"Invalid data key in history section: {data_key}")
+
+            if summary is None:
+                raise ValueError(f"Frame not in the history: {message.get(VALUE_KEY)}")
+            await self.communication.outputs.send_history_frame(summary)
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing history section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing history section: {e}")
+
+    async def handle_continuous_section(self, message: dict) -> None:
+        """
+        Handle continuous mode requests from the request message.
+
+        Args:
+            message (dict): The continuous section message.
+                For starting the continuous mode: DATA_KEY is 'start' and VALUE_KEY optionally the
+                rate in frames per second, 0 or missing to run as fast as possible
+                For stopping the continuous mode: DATA_KEY is 'stop'
+
+        Raises:
+            ValueError: If the continuous data or rate is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "start":
+                await self.controller.start_continuous(float(message.get(VALUE_KEY) or 0.0))
+            elif data_key == "stop":
+                await self.controller.stop_continuous()
+            else:
+                raise ValueError(f"Invalid data key in continuous section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing continuous section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing continuous section: {e}")
+
+    async def handle_burst_section(self, message: dict) -> None:
+        """
+        Handle burst requests from the request message.
+
+        Args:
+            message (dict): The burst section message.
+                For setting the burst size: DATA_KEY is 'size' and VALUE_KEY the number of frames
+                processed per trigger, 1 to disable bursts
+
+        Raises:
+            ValueError: If the burst data or size is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "size":
+                await self.controller.set_burst_size(int(message[VALUE_KEY]))
+            else:
+                raise ValueError(f"Invalid data key in burst section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing burst section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing burst section: {e}")
+
+    async def handle_viewer_section(self, message: dict) -> None:
+        """
+        Handle viewer subscriptions from the request message.
+
+        Args:
+            message (dict): The viewer section message.
+                For subscribing to the frames of the camera: DATA_KEY is 'subscribe'
+                For unsubscribing: DATA_KEY is 'unsubscribe'
+
+        Raises:
+            ValueError: If the viewer data is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "subscribe":
+                await self.controller.set_watched(True)
+            elif data_key == "unsubscribe":
+                await self.controller.set_watched(False)
+            else:
+                raise ValueError(f"Invalid data key in viewer section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing viewer section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing viewer section: {e}")
+
+    async def handle_profiling_section(self, message: dict) -> None:
+        """
+        Handle operator profiling requests from the request message.
+
+        Args:
+            message (dict): The profiling section message.
+                For profiling the next triggers: DATA_KEY is 'start' and VALUE_KEY optionally the
+                number of triggers to profile
+                For stopping the profiling before the window is complete: DATA_KEY is 'stop'
+                For the report of the active or last window: DATA_KEY is 'report'
+
+        Raises:
+            ValueError: If the profiling data or window is invalid.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+
+            data_key = message.get(DATA_KEY)
+
+            if data_key == "start":
+                window = message.get(VALUE_KEY)
+                await self.controller.start_profiling(int(window) if window else DEFAULT_PROFILE_WINDOW)
+            elif data_key == "stop":
+                await self.controller.stop_profiling()
+            elif data_key == "report":
+                await self.controller.send_profiling_report()
+            else:
+                raise ValueError(f"Invalid data key in profiling section: {data_key}")
+
+        except ValueError as e:
+            logger.error(f"{self.name}- Value Error when processing profiling section: {e}")
+        except Exception as e:
+            logger.error(f"{self.name}- Error processing profiling section: {e}")
+
     def convert_string_to_bool(self, value: str) -> bool:
         """
         Convert a string representation of a boolean value to a boolean.
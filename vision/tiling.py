@@ -0,0 +1,295 @@
+###########EXTERNAL IMPORTS############
+
+import concurrent.futures
+import queue
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import VisionProcedure, initialize_procedure, get_first
+from vision.loader import program_loader
+
+#######################################
+
+# Largest extent in pixels of a ring, the outer rings are selected up to an outer radius of 250
+MAX_RING_EXTENT = 502
+
+# Pixels next to a tile cut whose results can differ from the full image: the 5x5 filters and the
+# erosion and dilation of the outer rings by a circle of radius 17.5
+TILE_BORDER = 48
+
+# Ring outputs of the tile procedure, merged before the measurement
+RING_VARIABLES = ["PulleyInnerRings", "PulleyOuterRings"]
+
+
+class Tile:
+    """
+    Part of an image processed on its own.
+
+    The cores of the tiles partition the image, and each tile is its core extended by the border
+    on the top and left, and by the largest ring extent and the border on the bottom and right.
+    A ring is owned by the tile whose core holds the top left corner of its bounding box, so it
+    lies inside that tile, far enough from the cuts to be extracted as in the full image.
+
+    Attributes:
+        core (tuple[int, int, int, int]): Row and column of the corners of the core.
+        bounds (tuple[int, int, int, int]): Row and column of the corners of the tile, in the image.
+        cuts (tuple[bool, bool, bool, bool]): Whether the top, left, bottom and right sides of the
+            tile are cut from the image, rather than image borders.
+    """
+
+    def __init__(self, core: tuple, height: int, width: int, extent: int, border: int):
+
+        row1, column1, row2, column2 = core
+        self.core = core
+        self.bounds = (
+            max(row1 - border, 0),
+            max(column1 - border, 0),
+            min(row2 + extent + border, height - 1),
+            min(column2 + extent + border, width - 1),
+        )
+        self.cuts = (
+            self.bounds[0] > 0,
+            self.bounds[1] > 0,
+            self.bounds[2] < height - 1,
+            self.bounds[3] < width - 1,
+        )
+
+
+def split_tiles(width: int, height: int, rows: int, columns: int, extent: int, border: int) -> list[Tile]:
+    """
+    Splits an image into a grid of overlapping tiles.
+
+    Args:
+        width (int): Width of the image.
+        height (int): Height of the image.
+        rows (int): Rows of the grid.
+        columns (int): Columns of the grid.
+        extent (int): Largest extent of an object, in pixels.
+        border (int): Pixels next to a cut whose results can differ from the full image.
+
+    Returns:
+        list[Tile]: The tiles, row by row.
+    """
+
+    row_edges = [height * index // rows for index in range(rows + 1)]
+    column_edges = [width * index // columns for index in range(columns + 1)]
+    return [
+        Tile(
+            (row_edges[row], column_edges[column], row_edges[row + 1] - 1, column_edges[column + 1] - 1),
+            height,
+            width,
+            extent,
+            border,
+        )
+        for row in range(rows)
+        for column in range(columns)
+        if row_edges[row + 1] > row_edges[row] and column_edges[column + 1] > column_edges[column]
+    ]
+
+
+class TiledPulleyProcedure(VisionProcedure):
+    """
+    Extracts the pulleys of an image split into overlapping tiles processed concurrently.
+
+    The gray values are spread over the whole image first, as the single pass does, then the inner
+    and outer rings of every tile are extracted concurrently (ExtractPulleyRings), each tile on its
+    own HDevProcedureCall. The rings of every tile are moved back to image coordinates, the rings
+    a tile does not own or that come too close to a cut are discarded, so each ring is kept once,
+    and the merged rings are sorted in the order the full image extraction returns them. The rings
+    are then measured once (MeasurePulleys), with the procedure the single pass uses.
+
+    The results are those of ExtractPulleys as long as no ring is larger than the ring extent the
+    tiles were built for, at the cost of extracting the overlaps twice.
+
+    Inputs:
+        Image: Image to search.
+        MinIntRadius, MaxIntRadius, MinExtRadius, MaxExtRadius (float): Inputs of ExtractPulleys.
+
+    Outputs:
+        Pulleys, CorrectRefPulleys, IncorrectRefPulleys, BestPulley: Regions of ExtractPulleys.
+        X, Y, CorrectRefCount, IncorrectRefCount, MinIntRadiusResult, MaxIntRadiusResult,
+        MinExtRadiusResult, MaxExtRadiusResult: Outputs of ExtractPulleys.
+
+    Attributes:
+        tile_rows (int): Rows of the tile grid.
+        tile_columns (int): Columns of the tile grid.
+        extent (int): Largest extent of a ring, in pixels.
+        border (int): Pixels next to a cut whose results can differ from the full image.
+        executor (concurrent.futures.Executor): Executor running the tiles, the lane of the camera
+            once set_executor is called.
+        calls (queue.Queue): Calls of the ring extraction available to the tiles, one per tile.
+        tile_count (int): Tiles of the last execution.
+        speed_up (float): Sum of the tile times over the wall time of the ring extraction.
+    """
+
+    def __init__(
+        self,
+        program_directory: str,
+        name: str,
+        output_control: dict[str, str],
+        tile_rows: int = 2,
+        tile_columns: int = 2,
+        extent: int = MAX_RING_EXTENT,
+        border: int = TILE_BORDER,
+        ring_procedure_name: str = "ExtractPulleyRings",
+        measure_procedure_name: str = "MeasurePulleys",
+    ):
+
+        super().__init__(
+            program_directory=program_directory,
+            name=name,
+            input_iconic_variables=["Image"],
+            output_iconic_variables=["Pulleys", "CorrectRefPulleys", "IncorrectRefPulleys", "BestPulley"],
+            input_control_variables=["MinIntRadius", "MaxIntRadius", "MinExtRadius", "MaxExtRadius"],
+            input_control_types=["float", "float", "float", "float"],
+            output_control_variables=list(output_control),
+            output_control_types=list(output_control.values()),
+            procedure_name=measure_procedure_name,
+        )
+
+        self.tile_rows = tile_rows
+        self.tile_columns = tile_columns
+        self.extent = extent
+        self.border = border
+        self.ring_procedure_name = ring_procedure_name
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=tile_rows * tile_columns)
+
+        self.calls: queue.Queue = queue.Queue()
+        for _ in range(tile_rows * tile_columns):
+            self.calls.put(initialize_procedure(self.program_directory, self.ring_procedure_name))
+
+        self.tile_count: int = 0
+        self.speed_up: float = 1.0
+
+    def compile(self):
+        """JIT compile the ring extraction and the measurement."""
+
+        super().compile()
+        program_loader.get_procedure(self.program_directory, self.ring_procedure_name).compile_used_procedures()
+
+    def extract_rings(self, image: ha.HObject, tile: Tile) -> tuple[list[ha.HObject], int]:
+        """
+        Extracts the rings of a tile and keeps those the tile owns, in image coordinates.
+
+        Args:
+            image (ha.HObject): Image with the gray values spread over the whole image.
+            tile (Tile): Tile to process.
+
+        Returns:
+            tuple: The owned inner rings and outer rings, and the duration in nanoseconds.
+        """
+
+        call: ha.HDevProcedureCall = self.calls.get()
+        try:
+            start_time = time.perf_counter_ns()
+            row1, column1, row2, column2 = tile.bounds
+            call.set_input_iconic_param_by_name("ImageEnhanced", ha.crop_rectangle1(image, row1, column1, row2, column2))
+            call.execute()
+            rings = [
+                self.select_owned(call.get_output_iconic_param_by_name(variable_name), tile)
+                for variable_name in RING_VARIABLES
+            ]
+            return rings, time.perf_counter_ns() - start_time
+        finally:
+            self.calls.put(call)
+
+    def select_owned(self, regions: ha.HObject, tile: Tile) -> ha.HObject:
+        """
+        Moves the regions of a tile to image coordinates and keeps those the tile owns.
+
+        Args:
+            regions (ha.HObject): Regions extracted from the tile, in tile coordinates.
+            tile (Tile): Tile the regions were extracted from.
+
+        Returns:
+            ha.HObject: The regions owned by the tile and far enough from its cuts, in image coordinates.
+        """
+
+        tile_row, tile_column, tile_row2, tile_column2 = tile.bounds
+        core_row1, core_column1, core_row2, core_column2 = tile.core
+        cut_top, cut_left, cut_bottom, cut_right = tile.cuts
+
+        moved = ha.move_region(regions, tile_row, tile_column)
+        rows1, columns1, rows2, columns2 = ha.smallest_rectangle1(moved)
+
+        owned = []
+        for index, (row1, column1, row2, column2) in enumerate(zip(rows1, columns1, rows2, columns2), start=1):
+            if not (core_row1 <= row1 <= core_row2 and core_column1 <= column1 <= core_column2):
+                continue
+            if (
+                (cut_top and row1 < tile_row + self.border)
+                or (cut_left and column1 < tile_column + self.border)
+                or (cut_bottom and row2 > tile_row2 - self.border)
+                or (cut_right and column2 > tile_column2 - self.border)
+            ):
+                continue
+            owned.append(index)
+
+        return ha.select_obj(moved, owned) if owned else ha.gen_empty_obj()
+
+    def execute(self):
+        """Extracts the rings of every tile concurrently, merges them and measures the pulleys."""
+
+        start_time = time.perf_counter_ns()
+        image = self.input_iconic["Image"]
+        enhanced = ha.scale_image_max(image)
+        width, height = (get_first(value) for value in ha.get_image_size_s(image))
+
+        tiles = split_tiles(width, height, self.tile_rows, self.tile_columns, self.extent, self.border)
+        futures = [self.executor.submit(self.extract_rings, enhanced, tile) for tile in tiles]
+
+        merged = [ha.gen_empty_obj() for _ in RING_VARIABLES]
+        tile_time = 0
+        for future in futures:
+            rings, duration = future.result()
+            tile_time += duration
+            merged = [ha.concat_obj(regions, tile_regions) for regions, tile_regions in zip(merged, rings)]
+
+        wall_time = time.perf_counter_ns() - start_time
+        self.tile_count = len(tiles)
+        self.speed_up = tile_time / wall_time if wall_time > 0 else 1.0
+
+        # The extraction returns the rings in the order of their first point, row by row
+        for variable_name, regions in zip(RING_VARIABLES, merged):
+            self.procedure.set_input_iconic_param_by_name(
+                variable_name, ha.sort_region(regions, "first_point", "true", "row")
+            )
+        for variable_name in self.input_control_variables:
+            self.procedure.set_input_control_param_by_name(variable_name, self.input_control[variable_name])
+
+        self.procedure.execute()
+        self.get_output_variables()
+
+    def set_profiler(self, profiler=None):
+        """Run the measurement and the ring extraction of every tile from the instrumented program, or back."""
+
+        super().set_profiler(profiler)
+
+        calls: queue.Queue = queue.Queue()
+        for _ in range(self.tile_rows * self.tile_columns):
+            if profiler is not None:
+                calls.put(profiler.create_call(self.program_directory, self.ring_procedure_name))
+            else:
+                calls.put(initialize_procedure(self.program_directory, self.ring_procedure_name))
+        self.calls = calls
+
+    def set_executor(self, executor: concurrent.futures.Executor):
+        """Run the tiles in the executor of the camera instead of a pool of their own."""
+
+        if executor is not self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = executor
+
+    def get_speed_up(self) -> float:
+        """Return the parallel speed-up of the ring extraction of the last execution."""
+
+        return self.speed_up
+
+    def get_program_statistics(self) -> dict:
+        """Return the tiles of the last execution."""
+
+        return {"tiles": self.tile_count}
@@ -0,0 +1,196 @@
+###########EXTERNAL IMPORTS############
+
+import time
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.backend import ha
+from vision.procedure import VisionProcedure, get_first
+from util.debug import LoggerManager
+
+#######################################
+
+# Outputs of the single reference procedure
+INSPECTION_OUTPUTS = ["Angle", "Score", "OK", "NOK", "X", "Y", "Ref", "Width", "Height"]
+
+# Half size, in pixels, of the search window around the last pose when no margin is given
+DEFAULT_SEARCH_MARGIN = 150.0
+
+# Angle tolerance, in radians, around the last angle when no tolerance is given
+DEFAULT_ANGLE_TOLERANCE = 0.005
+
+# Weight of the last full frame search in the running average of the full frame search time
+FULL_SEARCH_TIME_WEIGHT = 0.1
+
+
+class TrackingProcedure(VisionProcedure):
+    """
+    Runs the single reference procedure in a window around the pose of the last good result.
+
+    When the previous trigger found the part, the image domain is reduced to a window around its
+    X/Y and the angle range is narrowed around its angle. If the part is not found in the window
+    (a miss), the procedure falls back to a full frame search with the requested angle range, so
+    the results are the same as the untracked procedure, only faster on hits.
+
+    Inputs:
+        Image: Image to search.
+        ProgramNumber (int): Index of the model to search.
+        MinAngle (float): Start of the angle range of the full frame search.
+        MaxAngle (float): Extent of the angle range of the full frame search.
+        MinScore (float): Minimum score of a match.
+        SearchMargin (float): Half size in pixels of the tracking window, 0 for the default.
+        AngleTolerance (float): Angle tolerance in radians around the last angle, 0 for the default.
+
+    Outputs:
+        Angle, Score, OK, NOK, X, Y, Ref, Width, Height: Outputs of the single reference procedure.
+        Tracked (int): 1 if the result was found in the tracking window, 0 for a full frame search.
+
+    Attributes:
+        last_pose (tuple[float, float, float]): Row, column and angle of the last good result, or None.
+        hits (int): Tracked searches that found the part.
+        misses (int): Tracked searches that fell back to a full frame search.
+        full_search_time (float): Running average of the full frame search time in seconds.
+        time_saved (float): Estimated time saved by the hits, compared to full frame searches, in seconds.
+    """
+
+    def __init__(self, program_directory: str, name: str, reference_procedure_name: str = "Inspection"):
+
+        super().__init__(
+            program_directory=program_directory,
+            name=name,
+            input_iconic_variables=["Image"],
+            output_iconic_variables=[],
+            input_control_variables=[
+                "ProgramNumber",
+                "MinAngle",
+                "MaxAngle",
+                "MinScore",
+                "SearchMargin",
+                "AngleTolerance",
+            ],
+            input_control_types=["int", "float", "float", "float", "float", "float"],
+            output_control_variables=INSPECTION_OUTPUTS + ["Tracked"],
+            output_control_types=["float", "float", "int", "int", "float", "float", "string", "float", "float"]
+            + ["int"],
+            procedure_name=reference_procedure_name,
+        )
+
+        self.last_pose: tuple[float, float, float] = None
+        self.hits: int = 0
+        self.misses: int = 0
+        self.full_search_time: float = 0
+        self.time_saved: float = 0
+
+    def search(self, image: ha.HObject, angle_start, angle_extent) -> dict:
+        """
+        Runs the single reference procedure on an image with the given angle range.
+
+        Returns:
+            dict: The outputs of the single reference procedure.
+        """
+
+        self.procedure.set_input_iconic_param_by_name("Image", image)
+        self.procedure.set_input_control_param_by_name("ProgramNumber", self.input_control["ProgramNumber"])
+        self.procedure.set_input_control_param_by_name("MinAngle", angle_start)
+        self.procedure.set_input_control_param_by_name("MaxAngle", angle_extent)
+        self.procedure.set_input_control_param_by_name("MinScore", self.input_control["MinScore"])
+        self.procedure.execute()
+
+        return {
+            variable_name: self.procedure.get_output_control_param_by_name(variable_name)
+            for variable_name in INSPECTION_OUTPUTS
+        }
+
+    def search_tracked(self) -> dict:
+        """Searches the window around the last pose, returning the outputs on a hit or None on a miss."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        row, column, angle = self.last_pose
+        margin = float(get_first(self.input_control["SearchMargin"], 0.0) or DEFAULT_SEARCH_MARGIN)
+        tolerance = float(get_first(self.input_control["AngleTolerance"], 0.0) or DEFAULT_ANGLE_TOLERANCE)
+        angle_start = float(get_first(self.input_control["MinAngle"], 0.0))
+        angle_end = angle_start + float(get_first(self.input_control["MaxAngle"], 0.0))
+
+        window_start = max(angle_start, angle - tolerance)
+        window_end = min(angle_end, angle + tolerance)
+        if window_end < window_start:
+            return None
+
+        try:
+            window = ha.gen_rectangle1(row - margin, column - margin, row + margin, column + margin)
+            outputs = self.search(
+                ha.reduce_domain(self.input_iconic["Image"], window), window_start, window_end - window_start
+            )
+        except Exception as e:
+            logger.debug(f"Tracked search failed in {self.name}: {e}")
+            return None
+
+        if get_first(outputs["OK"], 0) != 1:
+            return None
+        return outputs
+
+    def execute(self):
+        """Searches around the last pose, or the full frame on a miss, and records the tracking statistics."""
+
+        outputs = None
+
+        if self.last_pose is not None:
+            start_time = time.perf_counter()
+            outputs = self.search_tracked()
+            tracked_time = time.perf_counter() - start_time
+
+            if outputs is not None:
+                self.hits += 1
+                if self.full_search_time > 0:
+                    self.time_saved += self.full_search_time - tracked_time
+            else:
+                self.misses += 1
+
+        tracked = outputs is not None
+        if not tracked:
+            start_time = time.perf_counter()
+            outputs = self.search(
+                self.input_iconic["Image"], self.input_control["MinAngle"], self.input_control["MaxAngle"]
+            )
+            self.update_full_search_time(time.perf_counter() - start_time)
+
+        for variable_name in INSPECTION_OUTPUTS:
+            self.output_control[variable_name] = outputs[variable_name]
+        self.output_control["Tracked"] = [int(tracked)]
+
+        if get_first(outputs["OK"], 0) == 1:
+            self.last_pose = (
+                float(get_first(outputs["Y"])),
+                float(get_first(outputs["X"])),
+                float(get_first(outputs["Angle"])),
+            )
+        else:
+            self.last_pose = None
+
+    def update_full_search_time(self, elapsed_time: float) -> None:
+        """Updates the running average of the full frame search time."""
+
+        if self.full_search_time == 0:
+            self.full_search_time = elapsed_time
+        else:
+            self.full_search_time += FULL_SEARCH_TIME_WEIGHT * (elapsed_time - self.full_search_time)
+
+    def warm_up(self):
+        """Runs a full frame search once, without recording statistics or keeping the pose."""
+
+        self.search(self.input_iconic["Image"], self.input_control["MinAngle"], self.input_control["MaxAngle"])
+
+    def get_program_statistics(self) -> dict:
+        """Return the hits, misses, hit ratio and time saved by the tracking."""
+
+        attempts = self.hits + self.misses
+        return {
+            "tracking_hits": self.hits,
+            "tracking_misses": self.misses,
+            "tracking_hit_ratio": self.hits / attempts if attempts else 0.0,
+            "tracking_time_saved": self.time_saved,
+            "full_search_time": self.full_search_time,
+        }
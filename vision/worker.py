@@ -0,0 +1,787 @@
+###########EXTERNAL IMPORTS############
+
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+import concurrent.futures
+import threading
+import itertools
+import struct
+
+#######################################
+
+#############LOCAL IMPORTS#############
+
+from vision.camera import VisionCamera
+from vision.loader import create_timed_camera
+from vision.executors import ResourceBudget, apply_thread_settings
+from util.debug import LoggerManager
+
+#######################################
+
+# Default size of the shared memory block used to hand the encoded frames over (64 MB)
+DEFAULT_IMAGE_BUFFER_SIZE = 64 * 1024 * 1024
+
+# Seconds to wait for the reply of a call to the worker process
+DEFAULT_CALL_TIMEOUT = 30.0
+
+# Seconds to wait for the worker process to load and warm up the camera procedures
+INIT_CALL_TIMEOUT = 600.0
+
+# Message kinds sent from the worker process to the main process
+REPLY_MESSAGE = "reply"
+DISPLAY_MESSAGE = "display"
+
+# Camera methods that can be called remotely
+REMOTE_METHODS = {
+    "init",
+    "set_active_program",
+    "set_prefetch",
+    "execute_program",
+    "execute_burst",
+    "set_program_input",
+    "set_display_demand",
+    "get_program_input_variables",
+    "get_program_output_variables",
+    "get_latency_statistics",
+    "get_latency_window",
+    "reset_latency_statistics",
+    "get_encoded_frame",
+    "get_full_frame",
+    "get_history",
+    "get_history_frame",
+    "start_profiling",
+    "stop_profiling",
+    "get_profiling_status",
+    "get_profiling_report",
+}
+
+# Camera methods returning a key and an encoded frame, handed over through the shared memory block
+FRAME_METHODS = {"get_encoded_frame", "get_full_frame", "get_history_frame"}
+
+
+class SharedImageBuffer:
+    """
+    Single-slot shared memory block used to hand the encoded frames read by the main process
+    (preview, full resolution and history frames) from a camera worker process without pickling
+    them through the pipe.
+
+    The block starts with a header (sequence and payload size) followed by the JPEG. The sequence
+    is odd while the worker is writing; the reply of the call gives the sequence of its frame, so
+    the reader detects frames overwritten or torn in the meantime.
+
+    Attributes:
+        memory (shared_memory.SharedMemory): The shared memory block.
+        owner (bool): True if this instance created the block and must unlink it.
+        sequence (int): Sequence of the last frame written.
+    """
+
+    HEADER = struct.Struct("<QQ")
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+
+        self.memory = memory
+        self.owner = owner
+        self.sequence = 0
+
+    @classmethod
+    def create(cls, size: int) -> "SharedImageBuffer":
+        """Creates a new shared memory block able to hold `size` bytes of frame data."""
+
+        memory = shared_memory.SharedMemory(create=True, size=cls.HEADER.size + size)
+        memory.buf[: cls.HEADER.size] = bytes(cls.HEADER.size)
+        return cls(memory, True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedImageBuffer":
+        """Attaches to an existing shared memory block by name."""
+
+        return cls(shared_memory.SharedMemory(name=name), False)
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the shared memory block."""
+
+        return self.memory.name
+
+    @property
+    def capacity(self) -> int:
+        """Returns the number of bytes available for frame data."""
+
+        return self.memory.size - self.HEADER.size
+
+    def write_frame(self, data: bytes) -> int | None:
+        """
+        Copies an encoded frame into the shared memory block.
+
+        Args:
+            data (bytes): The encoded frame.
+
+        Returns:
+            int: The sequence of the frame, or None if it does not fit in the block.
+        """
+
+        if len(data) > self.capacity:
+            return None
+
+        self.write_header(self.sequence + 1, len(data))
+        self.memory.buf[self.HEADER.size : self.HEADER.size + len(data)] = data
+        self.write_header(self.sequence + 1, len(data))
+        return self.sequence
+
+    def write_header(self, sequence: int, size: int) -> None:
+        """Writes the header of the block."""
+
+        self.sequence = sequence
+        self.HEADER.pack_into(self.memory.buf, 0, sequence, size)
+
+    def read_frame(self, sequence: int) -> bytes | None:
+        """
+        Reads an encoded frame from the shared memory block.
+
+        Args:
+            sequence (int): Sequence of the frame, given by the worker when it was written.
+
+        Returns:
+            bytes: The encoded frame, or None if another frame was written over it.
+        """
+
+        current, size = self.HEADER.unpack_from(self.memory.buf, 0)
+        if current != sequence:
+            return None
+
+        data = bytes(self.memory.buf[self.HEADER.size : self.HEADER.size + size])
+        if self.HEADER.unpack_from(self.memory.buf, 0)[0] != sequence:
+            return None
+        return data
+
+    def close(self) -> None:
+        """Closes the block, unlinking it if this instance created it."""
+
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def run_camera_worker(
+    connection: Connection,
+    name: str,
+    description: str,
+    program_path: str,
+    output_path: str,
+    create_camera,
+    pipelined: bool,
+    image_buffer_name: str,
+    warmup_image_path: str = None,
+    history_spill_path: str = None,
+    budget: ResourceBudget = None,
+    max_prefetch_age: float = None,
+    history_raw_images: bool = False,
+    camera_options: dict = None,
+) -> None:
+    """
+    Entry point of a camera worker process.
+
+    Builds the camera procedures and the VisionCamera inside the worker process and serves
+    the control calls received through the connection until it is closed. The CPU budget is
+    applied to the main thread first, so every thread of the process inherits its affinity.
+    """
+
+    logger = LoggerManager.get_logger(__name__)
+
+    camera = None
+    try:
+        if budget:
+            apply_thread_settings(budget)
+        open_procedure, trigger_procedure, process_procedures, display_procedures, startup_time = (
+            create_timed_camera(create_camera, program_path, camera_options)
+        )
+        camera = VisionCamera(
+            name,
+            description,
+            output_path,
+            open_procedure,
+            trigger_procedure,
+            process_procedures,
+            display_procedures,
+            pipelined,
+            startup_time,
+            warmup_image_path,
+            history_spill_path,
+            budget,
+            max_prefetch_age,
+            history_raw_images,
+        )
+    except Exception as e:
+        logger.error(f"Error creating camera {name} in worker process: {e}")
+
+    image_buffer = SharedImageBuffer.attach(image_buffer_name)
+    try:
+        VisionCameraWorker(camera, connection, image_buffer).serve()
+    finally:
+        if camera is not None:
+            camera.close()
+        image_buffer.close()
+
+
+class VisionCameraWorker:
+    """
+    Serves the control calls for a VisionCamera living in a worker process.
+
+    Calls are executed one at a time in the order they are received. After the calls that
+    change the camera state, a snapshot of that state is sent with the reply so the main
+    process can answer the camera getters without crossing the process boundary.
+
+    Attributes:
+        camera (VisionCamera): The camera owned by the worker process.
+        connection (Connection): Duplex connection to the main process.
+        image_buffer (SharedImageBuffer): Shared memory block where the encoded frames are written.
+        send_lock (threading.Lock): Serializes the messages sent to the main process.
+        display_sequence (int): Number of display jobs submitted by the camera.
+    """
+
+    def __init__(self, camera: VisionCamera, connection: Connection, image_buffer: SharedImageBuffer):
+
+        self.camera = camera
+        self.connection = connection
+        self.image_buffer = image_buffer
+        self.send_lock = threading.Lock()
+        self.display_sequence = 0
+
+    def serve(self) -> None:
+        """Receives and executes calls until the connection is closed."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        while True:
+            try:
+                call_id, method, args = self.connection.recv()
+            except (EOFError, OSError):
+                break
+
+            if method == "close":
+                break
+
+            try:
+                if self.camera is None:
+                    raise RuntimeError("Camera was not created in the worker process")
+                if method not in REMOTE_METHODS:
+                    raise ValueError(f"Method {method} can't be called remotely")
+
+                result = getattr(self.camera, method)(*args)
+
+                if method in ("execute_program", "execute_burst") and result:
+                    self.handle_executed_frame()
+                elif method in FRAME_METHODS and result is not None:
+                    result = self.publish_frame(result)
+
+                reply = (REPLY_MESSAGE, call_id, True, result, self.get_snapshot())
+            except Exception as e:
+                logger.error(f"Error executing {method} in camera worker: {e}")
+                reply = (REPLY_MESSAGE, call_id, False, str(e), None)
+
+            if call_id is not None:
+                self.send(reply)
+
+    def handle_executed_frame(self) -> None:
+        """Watches the display job of the executed frame."""
+
+        self.display_sequence += 1
+        sequence = self.display_sequence
+        display_future: concurrent.futures.Future = self.camera.display_future
+        display_future.add_done_callback(lambda future: self.send_display_result(sequence, future))
+
+    def publish_frame(self, result: tuple) -> tuple:
+        """
+        Writes the encoded frame of a frame method result into the shared memory block.
+
+        Args:
+            result (tuple): Frame id or summary of the frame, and its JPEG.
+
+        Returns:
+            tuple: The frame id or summary, and the sequence of the frame in the block, or the result
+                itself when the frame does not fit in the block and is sent through the pipe.
+        """
+
+        key, data = result
+        sequence = self.image_buffer.write_frame(data)
+        return result if sequence is None else (key, sequence)
+
+    def send_display_result(self, sequence: int, future: concurrent.futures.Future) -> None:
+        """Notifies the main process that a display job has finished or was dropped."""
+
+        success = future.exception() is None
+        self.send((DISPLAY_MESSAGE, sequence, success, success and future.result()))
+
+    def get_snapshot(self) -> dict:
+        """Returns the camera state mirrored by the main process."""
+
+        return {
+            "program_number": self.camera.get_program_number(),
+            "frame_id": self.camera.get_frame_id(),
+            "run_time": self.camera.get_run_time(),
+            "min_run_time": self.camera.get_min_run_time(),
+            "max_run_time": self.camera.get_max_run_time(),
+            "overlap": self.camera.get_overlap(),
+            "dropped_frames": self.camera.get_dropped_frames(),
+            "skipped_renders": self.camera.get_skipped_renders(),
+            "startup_time": self.camera.get_startup_time(),
+            "program_change_time": self.camera.get_program_change_time(),
+            "speed_up": self.camera.get_speed_up(),
+            "program_statistics": self.camera.get_program_statistics(),
+            "program_output": [
+                list(output) if output is not None else [] for output in self.camera.get_program_output()
+            ],
+            "display_sequence": self.display_sequence,
+        }
+
+    def send(self, message: tuple) -> None:
+        """Sends a message to the main process."""
+
+        with self.send_lock:
+            self.connection.send(message)
+
+
+class RemoteVisionCamera:
+    """
+    Main process proxy of a VisionCamera that lives in its own worker process.
+
+    It exposes the same interface as VisionCamera to the VisionController. Control calls are
+    sent through a pipe and the encoded frames are read from a shared memory block, so the
+    HALCON execution and the Python glue of each camera run outside of the main process GIL.
+
+    Attributes:
+        name (str): The name of the camera.
+        description (str): A description of the camera.
+        output_path (str): The path where the output images are saved.
+        process (multiprocessing.Process): The worker process running the camera.
+        connection (Connection): Duplex connection to the worker process.
+        image_buffer (SharedImageBuffer): Shared memory block where the worker writes the encoded frames.
+        pending_calls (dict): Futures of the calls waiting for a reply, by call id.
+        calls_lock (threading.Lock): Guards pending_calls and receiving, shared by the callers and the receiver.
+        receiving (bool): Whether the receiver thread still resolves the pending calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        program_path: str,
+        output_path: str,
+        create_camera,
+        pipelined: bool = False,
+        image_buffer_size: int = DEFAULT_IMAGE_BUFFER_SIZE,
+        warmup_image_path: str = None,
+        history_spill_path: str = None,
+        budget: ResourceBudget = None,
+        max_prefetch_age: float = None,
+        history_raw_images: bool = False,
+        camera_options: dict = None,
+    ):
+
+        self.name = name
+        self.description = description
+        self.output_path = output_path
+
+        self.image_buffer = SharedImageBuffer.create(image_buffer_size)
+        context = multiprocessing.get_context("spawn")
+        self.connection, worker_connection = context.Pipe(duplex=True)
+        self.process = context.Process(
+            target=run_camera_worker,
+            args=(
+                worker_connection,
+                name,
+                description,
+                program_path,
+                output_path,
+                create_camera,
+                pipelined,
+                self.image_buffer.name,
+                warmup_image_path,
+                history_spill_path,
+                budget,
+                max_prefetch_age,
+                history_raw_images,
+                camera_options,
+            ),
+            name=f"{name}Worker",
+            daemon=True,
+        )
+        self.process.start()
+        worker_connection.close()
+
+        self.call_ids = itertools.count()
+        self.pending_calls: dict[int, concurrent.futures.Future] = {}
+        self.calls_lock = threading.Lock()
+        self.receiving = True
+        self.send_lock = threading.Lock()
+        self.frame_lock = threading.Lock()
+
+        self.program_number: int = 0
+        self.frame_id: int = 0
+        self.run_time: float = 0
+        self.min_run_time: float = 0
+        self.max_run_time: float = 0
+        self.overlap: float = 0
+        self.startup_time: float = 0
+        self.program_change_time: float = 0
+        self.speed_up: float = 1.0
+        self.program_statistics: dict = {}
+        self.program_output: list = []
+        self.display_sequence: int = 0
+        self.display_completed: int = 0
+        self.display_future: concurrent.futures.Future = None
+        self.display_futures: dict[int, concurrent.futures.Future] = {}
+        self.display_results: dict[int, bool] = {}
+        self.dropped_frames: int = 0
+        self.skipped_renders: int = 0
+
+        self.receiver = threading.Thread(target=self.receive_messages, name=f"{name}Receiver", daemon=True)
+        self.receiver.start()
+
+    def call(self, method: str, *args, timeout: float = DEFAULT_CALL_TIMEOUT):
+        """
+        Calls a camera method in the worker process and waits for its result.
+
+        The call is registered under the same lock the receiver takes to fail the pending calls
+        when it stops, so a call is either answered, failed or refused, never left waiting.
+
+        Raises:
+            RuntimeError: If the worker process is not running or fails to execute the call.
+            TimeoutError: If the reply does not arrive within `timeout` seconds.
+        """
+
+        future = concurrent.futures.Future()
+        call_id = next(self.call_ids)
+        with self.calls_lock:
+            if not self.receiving:
+                raise RuntimeError(f"Camera {self.name} worker is not running")
+            self.pending_calls[call_id] = future
+
+        try:
+            with self.send_lock:
+                self.connection.send((call_id, method, args))
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"{method} got no reply within {timeout} s")
+        finally:
+            with self.calls_lock:
+                self.pending_calls.pop(call_id, None)
+
+    def notify(self, method: str, *args) -> None:
+        """Calls a camera method in the worker process without waiting for a reply."""
+
+        with self.send_lock:
+            self.connection.send((None, method, args))
+
+    def receive_messages(self) -> None:
+        """Receives replies and display notifications from the worker process."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        while True:
+            try:
+                message = self.connection.recv()
+            except (EOFError, OSError):
+                break
+
+            if message[0] == REPLY_MESSAGE:
+                _, call_id, success, result, snapshot = message
+                if snapshot is not None:
+                    self.update_snapshot(snapshot)
+                with self.calls_lock:
+                    future = self.pending_calls.pop(call_id, None)
+                if future is None:
+                    continue
+                if success:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(result))
+            elif message[0] == DISPLAY_MESSAGE:
+                _, sequence, success, rendered = message
+                self.display_completed = max(self.display_completed, sequence)
+                if not success:
+                    logger.error(f"Failed to execute display in camera {self.name} worker")
+                self.resolve_display_future(sequence, rendered)
+
+        logger.warning(f"Camera {self.name} worker connection closed")
+        with self.calls_lock:
+            self.receiving = False
+            for future in self.pending_calls.values():
+                future.set_exception(RuntimeError(f"Camera {self.name} worker is not running"))
+            self.pending_calls.clear()
+
+    def update_snapshot(self, snapshot: dict) -> None:
+        """Updates the mirrored camera state from a worker snapshot."""
+
+        self.program_number = snapshot["program_number"]
+        self.frame_id = snapshot["frame_id"]
+        self.run_time = snapshot["run_time"]
+        self.min_run_time = snapshot["min_run_time"]
+        self.max_run_time = snapshot["max_run_time"]
+        self.overlap = snapshot["overlap"]
+        self.dropped_frames = snapshot["dropped_frames"]
+        self.skipped_renders = snapshot["skipped_renders"]
+        self.startup_time = snapshot["startup_time"]
+        self.program_change_time = snapshot["program_change_time"]
+        self.speed_up = snapshot["speed_up"]
+        self.program_statistics = snapshot["program_statistics"]
+        self.program_output = snapshot["program_output"]
+        if snapshot["display_sequence"] > self.display_sequence:
+            self.display_sequence = snapshot["display_sequence"]
+            self.display_future = concurrent.futures.Future()
+            if self.display_sequence in self.display_results:
+                self.display_future.set_result(self.display_results.pop(self.display_sequence))
+            else:
+                self.display_futures[self.display_sequence] = self.display_future
+            for sequence in [sequence for sequence in self.display_results if sequence < self.display_sequence]:
+                del self.display_results[sequence]
+
+    def resolve_display_future(self, sequence: int, rendered: bool) -> None:
+        """Completes the future of a display once the worker reports it as finished.
+
+        A display can finish before the snapshot announcing it arrives; its result is then kept
+        until the future is created. Earlier futures stay valid while newer frames are executed.
+        """
+
+        future = self.display_futures.pop(sequence, None)
+        if future is not None:
+            future.set_result(rendered)
+        elif sequence > self.display_sequence:
+            self.display_results[sequence] = rendered
+
+    def init(self) -> bool:
+        """Initializes the camera in the worker process."""
+
+        return self.call_logged("init", False, timeout=INIT_CALL_TIMEOUT)
+
+    def set_active_program(self, program_number: int) -> bool:
+        """Sets the active program of the camera in the worker process."""
+
+        return self.call_logged("set_active_program", False, program_number)
+
+    def set_prefetch(self, enabled: bool) -> None:
+        """Sets whether the camera in the worker process prefetches the next frame."""
+
+        self.call_logged("set_prefetch", None, enabled)
+
+    def execute_program(self) -> bool:
+        """Executes the active program in the worker process."""
+
+        return self.call_logged("execute_program", False)
+
+    def execute_burst(self, count: int) -> list[dict] | None:
+        """Executes the active program on `count` frames back-to-back in the worker process."""
+
+        return self.call_logged("execute_burst", None, count)
+
+    def call_logged(self, method: str, default, *args, timeout: float = DEFAULT_CALL_TIMEOUT):
+        """Calls a camera method in the worker process, logging and returning `default` on errors."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            return self.call(method, *args, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Error calling {method} in camera {self.name} worker: {e}")
+
+        return default
+
+    def call_frame(self, method: str, *args) -> tuple | None:
+        """
+        Calls a camera method returning an encoded frame, reading the frame from shared memory.
+
+        Frame calls are serialized, so the block is not written by the next one before it is read.
+
+        Returns:
+            tuple: The frame id or summary of the frame and its JPEG, or None on errors.
+        """
+
+        logger = LoggerManager.get_logger(__name__)
+
+        with self.frame_lock:
+            result = self.call_logged(method, None, *args)
+            if result is None or not isinstance(result[1], int):
+                return result
+            data = self.image_buffer.read_frame(result[1])
+
+        if data is None:
+            logger.warning(f"Frame of {method} in camera {self.name} was overwritten before being read")
+            return None
+        return result[0], data
+
+    def is_display_complete(self) -> bool:
+        """Check if the most recent display operation has completed in the worker process."""
+
+        return self.display_completed >= self.display_sequence
+
+    def get_display_future(self) -> concurrent.futures.Future:
+        """Returns the future of the most recent display operation, or None if there is none."""
+
+        return self.display_future
+
+    def set_program_input(self, index: int, variable: int) -> None:
+        """Sets the input variable for the active program."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            self.notify("set_program_input", index, variable)
+        except Exception as e:
+            logger.error(f"Failed to send input to camera {self.name} worker: {e}")
+
+    def get_program_output(self) -> list:
+        """Gets the output of the active program."""
+
+        return self.program_output
+
+    def get_program_number(self) -> int:
+        """Returns the current program number."""
+
+        return self.program_number
+
+    def get_frame_id(self) -> int:
+        """Returns the identifier of the last executed frame."""
+
+        return self.frame_id
+
+    def get_run_time(self) -> float:
+        """Returns the current runtime."""
+
+        return self.run_time
+
+    def get_min_run_time(self) -> float:
+        """Returns the minimum runtime."""
+
+        return self.min_run_time
+
+    def get_max_run_time(self) -> float:
+        """Returns the maximum runtime."""
+
+        return self.max_run_time
+
+    def get_overlap(self) -> float:
+        """Returns the fraction of the last acquisition overlapped with processing."""
+
+        return self.overlap
+
+    def get_startup_time(self) -> float:
+        """Returns the time it took to load the camera procedures in the worker process."""
+
+        return self.startup_time
+
+    def get_program_change_time(self) -> float:
+        """Returns the time the last program change took in the worker process."""
+
+        return self.program_change_time
+
+    def get_speed_up(self) -> float:
+        """Returns the parallel speed-up of the last execution of the active program."""
+
+        return self.speed_up
+
+    def get_program_statistics(self) -> dict:
+        """Returns the statistics specific to the active program."""
+
+        return self.program_statistics
+
+    def get_dropped_frames(self) -> int:
+        """Returns the number of display frames dropped because the display fell behind."""
+
+        return self.dropped_frames
+
+    def set_display_demand(self, watched: bool, headless_rate: float) -> None:
+        """Sets whether a viewer watches the camera, and the render rate while nobody does."""
+
+        logger = LoggerManager.get_logger(__name__)
+
+        try:
+            self.notify("set_display_demand", watched, headless_rate)
+        except Exception as e:
+            logger.error(f"Failed to send display demand to camera {self.name} worker: {e}")
+
+    def get_skipped_renders(self) -> int:
+        """Returns the number of frames not rendered because nobody was watching."""
+
+        return self.skipped_renders
+
+    def get_program_input_variables(self) -> dict[int, list[str, str]]:
+        """Gets the input variables for the active program."""
+
+        return self.call_logged("get_program_input_variables", {})
+
+    def get_program_output_variables(self) -> dict[int, list[str, str]]:
+        """Gets the output variables for the active program."""
+
+        return self.call_logged("get_program_output_variables", {})
+
+    def get_latency_statistics(self) -> dict:
+        """Returns the latency percentiles, since the last reset, of every stage and procedure."""
+
+        return self.call_logged("get_latency_statistics", {})
+
+    def get_latency_window(self, seconds: float) -> dict:
+        """Returns the latency percentiles of every stage and procedure over the last `seconds`."""
+
+        return self.call_logged("get_latency_window", {}, seconds)
+
+    def reset_latency_statistics(self) -> None:
+        """Clears the latency histograms of every stage and procedure."""
+
+        self.call_logged("reset_latency_statistics", None)
+
+    def get_encoded_frame(self) -> tuple[int, bytes] | None:
+        """Returns the frame id and JPEG of the last frame rendered in the worker process."""
+
+        return self.call_frame("get_encoded_frame")
+
+    def get_full_frame(self, region: list[int] = None) -> tuple[int, bytes] | None:
+        """Encodes the last frame rendered in the worker process at full resolution, on demand."""
+
+        return self.call_frame("get_full_frame", region)
+
+    def get_history(self) -> list[dict]:
+        """Returns the frame id, time, results and timings of every frame in the worker history."""
+
+        return self.call_logged("get_history", [])
+
+    def get_history_frame(self, frame_id: int = None, timestamp: float = None, raw: bool = False) -> tuple | None:
+        """Returns a frame of the worker history, by frame id or the last one at or before a time."""
+
+        return self.call_frame("get_history_frame", frame_id, timestamp, raw)
+
+    def start_profiling(self, window: int) -> bool:
+        """Profiles the lines of the worker procedures over the next `window` triggers."""
+
+        return self.call_logged("start_profiling", False, window)
+
+    def stop_profiling(self) -> str | None:
+        """Stops the profiling in the worker process and returns the path of its report."""
+
+        return self.call_logged("stop_profiling", None)
+
+    def get_profiling_status(self) -> dict:
+        """Returns whether the worker profiling is active, its progress and the last report path."""
+
+        return self.call_logged("get_profiling_status", {})
+
+    def get_profiling_report(self) -> dict:
+        """Returns the ranked lines of the procedures profiled in the worker process."""
+
+        return self.call_logged("get_profiling_report", {})
+
+    def close(self) -> None:
+        """Stops the worker process and releases the shared memory block."""
+
+        if not self.process.is_alive() and self.connection.closed:
+            return
+
+        try:
+            self.notify("close")
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+        self.image_buffer.close()